@@ -0,0 +1,41 @@
+"""
+Compares the cold-path latency of `BerriesService.get_statistics` when fetching the berry
+details serially (one worker) against fetching them with a bounded thread pool.
+
+Runs against the local fake PokeAPI server, so no network access is needed:
+    python -m benchmarks.bench_concurrent_fetch --latency 0.05 --workers 10
+"""
+from berries.service import BerriesService
+from tests.fake_pokeapi import FakePokeAPI
+import argparse
+import time
+
+
+def time_statistics(base_url: str, max_workers: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        BerriesService(base_url=base_url, max_workers=max_workers).get_statistics()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake PokeAPI waits per request.")
+    parser.add_argument("--workers", type=int, default=10, help="Concurrency limit for the concurrent run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the best one is reported.")
+    args = parser.parse_args()
+
+    with FakePokeAPI(latency=args.latency) as fake_api:
+        serial = time_statistics(fake_api.base_url, 1, args.repeat)
+        concurrent = time_statistics(fake_api.base_url, args.workers, args.repeat)
+
+    print(f"berries: {len(fake_api.berries)}, latency per request: {args.latency * 1000:.0f} ms")
+    print(f"serial     (1 worker):   {serial * 1000:8.1f} ms")
+    print(f"concurrent ({args.workers} workers): {concurrent * 1000:8.1f} ms")
+    print(f"speedup: {serial / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
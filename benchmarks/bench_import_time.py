@@ -0,0 +1,65 @@
+"""
+Measures what a worker pays at startup to serve the JSON endpoints only, against a worker that
+has also served the visualization page (and so loaded matplotlib and NumPy).
+
+Each scenario runs in a fresh interpreter with `python -X importtime`, and reports the total
+import time, the peak RSS of the process and whether the chart libraries were loaded:
+    python -m benchmarks.bench_import_time
+"""
+import subprocess
+import sys
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = (
+    "import django; django.setup(); "
+    "from django.core.wsgi import get_wsgi_application; get_wsgi_application(); "
+    "import pokeberries_api_project.urls; "
+)
+REPORT = (
+    "import resource, sys; "
+    "print('RSS', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss); "
+    "print('MODULES', 'matplotlib' in sys.modules, 'numpy' in sys.modules)"
+)
+SCENARIOS = {
+    "json only": SETUP,
+    "json + visualization": SETUP + "import berries.charts, berries.attribute_stats; ",
+}
+
+
+def run_scenario(code: str) -> dict:
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="pokeberries_api_project.settings")
+    env.setdefault("SECRET_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + REPORT],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    # Each -X importtime line is "import time: self | cumulative | package"; top-level imports
+    # have no indentation, so adding up their cumulative times gives the total import time.
+    import_time_us = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and not line.startswith("import time: self"):
+            _, cumulative, package = line[len("import time:"):].split("|")
+            if not package.startswith("  "):
+                import_time_us += int(cumulative)
+    output = dict(line.split(" ", 1) for line in result.stdout.splitlines())
+    return {
+        "import_time_ms": import_time_us / 1000,
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        "rss_mb": int(output["RSS"]) / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "matplotlib_numpy_loaded": output["MODULES"],
+    }
+
+
+def main():
+    for name, code in SCENARIOS.items():
+        result = run_scenario(code)
+        print(
+            f"{name:22} import time: {result['import_time_ms']:8.1f} ms   "
+            f"peak RSS: {result['rss_mb']:6.1f} MB   matplotlib/numpy loaded: {result['matplotlib_numpy_loaded']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
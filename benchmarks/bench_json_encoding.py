@@ -0,0 +1,72 @@
+"""
+Measures the bytes on the wire and the CPU spent per request to serialize (and compress) the JSON
+payloads: with `JsonResponse` as the views used to, with orjson, compressed on every request, and
+sent from the bodies encoded once when the snapshot is saved.
+
+Uses deterministic berries shaped like the PokeAPI ones, so no network access is needed:
+    python -m benchmarks.bench_json_encoding --berries 64
+"""
+import argparse
+import os
+import timeit
+from typing import Any, Callable, Dict
+
+import django
+
+
+def per_call_us(function: Callable[[], Any], repeat: int) -> float:
+    number = max(1, repeat // 5)
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--berries", type=int, default=64, help="Number of berries in the payloads.")
+    parser.add_argument("--repeat", type=int, default=500, help="Calls timed per measurement.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokeberries_api_project.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    django.setup()
+
+    from berries.attribute_stats import AttributeStatistics
+    from berries.encoding import (
+        stdlib_dumps, fast_dumps, compress, encode_body, json_response, supported_encodings, IDENTITY)
+    from berries.records import BerryTable
+    from django.http import JsonResponse
+    from django.test import RequestFactory
+    from tests.fake_pokeapi import make_berries
+
+    table = BerryTable(make_berries(args.berries))
+    growth_times = table.column("growth_time")
+    payloads: Dict[str, Any] = {
+        "allBerryStats": {
+            "berries_names": table.names, "min_growth_time": min(growth_times), "median_growth_time": 12.0,
+            "max_growth_time": max(growth_times), "variance_growth_time": 41.37, "mean_growth_time": 10.7,
+            "frequency_growth_time": growth_times[0]
+        },
+        "berryStats": AttributeStatistics(table).compute(),
+        "berries?limit=100": {"count": len(table), "next": None, "previous": None, "results": list(table.records())[:100]},
+    }
+    factory = RequestFactory()
+
+    print(f"{args.berries} berries; CPU per request in microseconds (best of 5), bytes on the wire")
+    for name, data in payloads.items():
+        body = fast_dumps(data)
+        bodies = encode_body(data)
+        print(f"\n{name}")
+        print(f"  {'JsonResponse (stdlib json)':32s} {per_call_us(lambda: JsonResponse(data), args.repeat):8.1f} us "
+              f"{len(JsonResponse(data).content):8d} B")
+        print(f"  {'stdlib_dumps':32s} {per_call_us(lambda: stdlib_dumps(data), args.repeat):8.1f} us {len(stdlib_dumps(data)):8d} B")
+        print(f"  {'orjson (fast_dumps)':32s} {per_call_us(lambda: fast_dumps(data), args.repeat):8.1f} us {len(body):8d} B")
+        for encoding in supported_encodings():
+            cpu = per_call_us(lambda: compress(fast_dumps(data), encoding), args.repeat)
+            print(f"  {'orjson + ' + encoding + ' per request':32s} {cpu:8.1f} us {len(compress(body, encoding)):8d} B")
+        for encoding in [IDENTITY] + supported_encodings():
+            request = factory.get("/", HTTP_ACCEPT_ENCODING=encoding)
+            cpu = per_call_us(lambda: json_response(request, bodies=bodies), args.repeat)
+            print(f"  {'cached ' + encoding + ' body':32s} {cpu:8.1f} us {len(bodies.get(encoding, body)):8d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares the memory held by the berries as decoded PokeAPI JSON dicts (what the service used to
+keep) against the compact `BerryTable`, and the size of each one pickled into the cache.
+
+The payloads are decoded from JSON text one by one, like responses coming from the PokeAPI, and
+the memory still allocated once each structure is built is measured with tracemalloc:
+    python -m benchmarks.bench_record_memory --berries 64 1000 10000
+"""
+from tests.fake_pokeapi import make_berries
+from berries.records import BerryTable
+from typing import Callable, Any, List, Tuple
+import argparse
+import tracemalloc
+import pickle
+import json
+
+
+def retained_bytes(build: Callable[[], Any]) -> Tuple[int, Any]:
+    tracemalloc.start()
+    try:
+        structure = build()
+        return tracemalloc.get_traced_memory()[0], structure
+    finally:
+        tracemalloc.stop()
+
+
+def run(count: int) -> dict:
+    payloads_text: List[str] = [json.dumps(berry) for berry in make_berries(count)]
+    dicts_bytes, dicts = retained_bytes(lambda: [json.loads(text) for text in payloads_text])
+    table_bytes, table = retained_bytes(lambda: BerryTable(json.loads(text) for text in payloads_text))
+    return {
+        "dicts_kb": dicts_bytes / 1024,
+        "table_kb": table_bytes / 1024,
+        "dicts_pickle_kb": len(pickle.dumps(dicts, pickle.HIGHEST_PROTOCOL)) / 1024,
+        "table_pickle_kb": len(pickle.dumps(table, pickle.HIGHEST_PROTOCOL)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--berries", type=int, nargs="+", default=[64, 1000, 10000], help="Numbers of berries to measure.")
+    args = parser.parse_args()
+
+    for count in args.berries:
+        result = run(count)
+        print(
+            f"{count:6d} berries   dicts {result['dicts_kb']:9.1f} KiB   table {result['table_kb']:8.1f} KiB "
+            f"({result['dicts_kb'] / result['table_kb']:4.1f}x smaller)   pickled: dicts {result['dicts_pickle_kb']:8.1f} KiB, "
+            f"table {result['table_pickle_kb']:7.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Offline benchmark suite, run against the fake PokeAPI serving a recorded fixture (see
+`record_pokeapi_fixture`), or generated berries when none was recorded, with optional latency and
+injected errors:
+- microbenchmarks of `get_statistics`, the statistics helpers and the chart encoders;
+- end-to-end load scenarios against the views through the whole Django stack: cold cache (every
+  request builds the snapshot), warm cache, and concurrent requests on a cold cache.
+
+The results are saved as JSON, so runs can be compared across commits:
+    python -m benchmarks.bench_suite --output before.json
+    python -m benchmarks.bench_suite --output after.json --compare before.json
+"""
+from tests.fake_pokeapi import FakePokeAPI, make_berries, load_fixture
+from benchmarks.record_pokeapi_fixture import DEFAULT_FIXTURE
+from typing import Any, Callable, Dict, List
+from datetime import datetime, timezone
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import timeit
+import json
+import time
+import sys
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Views of the load scenarios, by URL name.
+VIEWS = ("all_berry_stats", "berries_stats_visualization")
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def get_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {"commit": commit, "dirty": dirty}
+
+
+def measure(function: Callable[[], Any], samples: int) -> Dict[str, float]:
+    """
+    Times `function` in `samples` runs of as many calls as fit in about 0.2 seconds.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    per_call = [total / number * 1000 for total in timer.repeat(repeat=samples, number=number)]
+    return {
+        "calls": number * samples, "min_ms": min(per_call), "median_ms": statistics.median(per_call),
+        "mean_ms": statistics.fmean(per_call),
+    }
+
+
+def run_microbenchmarks(payloads: List[Dict[str, Any]], samples: int) -> Dict[str, Dict[str, float]]:
+    from berries.attribute_stats import AttributeStatistics
+    from berries.charts import ChartRenderer
+    from berries.encoding import encode_body
+    from berries.records import BerryTable
+    from berries.service import BerriesService
+    from berries.stats import StreamingStatistics
+    import base64
+
+    service = BerriesService.from_settings()
+    table = BerryTable(payloads)
+    growth_times = list(table.column("growth_time"))
+    statistics_data = service.get_statistics()
+    renderer = ChartRenderer(processes=0)
+
+    def streaming_statistics():
+        values = StreamingStatistics()
+        for value in growth_times:
+            values.add(value)
+        return values.min(), values.median(), values.max(), values.variance(), values.mean(), values.mode()
+
+    def render_bar_chart():
+        frequencies = StreamingStatistics()
+        for value in growth_times:
+            frequencies.add(value)
+        labels, values = zip(*frequencies.frequencies.items())
+        return base64.b64encode(renderer.render_bar_chart(labels, values, "Growth Times", "Growth Time", "Frequency"))
+
+    def render_bins_histogram():
+        return base64.b64encode(renderer.render_bins_histogram(
+            sorted(growth_times), 5, "Bins of Growth Times", "Growth Time Bins", "Number of Berries"))
+
+    benchmarks = {
+        "get_statistics": service.get_statistics,
+        "berry_table": lambda: BerryTable(payloads),
+        "streaming_statistics": streaming_statistics,
+        "attribute_statistics": lambda: AttributeStatistics(table).compute(),
+        "encode_statistics_body": lambda: encode_body(statistics_data),
+        "render_bar_chart": render_bar_chart,
+        "render_bins_histogram": render_bins_histogram,
+    }
+    results = {}
+    for name, function in benchmarks.items():
+        results[name] = measure(function, samples)
+        print(f"  {name:24s} median {results[name]['median_ms']:9.3f} ms   min {results[name]['min_ms']:9.3f} ms")
+    return results
+
+
+def timed_get(client, url: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    response = client.get(url)
+    return {"seconds": time.perf_counter() - start, "ok": response.status_code == 200}
+
+
+def summarize(timings: List[Dict[str, Any]], elapsed: float, upstream_requests: int) -> Dict[str, Any]:
+    latencies = [timing["seconds"] * 1000 for timing in timings]
+    return {
+        "requests": len(timings), "errors": sum(not timing["ok"] for timing in timings),
+        "requests_per_second": len(timings) / elapsed, "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99), "max_ms": max(latencies), "upstream_requests": upstream_requests,
+    }
+
+
+def run_scenarios(fake_api: FakePokeAPI, requests: int, cold_requests: int, concurrency: int) -> Dict[str, Any]:
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+
+    results: Dict[str, Any] = {}
+    for view in VIEWS:
+        url, client = reverse(view), Client()
+        results[view] = {}
+
+        # Cold: every request finds an empty cache, and builds the snapshot from the PokeAPI.
+        timings, upstream, elapsed = [], fake_api.request_count, 0.0
+        for _ in range(cold_requests):
+            cache.clear()
+            timings.append(timed_get(client, url))
+            elapsed += timings[-1]["seconds"]
+        results[view]["cold"] = summarize(timings, elapsed, fake_api.request_count - upstream)
+
+        # Warm: the snapshot is in the cache.
+        client.get(url)
+        upstream, start = fake_api.request_count, time.perf_counter()
+        timings = [timed_get(client, url) for _ in range(requests)]
+        results[view]["warm"] = summarize(timings, time.perf_counter() - start, fake_api.request_count - upstream)
+
+        # Concurrent cold: `concurrency` requests arrive at once on an empty cache.
+        cache.clear()
+        barrier, timings = threading.Barrier(concurrency), []
+
+        def request():
+            thread_client = Client()
+            barrier.wait()
+            timings.append(timed_get(thread_client, url))
+
+        threads = [threading.Thread(target=request) for _ in range(concurrency)]
+        upstream, start = fake_api.request_count, time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[view]["concurrent_cold"] = summarize(
+            timings, time.perf_counter() - start, fake_api.request_count - upstream)
+
+        for scenario, result in results[view].items():
+            print(
+                f"  {view:28s} {scenario:16s} p50 {result['p50_ms']:9.2f} ms   p99 {result['p99_ms']:9.2f} ms   "
+                f"{result['requests_per_second']:8.1f} req/s   upstream {result['upstream_requests']:5d}   "
+                f"errors {result['errors']}")
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'unknown commit'} (ratio < 1 is faster):")
+    for name, result in results["micro"].items():
+        previous = baseline.get("micro", {}).get(name)
+        if previous:
+            print(f"  {name:45s} {previous['median_ms']:9.3f} -> {result['median_ms']:9.3f} ms   "
+                  f"x{result['median_ms'] / previous['median_ms']:.2f}")
+    for view, scenarios in results["scenarios"].items():
+        for scenario, result in scenarios.items():
+            previous = baseline.get("scenarios", {}).get(view, {}).get(scenario)
+            if previous:
+                print(f"  {view + ' ' + scenario:45s} {previous['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms   "
+                      f"x{result['p50_ms'] / previous['p50_ms']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="Berries served by the fake PokeAPI.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds the fake PokeAPI waits per request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds of latency per request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the PokeAPI requests that fail.")
+    parser.add_argument("--samples", type=int, default=5, help="Samples per microbenchmark.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests of the warm scenarios.")
+    parser.add_argument("--cold-requests", type=int, default=5, help="Requests of the cold scenarios.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests of the concurrent cold scenarios.")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the load scenarios.")
+    parser.add_argument("--output", help="Path of the JSON file to save the results to.")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with.")
+    args = parser.parse_args()
+
+    if os.path.exists(args.fixture):
+        fixture = load_fixture(args.fixture)
+    else:
+        print(f"{args.fixture} doesn't exist, using generated berries (see benchmarks.record_pokeapi_fixture).")
+        fixture = {"source": "generated", "recorded_at": None, "berries": make_berries()}
+
+    fake_api = FakePokeAPI(berries=fixture["berries"], jitter=args.jitter, error_rate=args.error_rate)
+    with fake_api, tempfile.TemporaryDirectory() as cache_dir:
+        # Set before Django loads the settings: the real shared cache backend in an empty folder,
+        # no catalog (the snapshots are built from the PokeAPI) and no background refresher.
+        os.environ.update(
+            POKEAPI_BASE_URL=fake_api.base_url, CACHE_LOCATION=cache_dir, BERRIES_CATALOG_PATH="",
+            BERRIES_REFRESH_INTERVAL="0", DJANGO_SETTINGS_MODULE="pokeberries_api_project.settings")
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+        import django
+        django.setup()
+
+        print(f"{len(fixture['berries'])} berries ({fixture['source']}), PokeAPI latency {args.latency * 1000:.1f} ms, "
+              f"error rate {args.error_rate:.0%}")
+        results: Dict[str, Any] = {"meta": {
+            **get_commit(), "started_at": datetime.now(timezone.utc).isoformat(), "python": sys.version.split()[0],
+            "platform": platform.platform(), "fixture": {"path": args.fixture, "source": fixture["source"],
+                                                          "recorded_at": fixture["recorded_at"],
+                                                          "berries": len(fixture["berries"])},
+            "arguments": vars(args),
+        }}
+        if not args.skip_micro:
+            print("microbenchmarks (no PokeAPI latency):")
+            results["micro"] = run_microbenchmarks(fixture["berries"], args.samples)
+        else:
+            results["micro"] = {}
+        fake_api.latency = args.latency
+        print("load scenarios:")
+        results["scenarios"] = run_scenarios(fake_api, args.requests, args.cold_requests, args.concurrency)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nsaved the results to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
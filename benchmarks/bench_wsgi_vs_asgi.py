@@ -0,0 +1,114 @@
+"""
+Load test comparing the WSGI deployment (synchronous views, gunicorn threads) with the ASGI one
+(asynchronous views, Uvicorn workers) while the PokeAPI is slow.
+
+Both servers run with the same number of worker processes against the local fake PokeAPI, with
+the cache and the catalog disabled, so every request waits on a full crawl of the upstream:
+    python -m benchmarks.bench_wsgi_vs_asgi --latency 0.2 --concurrency 100 --requests 400
+"""
+from tests.fake_pokeapi import FakePokeAPI, make_berries
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+import os
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name: str, port: int, workers: int, threads: int, env: dict) -> subprocess.Popen:
+    command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--timeout", "300"]
+    if name == "wsgi":
+        command += ["--worker-class", "gthread", "--threads", str(threads), "pokeberries_api_project.wsgi:application"]
+    else:
+        command += ["--worker-class", "uvicorn_worker.UvicornWorker", "pokeberries_api_project.asgi:application"]
+    return subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The server on port {port} didn't start.")
+
+
+async def run_load(url: str, concurrency: int, total_requests: int) -> dict:
+    latencies, errors = [], 0
+    queue = iter(range(total_requests))
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_second": total_requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the fake PokeAPI waits per request.")
+    parser.add_argument("--berries", type=int, default=20, help="Number of berries served by the fake PokeAPI.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of each server.")
+    parser.add_argument("--threads", type=int, default=8, help="Threads of each WSGI worker.")
+    parser.add_argument("--concurrency", type=int, default=100, help="Clients sending requests at the same time.")
+    parser.add_argument("--requests", type=int, default=400, help="Total requests sent to each server.")
+    args = parser.parse_args()
+
+    with FakePokeAPI(berries=make_berries(args.berries), page_size=args.berries, latency=args.latency) as fake_api:
+        env = dict(
+            os.environ, POKEAPI_BASE_URL=fake_api.base_url, BERRIES_CATALOG_PATH="", BERRIES_REFRESH_INTERVAL="0",
+            CACHE_BACKEND="django.core.cache.backends.dummy.DummyCache",
+            DEBUG="False", DJANGO_SETTINGS_MODULE="pokeberries_api_project.settings"
+        )
+        env.setdefault("SECRET_KEY", "benchmark")
+        print(f"fake PokeAPI: {args.berries} berries, {args.latency * 1000:.0f} ms per request; "
+              f"{args.concurrency} concurrent clients, {args.requests} requests to /allBerryStats/")
+        for name in ("wsgi", "asgi"):
+            port = free_port()
+            server = start_server(name, port, args.workers, args.threads, env)
+            try:
+                wait_until_ready(port)
+                result = asyncio.run(run_load(f"http://127.0.0.1:{port}/allBerryStats/", args.concurrency, args.requests))
+            finally:
+                server.terminate()
+                server.wait()
+            print(
+                f"{name}: {result['requests_per_second']:7.1f} req/s   p50 {result['p50_ms']:8.1f} ms   "
+                f"p99 {result['p99_ms']:8.1f} ms   errors {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
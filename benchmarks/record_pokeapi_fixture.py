@@ -0,0 +1,46 @@
+"""
+Records the berries of the PokeAPI as a fixture for the fake PokeAPI, so the benchmarks (see
+`bench_suite`) run offline against real payloads:
+    python -m benchmarks.record_pokeapi_fixture --output benchmarks/fixtures/pokeapi_berries.json
+"""
+from tests.fake_pokeapi import save_fixture
+from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pokeapi_berries.json")
+
+
+def record(base_url: str, max_workers: int) -> List[Dict[str, Any]]:
+    from berries.client import PokeAPIClient
+    client = PokeAPIClient(pool_maxsize=max_workers)
+    response = client.get_json(base_url)
+    urls = [berry["url"] for berry in response["results"]]
+    while response.get("next"):
+        response = client.get_json(response["next"])
+        urls.extend(berry["url"] for berry in response["results"])
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(client.get_json, urls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_FIXTURE, help="Path of the fixture to write.")
+    parser.add_argument("--base-url", default="https://pokeapi.co/api/v2/berry", help="Berries endpoint to record.")
+    parser.add_argument("--workers", type=int, default=10, help="Berry detail requests in flight at the same time.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokeberries_api_project.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import django
+    django.setup()
+    berries, source = record(args.base_url, args.workers), args.base_url
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    save_fixture(args.output, berries, source)
+    print(f"Saved {len(berries)} berries from {source} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from typing import Dict, Any, List, Optional
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from berries.client import CircuitBreaker, PokeAPIClient, get_client
+from berries import metrics
+from django.conf import settings
+import itertools
+import weakref
+import asyncio
+import math
+import time
+import httpx
+
+
+class AsyncPokeAPIClient:
+    """
+    Asynchronous counterpart of `PokeAPIClient`, built on `httpx.AsyncClient`, for the ASGI views.
+
+    It behaves like the synchronous client: a pool of up to `max_connections` keep-alive
+    connections, connect and read timeouts, retries of connection errors and 429/5xx responses
+    with exponential backoff (honoring Retry-After), and a circuit breaker, which can be shared
+    with the synchronous client of the process. Waiting on the PokeAPI costs a coroutine, not a thread.
+    """
+    BACKOFF_MAX = 120
+    MAX_RETRY_AFTER = 30
+    # httpcore scans every connection of a pool for each idle one whenever a request starts or ends,
+    # which takes over the event loop for pools of hundreds of connections, so the connections are
+    # split among pools of at most this size.
+    POOL_SIZE = 20
+
+    def __init__(
+            self, connect_timeout: float = 3.05, read_timeout: float = 10.0, retries: int = 3,
+            backoff_factor: float = 0.5, max_connections: int = 10, circuit_breaker: Optional[CircuitBreaker] = None):
+        self.__retries = retries
+        self.__backoff_factor = backoff_factor
+        self.__circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        # httpcore also rescans its queue of waiting requests on those events, so requests wait for a
+        # free connection here instead, keeping the queues of the pools short.
+        self.__connections = asyncio.Semaphore(max_connections)
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.__clients = [
+            httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+            for pool_size in self.__pool_sizes(max_connections)
+        ]
+        self.__next_client = itertools.cycle(self.__clients)
+
+    async def __aenter__(self) -> "AsyncPokeAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        for client in self.__clients:
+            await client.aclose()
+
+    def __pool_sizes(self, max_connections: int) -> List[int]:
+        pools = max(1, math.ceil(max_connections / self.POOL_SIZE))
+        return [max_connections // pools + (1 if pool < max_connections % pools else 0) for pool in range(pools)]
+
+    def __backoff(self, retry: int) -> float:
+        # Same schedule as urllib3: the first retry is immediate, then backoff_factor * 2 ** retry.
+        return 0 if retry == 0 else min(self.BACKOFF_MAX, self.__backoff_factor * 2 ** retry)
+
+    def __retry_after(self, response: httpx.Response) -> Optional[float]:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return None
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(0.0, seconds), self.MAX_RETRY_AFTER)
+
+    async def get_json(self, url: str) -> Dict[str, Any]:
+        """
+        Makes a GET request to `url` and returns the decoded JSON body.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open, without making the request.
+            httpx.HTTPError: If the request fails after the retries, or the response is an error.
+            ValueError: If the body of the response isn't JSON.
+        """
+        self.__circuit_breaker.before_call()
+        started, status = time.perf_counter(), "error"
+        try:
+            for retry in range(self.__retries + 1):
+                try:
+                    async with self.__connections:
+                        response = await next(self.__next_client).get(url)
+                except httpx.TransportError:
+                    status = "error"
+                    if retry == self.__retries:
+                        raise
+                    await asyncio.sleep(self.__backoff(retry))
+                    continue
+                status = str(response.status_code)
+                if response.status_code not in PokeAPIClient.RETRY_STATUSES or retry == self.__retries:
+                    break
+                retry_after = self.__retry_after(response)
+                await asyncio.sleep(retry_after if retry_after is not None else self.__backoff(retry))
+
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPStatusError as error:
+            # Client errors (e.g. a 404) don't say anything about the health of the PokeAPI.
+            if error.response.status_code in PokeAPIClient.RETRY_STATUSES:
+                self.__circuit_breaker.record_failure()
+            else:
+                self.__circuit_breaker.record_success()
+            raise
+        except Exception:
+            # Connection errors, and bodies that aren't JSON (e.g. the error page of a proxy).
+            self.__circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # A cancelled call (e.g. the client went away) doesn't say anything about the health of
+            # the PokeAPI either, but it must not keep the trial call of a half-open circuit in flight.
+            self.__circuit_breaker.release_trial()
+            raise
+        finally:
+            metrics.observe_upstream_request("async", status, time.perf_counter() - started)
+        self.__circuit_breaker.record_success()
+        return data
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPokeAPIClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncPokeAPIClient:
+    """
+    Returns the asynchronous PokeAPI client of the running event loop, created from the settings on
+    first use. It shares the circuit breaker of the synchronous client returned by `get_client`.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncPokeAPIClient(
+            connect_timeout=settings.POKEAPI_CONNECT_TIMEOUT,
+            read_timeout=settings.POKEAPI_TIMEOUT,
+            retries=settings.POKEAPI_RETRIES,
+            backoff_factor=settings.POKEAPI_BACKOFF_FACTOR,
+            max_connections=settings.POKEAPI_MAX_CONNECTIONS,
+            circuit_breaker=get_client().circuit_breaker
+        )
+        _async_clients[loop] = client
+    return client
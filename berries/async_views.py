@@ -0,0 +1,170 @@
+"""
+Asynchronous versions of the berries views, used when the project is served through ASGI
+(see `pokeberries_api_project/asgi.py`). Requests waiting on the PokeAPI cost a coroutine
+instead of a worker thread.
+"""
+from berries.service import BerriesService
+from berries.async_client import get_async_client
+from berries.snapshots import (
+    SnapshotStore, Snapshot, SnapshotVersion, STATISTICS_SNAPSHOT, VISUALIZATION_SNAPSHOT, ATTRIBUTES_SNAPSHOT, RECORDS_SNAPSHOT,
+    CHARTS_SNAPSHOT, CLIENT_CHARTS_SNAPSHOTS, SERVER_CHARTS, get_resource_snapshot, split_visualization_data,
+    ensure_refresher_started)
+from berries.resources import RESOURCES
+from berries.index import BerryIndex, parse_query
+from berries.encoding import json_response, encode_response
+from berries.views import (
+    add_snapshot_headers, add_version_headers, get_not_modified_response, get_requested_fields, get_fields_response,
+    get_charts_rendering, get_client_charts_context, get_unknown_resource_error, get_berry_index, get_cached_berry_index,
+    get_berries_page, chart_asset, prometheus_metrics, STATISTICS_ERROR, VISUALIZATION_ERROR, BERRIES_ERROR, CHARTS_ERROR,
+    RESOURCE_STATISTICS_ERROR)
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from django.shortcuts import render
+from django.http.request import HttpRequest
+from django.http import JsonResponse, HttpResponse
+from typing import Union, Dict, Any, Callable, Awaitable, Optional, Tuple, Sequence
+import asyncio
+
+__all__ = [
+    "all_berry_stats", "berry_stats", "berry_stats_charts", "resource_stats", "berries_stats_visualization", "berries_list", "berry_detail", "chart_asset",
+    "prometheus_metrics"]
+
+
+async def aget_service() -> BerriesService:
+    # Opening the berry catalog creates its SQLite tables, a blocking call kept off the event loop.
+    return await asyncio.to_thread(BerriesService.from_settings, get_async_client())
+
+async def aget_snapshot(name: str, build: Callable[[BerriesService], Awaitable[Dict[str, Any]]]) -> Snapshot:
+    ensure_refresher_started()
+
+    async def abuild() -> Dict[str, Any]:
+        return await build(await aget_service())
+
+    return await SnapshotStore().aget_or_build(name, abuild)
+
+async def aget_snapshots(
+        names: Sequence[str], build: Callable[[BerriesService], Awaitable[Dict[str, Dict[str, Any]]]]) -> Dict[str, Snapshot]:
+    ensure_refresher_started()
+
+    async def abuild() -> Dict[str, Dict[str, Any]]:
+        return await build(await aget_service())
+
+    return await SnapshotStore().aget_or_build_many(names, abuild)
+
+async def aget_snapshot_version(name: str) -> Optional[SnapshotVersion]:
+    ensure_refresher_started()
+    return await SnapshotStore().aget_version(name)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def all_berry_stats(request: HttpRequest) -> JsonResponse:
+    try:
+        not_modified = get_not_modified_response(request, await aget_snapshot_version(STATISTICS_SNAPSHOT))
+        if not_modified is not None:
+            return not_modified
+        snapshot = await aget_snapshot(STATISTICS_SNAPSHOT, lambda service: service.aget_statistics())
+    except Exception:
+        return JsonResponse({'error': STATISTICS_ERROR}, status=500)
+    return add_version_headers(json_response(request, snapshot.data, bodies=snapshot.bodies), snapshot.version)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def berry_stats(request: HttpRequest) -> JsonResponse:
+    try:
+        fields = get_requested_fields(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        snapshot = await aget_snapshot(ATTRIBUTES_SNAPSHOT, lambda service: service.aget_attribute_statistics())
+    except Exception:
+        return JsonResponse({'error': STATISTICS_ERROR}, status=500)
+    return add_snapshot_headers(get_fields_response(request, snapshot, fields), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def resource_stats(request: HttpRequest, resource: str) -> JsonResponse:
+    if resource not in RESOURCES:
+        return JsonResponse({'error': get_unknown_resource_error(resource)}, status=404)
+    all_fields = tuple(RESOURCES[resource].fields)
+    try:
+        fields = get_requested_fields(request, all_fields)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        snapshot = await aget_snapshot(
+            get_resource_snapshot(resource), lambda service: service.aget_resource_statistics(resource))
+    except Exception:
+        return JsonResponse({'error': RESOURCE_STATISTICS_ERROR}, status=500)
+    return add_snapshot_headers(get_fields_response(request, snapshot, fields, all_fields), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def berry_stats_charts(request: HttpRequest) -> JsonResponse:
+    try:
+        not_modified = get_not_modified_response(request, await aget_snapshot_version(CHARTS_SNAPSHOT))
+        if not_modified is not None:
+            return not_modified
+        snapshot = await aget_snapshot(CHARTS_SNAPSHOT, lambda service: service.aget_chart_data())
+    except Exception:
+        return JsonResponse({'error': CHARTS_ERROR}, status=500)
+    return add_version_headers(json_response(request, snapshot.data, bodies=snapshot.bodies), snapshot.version)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def berries_stats_visualization(request: HttpRequest) -> Union[HttpResponse, JsonResponse]:
+    try:
+        rendering = get_charts_rendering(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        if rendering == SERVER_CHARTS:
+            snapshot = await aget_snapshot(
+                VISUALIZATION_SNAPSHOT, lambda service: service.aget_data_for_visualization(encoded=False))
+            context = snapshot.data
+        else:
+            snapshots = await aget_snapshots(CLIENT_CHARTS_SNAPSHOTS, aget_client_charts_data)
+            statistics, snapshot = snapshots[STATISTICS_SNAPSHOT], snapshots[CHARTS_SNAPSHOT]
+            context = get_client_charts_context(statistics, snapshot)
+        response = render(request, template_name='berries_stats_visualization.html', context=context)
+    except Exception:
+        return JsonResponse({'error': VISUALIZATION_ERROR}, status=500)
+    return add_snapshot_headers(encode_response(request, response), snapshot)
+
+async def aget_client_charts_data(service: BerriesService) -> Dict[str, Dict[str, Any]]:
+    return split_visualization_data(await service.aget_data_for_visualization(encoded=False, images=False))
+
+async def aget_records_data(service: BerriesService) -> Dict[str, Any]:
+    return {"berries": await service.aget_berry_table()}
+
+async def aget_records_index() -> Tuple[BerryIndex, Union[Snapshot, SnapshotVersion]]:
+    version = await aget_snapshot_version(RECORDS_SNAPSHOT)
+    index = get_cached_berry_index(version)
+    if index is not None:
+        return index, version
+    snapshot = await aget_snapshot(RECORDS_SNAPSHOT, aget_records_data)
+    return get_berry_index(snapshot), snapshot
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def berries_list(request: HttpRequest) -> JsonResponse:
+    try:
+        query = parse_query(request.GET)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        index, snapshot = await aget_records_index()
+    except Exception:
+        return JsonResponse({'error': BERRIES_ERROR}, status=500)
+    return add_snapshot_headers(json_response(request, get_berries_page(request, index, query)), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def berry_detail(request: HttpRequest, name: str) -> JsonResponse:
+    try:
+        index, snapshot = await aget_records_index()
+    except Exception:
+        return JsonResponse({'error': BERRIES_ERROR}, status=500)
+    berry = index.get(name.lower())
+    if berry is None:
+        return JsonResponse({'error': f'There is no berry named {name}.'}, status=404)
+    return add_snapshot_headers(json_response(request, berry), snapshot)
@@ -0,0 +1,77 @@
+from typing import Dict, Any, Sequence
+from statistics import StatisticsError
+from berries.records import BerryTable
+from berries.stats import NUMERIC_FIELDS
+import numpy as np
+
+PERCENTILES = (25, 50, 75, 90)
+
+
+class AttributeStatistics:
+    """
+    Statistics of the numeric berry attributes, computed with NumPy over all the fields at once.
+
+    The columns of the berries table are loaded into a single integer array (one column per field), and
+    every statistic is computed for all the columns in a single vectorized operation. Results use
+    the same rounding and tie-breaking as the growth time statistics of `BerriesService`.
+    """
+
+    def __init__(self, berries: BerryTable, fields: Sequence[str] = NUMERIC_FIELDS):
+        self.__fields = tuple(fields)
+        # The `array('H')` columns expose their buffer, so NumPy reads them without a Python loop.
+        self.__columns = np.array(
+            [np.frombuffer(berries.column(field), dtype=np.uint16) for field in self.__fields], dtype=np.int64
+        ).reshape(len(self.__fields), len(berries)).T
+
+    def __modes(self) -> np.ndarray:
+        # Gives every (column, value) pair its own bin, so one bincount yields all the frequencies.
+        # argmax returns the first berry holding the highest frequency, so ties resolve to the value
+        # seen first, like `statistics.mode`.
+        columns = self.__columns
+        shifted = columns - columns.min(axis=0)
+        offsets = np.concatenate(([0], np.cumsum(shifted.max(axis=0) + 1)[:-1]))
+        codes = shifted + offsets
+        frequencies = np.bincount(codes.ravel())[codes]
+        return columns[frequencies.argmax(axis=0), np.arange(columns.shape[1])]
+
+    def compute(self) -> Dict[str, Any]:
+        """
+        Computes the statistics of every field.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the "berries_count" and, under "fields", the following
+            statistics for each field:
+            - "min" (int), "median" (float), "max" (int), "variance" (float), "mean" (float),
+            "mode" (int) and "percentiles" (Dict[str, float], for the 25th, 50th, 75th and 90th).
+        """
+        columns = self.__columns
+        count = len(columns)
+        if not count:
+            raise StatisticsError("there are no berries to compute statistics from")
+
+        # Integer sums are exact, so the mean and variance match the `statistics` module.
+        sums = columns.sum(axis=0)
+        sums_of_squares = (columns * columns).sum(axis=0)
+        means = sums / count
+        if count > 1:
+            variances = (count * sums_of_squares - sums * sums) / (count * (count - 1))
+        else:
+            variances = np.zeros(len(self.__fields))
+        percentiles = np.percentile(columns, PERCENTILES, axis=0)
+        mins, maxs, modes = columns.min(axis=0), columns.max(axis=0), self.__modes()
+
+        fields = {}
+        for index, field in enumerate(self.__fields):
+            fields[field] = {
+                "min": int(mins[index]),
+                "median": round(float(percentiles[PERCENTILES.index(50), index]), 2),
+                "max": int(maxs[index]),
+                "variance": round(float(variances[index]), 2),
+                "mean": round(float(means[index]), 2),
+                "mode": int(modes[index]),
+                "percentiles": {
+                    str(percentile): round(float(percentiles[position, index]), 2)
+                    for position, percentile in enumerate(PERCENTILES)
+                },
+            }
+        return {"berries_count": count, "fields": fields}
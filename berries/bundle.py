@@ -0,0 +1,156 @@
+"""
+Bundles of precomputed snapshots, built at deploy time (see `manage.py export_berry_bundle`) so
+that freshly started workers serve their first requests without calling the PokeAPI.
+
+A bundle is a single file: a magic number, the length of a JSON header, the header, and then the
+pickled snapshots one after the other. The header records the format of the bundle, the version of
+the snapshots layout (`SNAPSHOT_VERSION`) and the offset and SHA-256 digest of each snapshot, so the
+file is opened memory-mapped and each snapshot is only checked and unpickled when it's first needed. Bundles are trusted
+deploy artifacts, like the entries of the shared cache: never load one from an untrusted source.
+"""
+from berries.catalog import BerryCatalog
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import hashlib
+import mmap
+import json
+import os
+import pickle
+import struct
+import tempfile
+
+BUNDLE_MAGIC = b"BERRYBDL"
+# Bumped whenever the layout of the bundle file changes.
+BUNDLE_FORMAT = 1
+_HEADER_LENGTH = struct.Struct(">I")
+
+
+def write_bundle(path: str, snapshots: Dict[str, Any], snapshot_version: int, source: str) -> Dict[str, Any]:
+    """
+    Writes `snapshots` to a bundle file at `path`, atomically replacing the previous one.
+
+    Args:
+        path (str): The path of the bundle file.
+        snapshots (Dict[str, Any]): The snapshots to bundle, by name.
+        snapshot_version (int): The version of the snapshots layout, checked when the bundle is loaded.
+        source (str): Where the berries come from (the PokeAPI URL or a fixtures directory).
+
+    Returns:
+        Dict[str, Any]: The header of the bundle.
+    """
+    sections = {name: pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL) for name, snapshot in snapshots.items()}
+    offset, entries = 0, {}
+    for name, section in sections.items():
+        entries[name] = {"offset": offset, "length": len(section), "sha256": hashlib.sha256(section).hexdigest()}
+        offset += len(section)
+    header = {
+        "format": BUNDLE_FORMAT, "snapshot_version": snapshot_version, "source": source,
+        "created_at": datetime.now(timezone.utc).isoformat(), "snapshots": entries,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".bundle-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(BUNDLE_MAGIC + _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes)
+            for section in sections.values():
+                file.write(section)
+        # mkstemp creates the file readable by its owner only, and the workers may run as another user.
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return header
+
+
+class SnapshotBundle:
+    """
+    Bundle file opened memory-mapped. The snapshots are checked against their digest and unpickled
+    from the mapping on demand.
+
+    Raises:
+        ValueError: If the file isn't a bundle, or was written in another format.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        prefix = len(BUNDLE_MAGIC) + _HEADER_LENGTH.size
+        if self.__map[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a berries bundle.")
+        (header_length,) = _HEADER_LENGTH.unpack(self.__map[len(BUNDLE_MAGIC):prefix])
+        self.header: Dict[str, Any] = json.loads(self.__map[prefix:prefix + header_length])
+        if self.header.get("format") != BUNDLE_FORMAT:
+            self.close()
+            raise ValueError(f"{path} was written in bundle format {self.header.get('format')}, not {BUNDLE_FORMAT}.")
+        self.__data_offset = prefix + header_length
+
+    @property
+    def snapshot_version(self) -> int:
+        return self.header["snapshot_version"]
+
+    def names(self) -> List[str]:
+        return list(self.header["snapshots"])
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Returns the snapshot named `name`, or None if the bundle doesn't have it.
+
+        Raises:
+            ValueError: If the snapshot doesn't match its digest (e.g. the file is truncated or corrupted).
+        """
+        entry = self.header["snapshots"].get(name)
+        if entry is None:
+            return None
+        start = self.__data_offset + entry["offset"]
+        with memoryview(self.__map)[start:start + entry["length"]] as section:
+            if hashlib.sha256(section).hexdigest() != entry["sha256"]:
+                raise ValueError(f"The {name} snapshot of {self.path} doesn't match its digest.")
+            return pickle.loads(section)
+
+    def close(self):
+        self.__map.close()
+
+
+def load_fixture_berries(directory: str) -> List[Dict[str, Any]]:
+    """
+    Reads the berry detail payloads of a fixtures directory, ordered by id like the PokeAPI list.
+
+    Each JSON file holds either one berry detail payload, a list of them, or a fixture saved by
+    `benchmarks.record_pokeapi_fixture` (an object with the payloads under "berries").
+
+    Raises:
+        ValueError: If the directory has no berries.
+    """
+    berries: List[Dict[str, Any]] = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, file_name), encoding="utf-8") as file:
+            content = json.load(file)
+        if isinstance(content, dict) and "berries" in content:
+            berries.extend(content["berries"])
+        elif isinstance(content, list):
+            berries.extend(content)
+        else:
+            berries.append(content)
+    if not berries:
+        raise ValueError(f"There are no berries in {directory}.")
+    return sorted(berries, key=lambda berry: berry["id"])
+
+
+def build_fixture_catalog(directory: str, path: str) -> BerryCatalog:
+    """
+    Fills a berry catalog at `path` with the berries of a fixtures directory, so a `BerriesService`
+    using it never calls the PokeAPI.
+    """
+    payloads = load_fixture_berries(directory)
+    berries = [{"name": berry["name"], "url": f"fixture:{berry['id']}"} for berry in payloads]
+    catalog = BerryCatalog(path)
+    catalog.sync(len(payloads), berries, lambda stale: payloads, force=True)
+    return catalog
@@ -0,0 +1,61 @@
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+import glob
+import os
+import time
+
+
+class SingleFlightFileBasedCache(FileBasedCache):
+    """
+    File-based cache shared by every worker process, whose `add` is atomic across processes.
+
+    FileBasedCache's `add` checks for the key and then sets it, so two processes can both add the
+    same key. Here only the process holding a lock file on the key can add it, so `add` can be used
+    as a cross-worker lock, like the ones of `SnapshotRefresher` and `SnapshotStore.seed`.
+    """
+    add_lock_suffix = ".djadd"
+    # Seconds after which an add lock is considered abandoned (e.g. if its process was killed).
+    add_lock_timeout = 60
+
+    def _acquire_lock(self, fname: str) -> bool:
+        # Lock files are created with O_EXCL, so only one process can take a given lock.
+        lock_name = fname + self.add_lock_suffix
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if os.path.getmtime(lock_name) + self.add_lock_timeout > time.time():
+                        return False
+                    os.remove(lock_name)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _release_lock(self, fname: str):
+        try:
+            os.remove(fname + self.add_lock_suffix)
+        except FileNotFoundError:
+            pass
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        fname = self._key_to_file(key, version)
+        # While a process is adding the key, the others fail to add it, as they would once it's set.
+        if not self._acquire_lock(fname):
+            return False
+        try:
+            if self.has_key(key, version):
+                return False
+            self.set(key, value, timeout, version)
+            return True
+        finally:
+            self._release_lock(fname)
+
+    def clear(self):
+        super().clear()
+        for lock_name in glob.glob(os.path.join(glob.escape(self._dir), "*" + self.add_lock_suffix)):
+            try:
+                os.remove(lock_name)
+            except FileNotFoundError:
+                pass
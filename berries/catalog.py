@@ -0,0 +1,117 @@
+from typing import List, Dict, Any, Callable, Iterator
+from datetime import datetime, timezone
+from contextlib import closing
+import sqlite3
+import json
+
+
+class BerryCatalog:
+    """
+    Persistent local store of the berries detail payloads, backed by a SQLite file.
+
+    The catalog keeps each berry detail payload together with the position it had in the PokeAPI
+    list endpoint, so reading it back preserves the original order. Reads don't make any request
+    to the PokeAPI; the catalog is only updated by `sync`.
+    """
+
+    def __init__(self, path: str):
+        self.__path = str(path)
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS berries ("
+                "url TEXT PRIMARY KEY, position INTEGER NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.__path, timeout=30)
+
+    def is_empty(self) -> bool:
+        with closing(self.__connect()) as connection:
+            return connection.execute("SELECT 1 FROM berries LIMIT 1").fetchone() is None
+
+    def get_berries(self) -> List[Dict[str, Any]]:
+        """
+        Returns the detail payload of every stored berry, in the PokeAPI list order.
+        """
+        return list(self.iter_berries())
+
+    def iter_berries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the detail payload of every stored berry, in the PokeAPI list order, reading the rows
+        one at a time.
+        """
+        with closing(self.__connect()) as connection:
+            for (data,) in connection.execute("SELECT data FROM berries ORDER BY position"):
+                yield json.loads(data)
+
+    def is_complete(self) -> bool:
+        """
+        Returns whether the catalog holds as many berries as the `count` reported by the list
+        endpoint on the last sync. An empty catalog is never complete.
+        """
+        with closing(self.__connect()) as connection:
+            (stored,) = connection.execute("SELECT COUNT(*) FROM berries").fetchone()
+            row = connection.execute("SELECT value FROM sync_state WHERE key = 'count'").fetchone()
+        return stored > 0 and row is not None and int(row[0]) == stored
+
+    def get_sync_state(self) -> Dict[str, str]:
+        """
+        Returns the `count` reported by the list endpoint and the `synced_at` timestamp of the last sync.
+        """
+        with closing(self.__connect()) as connection:
+            return dict(connection.execute("SELECT key, value FROM sync_state").fetchall())
+
+    def sync(
+            self, count: int, berries: List[Dict[str, str]],
+            fetch_details: Callable[[List[Dict[str, str]]], List[Dict[str, Any]]], force: bool = False) -> Dict[str, int]:
+        """
+        Brings the catalog up to date with the results of the PokeAPI list endpoint.
+
+        Only the berries whose url is new, or whose name changed since the last sync, are passed to
+        `fetch_details`; berries that are no longer listed are removed. When the `count` and the
+        listed berries match what is already stored, no detail is fetched at all. A catalog left
+        incomplete by the previous sync (see `is_complete`), e.g. because the list changed while it
+        was being paginated, has the details of every listed berry fetched again, like with `force`.
+
+        Args:
+            count (int): The `count` field returned by the list endpoint.
+            berries (List[Dict[str, str]]): The `name` and `url` of every listed berry, in list order.
+            fetch_details (Callable): Fetches the detail payloads of the given berries, keeping their order.
+            force (bool, optional): Fetch the details of every listed berry, even unchanged ones. Defaults to False.
+
+        Returns:
+            Dict[str, int]: The number of berries "added", "updated", "removed" and "unchanged".
+        """
+        force = force or not self.is_complete()
+        with closing(self.__connect()) as connection:
+            stored = dict(connection.execute("SELECT url, name FROM berries").fetchall())
+
+        listed_urls = {berry.get('url') for berry in berries}
+        stale = [berry for berry in berries if force or stored.get(berry.get('url')) != berry.get('name')]
+        removed = [url for url in stored if url not in listed_urls]
+        details = dict(zip((berry.get('url') for berry in stale), fetch_details(stale) if stale else []))
+
+        with closing(self.__connect()) as connection, connection:
+            connection.executemany("DELETE FROM berries WHERE url = ?", [(url,) for url in removed])
+            for position, berry in enumerate(berries):
+                url = berry.get('url')
+                if url in details:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO berries (url, position, name, data) VALUES (?, ?, ?, ?)",
+                        (url, position, berry.get('name'), json.dumps(details[url]))
+                    )
+                else:
+                    connection.execute("UPDATE berries SET position = ? WHERE url = ?", (position, url))
+            connection.executemany(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                [("count", str(count)), ("synced_at", datetime.now(timezone.utc).isoformat())]
+            )
+
+        added = sum(1 for berry in stale if berry.get('url') not in stored)
+        return {
+            "added": added,
+            "updated": len(stale) - added,
+            "removed": len(removed),
+            "unchanged": len(berries) - len(stale),
+        }
@@ -0,0 +1,91 @@
+from typing import List, Any, Optional, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.axes import Axes
+import threading
+import atexit
+import io
+
+
+@contextmanager
+def _axes(title: str, x_label: str, y_label: str) -> Iterator[Axes]:
+    # Each chart gets its own Figure and Agg canvas, never registered in pyplot's global figure
+    # manager, so renders don't share any state and nothing is left behind once they finish.
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    try:
+        ax = figure.subplots()
+        ax.set_title(title)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        yield ax
+    finally:
+        figure.clear()
+
+def _encode(ax: Axes) -> bytes:
+    with io.BytesIO() as buffer:
+        ax.figure.savefig(buffer, format='png')
+        return buffer.getvalue()
+
+def render_bar_chart(labels: List[Any], values: List[Any], title: str, x_label: str, y_label: str) -> bytes:
+    with _axes(title, x_label, y_label) as ax:
+        ax.set_xticks(labels)
+        ax.set_yticks(range(0, max(values) + 1))
+        ax.bar(labels, values)
+        return _encode(ax)
+
+def render_bins_histogram(values: List[int], bins: int, title: str, x_label: str, y_label: str) -> bytes:
+    with _axes(title, x_label, y_label) as ax:
+        ax.hist(values, bins=bins, rwidth=0.8)
+        return _encode(ax)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(processes: int) -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=processes)
+        return _process_pool
+
+
+@atexit.register
+def shutdown_process_pool():
+    """
+    Stops the worker processes of the shared render pool, if it was started. A later render
+    with `processes` starts a new pool.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown()
+            _process_pool = None
+
+
+class ChartRenderer:
+    """
+    Renders the berries charts into PNG images, using matplotlib's object-oriented API.
+
+    Renders are thread-safe. When `processes` is greater than 0, they are offloaded to a process
+    pool shared by every renderer of the process (created with `processes` workers on first use),
+    so CPU-heavy renders don't hold the GIL of the worker serving the requests.
+    """
+
+    def __init__(self, processes: int = 0):
+        self.__processes = processes
+
+    def __render(self, render, *args) -> bytes:
+        if self.__processes <= 0:
+            return render(*args)
+        return _get_process_pool(self.__processes).submit(render, *args).result()
+
+    def render_bar_chart(self, labels: List[Any], values: List[Any], title: str, x_label: str, y_label: str) -> bytes:
+        return self.__render(render_bar_chart, list(labels), list(values), title, x_label, y_label)
+
+    def render_bins_histogram(self, values: List[int], bins: int, title: str, x_label: str, y_label: str) -> bytes:
+        return self.__render(render_bins_histogram, list(values), bins, title, x_label, y_label)
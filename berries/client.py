@@ -0,0 +1,180 @@
+from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from berries import metrics
+from django.conf import settings
+import threading
+import requests
+import time
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised without making any request while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is unhealthy.
+
+    After `failure_threshold` consecutive failures the circuit opens, and every call fails with
+    `CircuitOpenError` for `reset_timeout` seconds. Then a single trial call is let through: if it
+    succeeds the circuit closes again, otherwise it stays open for another `reset_timeout`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__failures = 0
+        self.__opened_at: Optional[float] = None
+        self.__trial_in_flight = False
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self.__lock:
+            return self.__state()
+
+    def __state(self) -> str:
+        if self.__opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.__opened_at >= self.__reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        with self.__lock:
+            state = self.__state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self.__trial_in_flight):
+                raise CircuitOpenError("The PokeAPI is failing, requests are paused until it recovers.")
+            if state == self.HALF_OPEN:
+                self.__trial_in_flight = True
+
+    def record_success(self):
+        with self.__lock:
+            self.__failures = 0
+            self.__opened_at = None
+            self.__trial_in_flight = False
+
+    def record_failure(self):
+        with self.__lock:
+            self.__failures += 1
+            if self.__trial_in_flight or self.__failures >= self.__failure_threshold:
+                self.__opened_at = time.monotonic()
+            self.__trial_in_flight = False
+
+    def release_trial(self):
+        """
+        Lets another trial call through when the current one ended without telling whether the
+        upstream recovered (e.g. it was cancelled).
+        """
+        with self.__lock:
+            self.__trial_in_flight = False
+
+
+class _Retry(Retry):
+    # Retry-After is honored, but a huge value must not pin a worker for minutes.
+    MAX_RETRY_AFTER = 30
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_RETRY_AFTER)
+
+
+class PokeAPIClient:
+    """
+    HTTP client for the PokeAPI, meant to be shared by the whole process (see `get_client`).
+
+    It keeps a pool of up to `pool_maxsize` keep-alive connections, bounds every request with
+    `connect_timeout` and `read_timeout`, and retries GETs that fail to connect or answer with
+    429/5xx up to `retries` times, with exponential backoff (honoring Retry-After). A circuit
+    breaker makes calls fail fast while the PokeAPI keeps failing.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self, connect_timeout: float = 3.05, read_timeout: float = 10.0, retries: int = 3,
+            backoff_factor: float = 0.5, pool_maxsize: int = 10, failure_threshold: int = 5,
+            reset_timeout: float = 30.0):
+        self.__timeout = (connect_timeout, read_timeout)
+        self.__circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        retry = _Retry(
+            total=retries, backoff_factor=backoff_factor, status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.__session = requests.Session()
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return self.__circuit_breaker
+
+    @staticmethod
+    def __is_upstream_failure(error: requests.RequestException) -> bool:
+        response = getattr(error, "response", None)
+        return response is None or response.status_code in PokeAPIClient.RETRY_STATUSES
+
+    def get_json(self, url: str) -> Dict[str, Any]:
+        """
+        Makes a GET request to `url` and returns the decoded JSON body.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open, without making the request.
+            requests.RequestException: If the request fails after the retries, or the response is an error.
+        """
+        self.__circuit_breaker.before_call()
+        started, status = time.perf_counter(), "error"
+        try:
+            response = self.__session.get(url, timeout=self.__timeout)
+            status = str(response.status_code)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException as error:
+            # Client errors (e.g. a 404) don't say anything about the health of the PokeAPI, while a
+            # body that isn't JSON (e.g. the error page of a proxy) is a failure like a 5xx.
+            if self.__is_upstream_failure(error):
+                self.__circuit_breaker.record_failure()
+            else:
+                self.__circuit_breaker.record_success()
+            raise
+        except Exception:
+            self.__circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # An interrupted call must not keep the trial call of a half-open circuit in flight forever.
+            self.__circuit_breaker.release_trial()
+            raise
+        finally:
+            metrics.observe_upstream_request("sync", status, time.perf_counter() - started)
+        self.__circuit_breaker.record_success()
+        return data
+
+
+_client: Optional[PokeAPIClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PokeAPIClient:
+    """
+    Returns the PokeAPI client of this process, created from the settings on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PokeAPIClient(
+                    connect_timeout=settings.POKEAPI_CONNECT_TIMEOUT,
+                    read_timeout=settings.POKEAPI_TIMEOUT,
+                    retries=settings.POKEAPI_RETRIES,
+                    backoff_factor=settings.POKEAPI_BACKOFF_FACTOR,
+                    pool_maxsize=settings.POKEAPI_MAX_CONNECTIONS,
+                    failure_threshold=settings.POKEAPI_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.POKEAPI_CIRCUIT_RESET_TIMEOUT
+                )
+    return _client
@@ -0,0 +1,106 @@
+from berries.client import PokeAPIClient
+from berries import metrics
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterator, TYPE_CHECKING
+import asyncio
+
+if TYPE_CHECKING:
+    from berries.async_client import AsyncPokeAPIClient
+
+
+def get_unique_urls(entries: List[Dict[str, str]]) -> List[str]:
+    # An entry listed twice (e.g. when the list changes between two pages) is only fetched once.
+    return list(dict.fromkeys(entry.get('url') for entry in entries))
+
+
+class ResourceCrawler:
+    """
+    Crawls any PokeAPI resource (berries, berry firmnesses, berry flavors, items...): lists its
+    entries by following the `next` links of its list endpoint, and fetches their detail payloads
+    concurrently, with at most `max_workers` requests in flight at the same time.
+
+    Every detail URL is fetched once per crawl, even if it's listed several times.
+    """
+
+    def __init__(self, client: PokeAPIClient, max_workers: int = 10):
+        self.__client = client
+        self.__max_workers = max(1, max_workers)
+
+    def list(self, url: str) -> Tuple[int, List[Dict[str, str]]]:
+        """
+        Fetches every page of a list endpoint, e.g. "https://pokeapi.co/api/v2/berry".
+
+        Returns:
+            Tuple[int, List[Dict[str, str]]]: The 'count' reported by the endpoint, and the 'name'
+            and 'url' of every entry, in list order.
+        """
+        with metrics.stage("list"):
+            response = self.__client.get_json(url)
+            entries: List[Dict[str, str]] = response.get('results')
+
+            while next_request:= response.get('next'):
+                response = self.__client.get_json(next_request)
+                entries.extend(response.get('results'))
+
+        return response.get('count', len(entries)), entries
+
+    def iter_details(self, entries: List[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the detail payload of every listed entry, in list order, as soon as it's fetched,
+        so callers can aggregate the payloads without keeping them all in memory.
+        """
+        urls = get_unique_urls(entries)
+        if not urls:
+            return
+        with metrics.stage("details"), ThreadPoolExecutor(max_workers=min(self.__max_workers, len(urls))) as executor:
+            yield from executor.map(self.__client.get_json, urls)
+
+    def get_details(self, entries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Returns the detail payload of each entry, in the same order as `entries`.
+        """
+        details = dict(zip(get_unique_urls(entries), self.iter_details(entries)))
+        return [details[entry.get('url')] for entry in entries]
+
+    def crawl(self, url: str) -> List[Dict[str, Any]]:
+        _, entries = self.list(url)
+        return self.get_details(entries)
+
+
+class AsyncResourceCrawler:
+    """
+    Asynchronous version of `ResourceCrawler`, with a semaphore instead of a thread pool bounding
+    the requests in flight.
+    """
+
+    def __init__(self, client: "AsyncPokeAPIClient", max_workers: int = 10):
+        self.__client = client
+        self.__max_workers = max(1, max_workers)
+
+    async def list(self, url: str) -> Tuple[int, List[Dict[str, str]]]:
+        with metrics.stage("list"):
+            response = await self.__client.get_json(url)
+            entries: List[Dict[str, str]] = response.get('results')
+
+            while next_request:= response.get('next'):
+                response = await self.__client.get_json(next_request)
+                entries.extend(response.get('results'))
+
+        return response.get('count', len(entries)), entries
+
+    async def get_details(self, entries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.__max_workers)
+
+        async def get_details(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.__client.get_json(url)
+
+        urls = get_unique_urls(entries)
+        with metrics.stage("details"):
+            # gather keeps the results in the same order as `urls`.
+            details = dict(zip(urls, await asyncio.gather(*(get_details(url) for url in urls))))
+        return [details[entry.get('url')] for entry in entries]
+
+    async def crawl(self, url: str) -> List[Dict[str, Any]]:
+        _, entries = await self.list(url)
+        return await self.get_details(entries)
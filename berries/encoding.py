@@ -0,0 +1,173 @@
+"""
+JSON serialization and content negotiation (`Accept-Encoding`) of the API responses.
+
+The serializer is configured with the `BERRIES_JSON_SERIALIZER` setting: the dotted path of a
+function that takes the data and returns the JSON document as bytes. Compression uses gzip, and
+brotli when the `brotli` package is installed.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+import functools
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = "identity"
+GZIP = "gzip"
+BROTLI = "br"
+# Responses smaller than this (in bytes) are sent uncompressed: compressing them saves nothing.
+MIN_COMPRESSED_LENGTH = 200
+
+
+class EncodedJsonResponse(JsonResponse):
+    """
+    `JsonResponse` whose body is already serialized (and possibly compressed), so it's sent as it is.
+    """
+
+    def __init__(self, content: bytes, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        # JsonResponse.__init__ would serialize the data again.
+        HttpResponse.__init__(self, content=content, **kwargs)
+
+
+def stdlib_dumps(data: Any) -> bytes:
+    """
+    Serializes `data` with the standard library `json` module, using the encoder of `JsonResponse`.
+    """
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def fast_dumps(data: Any) -> bytes:
+    """
+    Serializes `data` with orjson, which is several times faster than the standard library, or
+    with `stdlib_dumps` if orjson isn't installed.
+    """
+    if orjson is None:
+        return stdlib_dumps(data)
+    return orjson.dumps(data, default=DjangoJSONEncoder().default)
+
+
+@functools.lru_cache(maxsize=None)
+def get_serializer(path: str) -> Callable[[Any], bytes]:
+    return import_string(path)
+
+
+def dumps(data: Any) -> bytes:
+    return get_serializer(settings.BERRIES_JSON_SERIALIZER)(data)
+
+
+def supported_encodings() -> List[str]:
+    """
+    Returns the content codings the responses can be compressed with, by order of preference.
+    """
+    return [BROTLI, GZIP] if brotli is not None else [GZIP]
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """
+    Returns the supported content coding with the highest quality in an `Accept-Encoding` header
+    (preferring brotli over gzip on ties), or "identity" if the client accepts none of them.
+    """
+    qualities: Dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            qualities[name.lower()] = quality
+
+    best, best_quality = IDENTITY, 0.0
+    for encoding in supported_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compresses `body` with a content coding. By default the levels favor speed, for responses
+    compressed on every request; `best` gives the smallest output, for bodies compressed once
+    and cached.
+    """
+    if encoding == GZIP:
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    if encoding == BROTLI:
+        return brotli.compress(body, quality=11 if best else 5)
+    return body
+
+
+def encode_body(data: Any) -> Dict[str, bytes]:
+    """
+    Serializes `data` once and compresses it with every supported content coding, at the best level.
+
+    Returns:
+        Dict[str, bytes]: The body by content coding, including "identity".
+    """
+    body = dumps(data)
+    bodies = {IDENTITY: body}
+    if len(body) >= MIN_COMPRESSED_LENGTH:
+        bodies.update((encoding, compress(body, encoding, best=True)) for encoding in supported_encodings())
+    return bodies
+
+
+def encode_response(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    """
+    Compresses the content of `response` with the content coding negotiated with `request`.
+    """
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if response.streaming or response.has_header("Content-Encoding") or len(response.content) < MIN_COMPRESSED_LENGTH:
+        return response
+    encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if encoding != IDENTITY:
+        response.content = compress(response.content, encoding)
+        response["Content-Encoding"] = encoding
+    return response
+
+
+def json_response(
+        request: HttpRequest, data: Any = None, status: int = 200, bodies: Optional[Dict[str, bytes]] = None) -> JsonResponse:
+    """
+    Returns a JSON response with the content coding negotiated with `request`.
+
+    Args:
+        request (HttpRequest): The request, whose `Accept-Encoding` header picks the content coding.
+        data (Any, optional): The data to serialize, if there are no `bodies` for the negotiated coding.
+        status (int, optional): The status code of the response. Defaults to 200.
+        bodies (Dict[str, bytes], optional): Bodies already serialized and compressed, by content
+        coding (see `encode_body`). They are sent as they are.
+
+    Returns:
+        JsonResponse: The response, with the `Content-Encoding` and `Vary` headers set.
+    """
+    encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if bodies and IDENTITY in bodies:
+        body = bodies.get(encoding)
+        if body is None:
+            encoding, body = IDENTITY, bodies[IDENTITY]
+        response = EncodedJsonResponse(body, status=status)
+        if encoding != IDENTITY:
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+    response = EncodedJsonResponse(dumps(data), status=status)
+    return encode_response(request, response)
@@ -0,0 +1,139 @@
+from typing import Dict, List, Any, Optional, Tuple, Mapping
+from bisect import bisect_left, bisect_right
+from array import array
+from berries.records import BerryTable, CATEGORY_FIELDS
+from berries.stats import NUMERIC_FIELDS
+
+SORT_FIELDS = ("id", "name") + NUMERIC_FIELDS
+RANGE_LOOKUPS = ("gte", "gt", "lte", "lt")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def parse_query(params: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    Parses the query parameters of the berries list into the arguments of `BerryIndex.search`.
+
+    Numeric fields take an exact value (`size=20`) or a range lookup (`growth_time__gte=10`),
+    category fields take one or more comma-separated names (`firmness=soft,hard`), `sort` takes
+    a field optionally prefixed by "-" for descending order, and `limit`/`offset` paginate.
+
+    Raises:
+        ValueError: If a parameter is unknown or its value isn't valid.
+    """
+    ranges: Dict[str, Dict[str, int]] = {}
+    equals: Dict[str, List[str]] = {}
+    query: Dict[str, Any] = {"ranges": ranges, "equals": equals, "limit": DEFAULT_LIMIT, "offset": 0}
+    for param, value in params.items():
+        field, _, lookup = param.partition("__")
+        if param in ("limit", "offset"):
+            query[param] = _parse_int(param, value)
+        elif param == "sort":
+            query["descending"] = value.startswith("-")
+            query["sort"] = value.lstrip("-")
+            if query["sort"] not in SORT_FIELDS:
+                raise ValueError(f'Unknown sort field: {query["sort"]}. Valid fields are: {", ".join(SORT_FIELDS)}.')
+        elif field in NUMERIC_FIELDS and (lookup in RANGE_LOOKUPS or not lookup):
+            ranges.setdefault(field, {})[lookup or "exact"] = _parse_int(param, value)
+        elif field in CATEGORY_FIELDS and not lookup:
+            equals[field] = [name for name in value.split(",") if name]
+        else:
+            raise ValueError(
+                f'Unknown filter: {param}. Valid filters are: {", ".join(NUMERIC_FIELDS + CATEGORY_FIELDS)}, '
+                f'with {", ".join("__" + lookup for lookup in RANGE_LOOKUPS)} lookups for the numeric fields.')
+    if not 1 <= query["limit"] <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}.")
+    if query["offset"] < 0:
+        raise ValueError("offset can't be negative.")
+    return query
+
+
+def _parse_int(param: str, value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{param} must be an integer.") from None
+
+
+class BerryIndex:
+    """
+    In-memory index of a `BerryTable`, built once per snapshot of the berries.
+
+    Berries are looked up by name in a dict. Each numeric field keeps its values sorted next to
+    the position of their berries, so a range filter is two bisections plus the matching slice,
+    and each category field maps its names to the positions of their berries. Only the berries
+    of the requested page are turned into dicts.
+    """
+
+    def __init__(self, table: BerryTable):
+        self.__table = table
+        self.__by_name = {name: position for position, name in enumerate(table.names)}
+        self.__sorted: Dict[str, Tuple[array, array]] = {}
+        for field in NUMERIC_FIELDS:
+            column = table.column(field)
+            positions = array("I", sorted(range(len(column)), key=column.__getitem__))
+            self.__sorted[field] = (array(column.typecode, (column[position] for position in positions)), positions)
+        self.__categories: Dict[str, Dict[str, List[int]]] = {field: {} for field in CATEGORY_FIELDS}
+        for field in CATEGORY_FIELDS:
+            for position, name in enumerate(table.category(field)):
+                self.__categories[field].setdefault(name, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.__table)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        position = self.__by_name.get(name)
+        return self.__table.record(position) if position is not None else None
+
+    def __range(self, field: str, lookups: Dict[str, int]) -> array:
+        values, positions = self.__sorted[field]
+        start, end = 0, len(values)
+        for lookup, value in lookups.items():
+            if lookup in ("gte", "exact"):
+                start = max(start, bisect_left(values, value))
+            if lookup in ("lte", "exact"):
+                end = min(end, bisect_right(values, value))
+            if lookup == "gt":
+                start = max(start, bisect_right(values, value))
+            if lookup == "lt":
+                end = min(end, bisect_left(values, value))
+        return positions[start:end]
+
+    def search(
+            self, ranges: Optional[Dict[str, Dict[str, int]]] = None, equals: Optional[Dict[str, List[str]]] = None,
+            sort: Optional[str] = None, descending: bool = False, offset: int = 0,
+            limit: int = DEFAULT_LIMIT) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Returns the berries that match every filter, sorted and paginated.
+
+        Args:
+            ranges (Dict[str, Dict[str, int]], optional): Lookups ("exact", "gte", "gt", "lte" or
+            "lt") and their values, by numeric field.
+            equals (Dict[str, List[str]], optional): Accepted names, by category field.
+            sort (str, optional): Field to sort by. Defaults to the PokeAPI order of the berries.
+            descending (bool, optional): Sort in descending order. Defaults to False.
+            offset (int, optional): Number of matching berries to skip. Defaults to 0.
+            limit (int, optional): Maximum number of berries returned. Defaults to 20.
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: The number of matching berries and the records of the requested page.
+        """
+        candidates = [self.__range(field, lookups) for field, lookups in (ranges or {}).items()]
+        for field, names in (equals or {}).items():
+            category = self.__categories[field]
+            candidates.append([position for name in names for position in category.get(name, [])])
+
+        if candidates:
+            candidates.sort(key=len)
+            matches = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            matches = range(len(self.__table))
+
+        if sort is None:
+            positions = sorted(matches)
+        elif sort == "name":
+            positions = sorted(matches, key=self.__table.names.__getitem__, reverse=descending)
+        else:
+            values, sign = self.__table.column(sort), -1 if descending else 1
+            positions = sorted(matches, key=lambda position: (sign * values[position], position))
+        return len(positions), [self.__table.record(position) for position in positions[offset:offset + limit]]
@@ -0,0 +1,49 @@
+from berries.bundle import write_bundle, build_fixture_catalog
+from berries.service import BerriesService
+from berries.snapshots import SnapshotStore, SNAPSHOT_VERSION
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache.backends.locmem import LocMemCache
+import tempfile
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds every berries snapshot once, saves them in the shared cache and exports them to a bundle "
+        "file, which the workers seed the shared cache with at startup to serve their first requests "
+        "without calling the PokeAPI. Snapshots built from fixtures are only exported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=settings.BERRIES_BUNDLE_PATH,
+            help="Path of the bundle file. Defaults to the BERRIES_BUNDLE_PATH setting.")
+        parser.add_argument(
+            "--fixtures", metavar="DIRECTORY",
+            help="Build the bundle from the berry payloads of the JSON files in this directory, without network access.")
+
+    def handle(self, *args, **options):
+        output, fixtures = options["output"], options["fixtures"]
+        if not output:
+            raise CommandError("Set BERRIES_BUNDLE_PATH or pass --output.")
+        try:
+            if fixtures:
+                with tempfile.TemporaryDirectory() as directory:
+                    catalog = build_fixture_catalog(fixtures, os.path.join(directory, "catalog.sqlite3"))
+                    service = BerriesService(catalog=catalog, chart_processes=settings.BERRIES_CHART_PROCESSES)
+                    # The fixtures may not match the PokeAPI, so their snapshots stay out of the shared cache.
+                    store = SnapshotStore(LocMemCache("berries-bundle-export", {}))
+                    snapshots = store.refresh(service, sync=False, attributes=True)
+                source = os.path.abspath(fixtures)
+            else:
+                snapshots = SnapshotStore().refresh(attributes=True)
+                source = settings.POKEAPI_BASE_URL
+        except Exception as error:
+            raise CommandError(f"Could not build the berries snapshots: {error}") from error
+
+        header = write_bundle(output, snapshots, SNAPSHOT_VERSION, source)
+        for name, entry in header["snapshots"].items():
+            self.stdout.write(f"{name}: {entry['length']} bytes, generated at {snapshots[name].generated_at.isoformat()}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {len(snapshots)} snapshots of {source} to {output} (snapshot version {SNAPSHOT_VERSION})."))
@@ -0,0 +1,14 @@
+from berries.snapshots import SnapshotStore
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the berries statistics and visualization snapshots served by the views."
+
+    def handle(self, *args, **options):
+        try:
+            snapshots = SnapshotStore().refresh()
+        except Exception as error:
+            raise CommandError(f"Could not refresh the berries snapshots, the previous ones are kept: {error}") from error
+        for name, snapshot in snapshots.items():
+            self.stdout.write(self.style.SUCCESS(f"Refreshed the {name} snapshot, generated at {snapshot.generated_at.isoformat()}."))
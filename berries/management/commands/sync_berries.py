@@ -0,0 +1,18 @@
+from berries.service import BerriesService
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Updates the local berries catalog, fetching only the berries that are new or changed in the PokeAPI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Fetch the details of every berry again.")
+
+    def handle(self, *args, **options):
+        try:
+            summary = BerriesService.from_settings().sync_catalog(force=options["force"])
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        self.stdout.write(self.style.SUCCESS(
+            "Berries catalog synced: {added} added, {updated} updated, {removed} removed, {unchanged} unchanged.".format(**summary)
+        ))
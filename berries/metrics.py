@@ -0,0 +1,254 @@
+"""
+Metrics of the hot paths of the API, exposed in the Prometheus text format on `/metrics`.
+
+The metrics are only recorded when the `BERRIES_METRICS_ENABLED` setting is set: otherwise the
+timers and counters return right away, without taking any lock. Each process keeps its own metrics.
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from typing import Dict, Tuple, Sequence, Callable, Iterable, List, Optional
+from abc import ABC, abstractmethod
+import contextlib
+import threading
+import bisect
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds, in seconds, of the buckets of the duration histograms.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A sample of a collector: metric name, labels and value.
+Sample = Tuple[str, Dict[str, str], float]
+
+
+# Reading a setting goes through the lazy settings object, which costs more than the rest of a
+# disabled timer, so the flag is read once (and again whenever the setting is overridden).
+_enabled: Optional[bool] = None
+
+
+def is_enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        # Without Django settings (e.g. in the benchmarks), nothing is recorded.
+        if not settings.configured:
+            return False
+        _enabled = getattr(settings, "BERRIES_METRICS_ENABLED", False)
+    return _enabled
+
+
+@receiver(setting_changed)
+def reset_enabled(setting: str, **kwargs):
+    global _enabled
+    if setting == "BERRIES_METRICS_ENABLED":
+        _enabled = None
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {format_value(value)}"
+    pairs = ",".join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+    return f"{name}{{{pairs}}} {format_value(value)}"
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> List[Sample]:
+        pass
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(format_sample(*sample) for sample in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    """
+    Value that only goes up, per combination of labels.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        if not is_enabled():
+            return
+        with self._lock:
+            self.__values[labels] = self.__values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.__values.get(labels, 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self.__values.items())
+        return [(self.name, dict(zip(self.labelnames, labels)), value) for labels, value in values]
+
+    def reset(self):
+        with self._lock:
+            self.__values.clear()
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets, per combination of labels.
+    """
+    type = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per labels: the count of each bucket (the last one is +Inf), and the sum of the values.
+        self.__counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.__sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        if not is_enabled():
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.__counts.get(labels)
+            if counts is None:
+                counts = self.__counts[labels] = [0] * (len(self.buckets) + 1)
+                self.__sums[labels] = 0.0
+            counts[index] += 1
+            self.__sums[labels] += value
+
+    def get_count(self, *labels: str) -> int:
+        return sum(self.__counts.get(labels, ()))
+
+    def samples(self) -> List[Sample]:
+        samples: List[Sample] = []
+        with self._lock:
+            series = [(labels, list(counts), self.__sums[labels]) for labels, counts in self.__counts.items()]
+        for labels, counts, total in series:
+            label_values = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", dict(label_values, le=format_value(bound)), cumulative))
+            samples.append((f"{self.name}_sum", label_values, total))
+            samples.append((f"{self.name}_count", label_values, cumulative))
+        return samples
+
+    def reset(self):
+        with self._lock:
+            self.__counts.clear()
+            self.__sums.clear()
+
+
+class CollectedMetric(Metric):
+    """
+    Metric whose samples are read from elsewhere when the metrics are rendered, e.g. counters that
+    are already kept by another object.
+    """
+
+    def __init__(
+            self, name: str, documentation: str, type: str, collect: Callable[[], Iterable[Sample]]):
+        super().__init__(name, documentation)
+        self.type = type
+        self.__collect = collect
+
+    def samples(self) -> List[Sample]:
+        return list(self.__collect())
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.__metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.__metrics:
+            raise ValueError(f"There is already a metric named {metric.name}.")
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self.__metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.__metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.__metrics.values():
+            if isinstance(metric, (Counter, Histogram)):
+                metric.reset()
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.register(Histogram(
+    "berries_stage_duration_seconds", "Time spent in each stage of building the berries data.", ["stage"]))
+upstream_requests = registry.register(Counter(
+    "berries_upstream_requests_total",
+    "Requests to the PokeAPI by client and status code (\"error\" if there was no response).", ["client", "status"]))
+upstream_duration = registry.register(Histogram(
+    "berries_upstream_request_duration_seconds", "Duration of the requests to the PokeAPI, retries included.",
+    ["client"]))
+snapshot_lookups = registry.register(Counter(
+    "berries_snapshot_lookups_total", "Lookups of the snapshots in the shared cache, by result (hit or miss).",
+    ["snapshot", "lookup", "result"]))
+
+
+class _StageTimer:
+    __slots__ = ("__stage", "__started")
+
+    def __init__(self, stage: str):
+        self.__stage = stage
+
+    def __enter__(self):
+        self.__started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        stage_duration.observe(time.perf_counter() - self.__started, self.__stage)
+
+
+_disabled_timer = contextlib.nullcontext()
+
+
+def stage(name: str):
+    """
+    Returns a context manager that records the time spent in its block as the stage `name`.
+
+    In coroutines, the time includes the time spent awaiting (e.g. the PokeAPI responses).
+    """
+    if not is_enabled():
+        return _disabled_timer
+    return _StageTimer(name)
+
+
+def observe_upstream_request(client: str, status: str, seconds: float):
+    if not is_enabled():
+        return
+    upstream_requests.inc(client, status)
+    upstream_duration.observe(seconds, client)
+
+
+def count_snapshot_lookup(snapshot: str, lookup: str, hit: bool):
+    snapshot_lookups.inc(snapshot, lookup, "hit" if hit else "miss")
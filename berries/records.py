@@ -0,0 +1,98 @@
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from array import array
+from berries.stats import NUMERIC_FIELDS
+import sys
+
+# Fields of the berries that are names of other PokeAPI resources, shared by many berries.
+CATEGORY_FIELDS = ("firmness", "natural_gift_type")
+# Type code of the numeric columns: unsigned 16-bit integers, enough for every berry attribute.
+COLUMN_TYPE = "H"
+
+
+class BerryTable:
+    """
+    Compact, column-oriented table of berries, parsed once from the PokeAPI detail payloads.
+
+    Instead of one nested dict per berry, every numeric attribute is an `array('H')` column, the
+    names shared by many berries (firmness, natural gift type and flavor names) are interned
+    strings, and the flavor potencies are a single flat array. Only the fields the API serves are
+    kept, in the order of the payloads. Arrays pickle as raw bytes, so tables are cheap to cache.
+
+    Raises:
+        OverflowError: If a numeric attribute doesn't fit in an unsigned 16-bit integer.
+    """
+    __slots__ = ("__ids", "__names", "__columns", "__categories", "__items", "__flavors", "__potencies")
+
+    def __init__(self, payloads: Iterable[Dict[str, Any]] = ()):
+        self.__ids = array(COLUMN_TYPE)
+        self.__names: List[str] = []
+        self.__columns: Dict[str, array] = {field: array(COLUMN_TYPE) for field in NUMERIC_FIELDS}
+        self.__categories: Dict[str, List[str]] = {field: [] for field in CATEGORY_FIELDS}
+        self.__items: List[str] = []
+        self.__flavors: Tuple[str, ...] = ()
+        self.__potencies = array(COLUMN_TYPE)
+        for payload in payloads:
+            self.append(payload)
+
+    def append(self, payload: Dict[str, Any]):
+        """
+        Parses a PokeAPI berry detail payload into a new row of the table.
+        """
+        self.__ids.append(payload.get("id") or 0)
+        self.__names.append(sys.intern(payload.get("name")))
+        for field, column in self.__columns.items():
+            column.append(payload.get(field))
+        for field, names in self.__categories.items():
+            names.append(sys.intern((payload.get(field) or {}).get("name") or ""))
+        self.__items.append((payload.get("item") or {}).get("name"))
+
+        potencies = {flavor["flavor"]["name"]: flavor["potency"] for flavor in payload.get("flavors") or []}
+        new_flavors = tuple(sys.intern(flavor) for flavor in potencies if flavor not in self.__flavors)
+        if new_flavors:
+            self.__add_flavors(new_flavors)
+        self.__potencies.extend(potencies.get(flavor, 0) for flavor in self.__flavors)
+
+    def __add_flavors(self, new_flavors: Tuple[str, ...]):
+        # Widens the flat potencies matrix with a zero potency of the new flavors for every previous berry.
+        rows, width = len(self) - 1, len(self.__flavors)
+        potencies = array(COLUMN_TYPE)
+        for row in range(rows):
+            potencies.extend(self.__potencies[row * width:(row + 1) * width])
+            potencies.extend([0] * len(new_flavors))
+        self.__flavors += new_flavors
+        self.__potencies = potencies
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    @property
+    def names(self) -> List[str]:
+        return self.__names
+
+    def column(self, field: str) -> array:
+        """
+        Returns the `array('H')` of the values of a numeric field (or "id"), in the order of the berries.
+        """
+        return self.__ids if field == "id" else self.__columns[field]
+
+    def category(self, field: str) -> List[str]:
+        """
+        Returns the names of a category field ("firmness" or "natural_gift_type"), in the order of the berries.
+        """
+        return self.__categories[field]
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """
+        Returns the berry at `position` as a JSON-serializable dict: its "id", "name", numeric
+        attributes, "firmness", "natural_gift_type", "item" and "flavors" (potency by flavor name).
+        """
+        record = {"id": self.__ids[position], "name": self.__names[position]}
+        record.update((field, column[position]) for field, column in self.__columns.items())
+        record.update((field, names[position]) for field, names in self.__categories.items())
+        record["item"] = self.__items[position]
+        width = len(self.__flavors)
+        record["flavors"] = dict(zip(self.__flavors, self.__potencies[position * width:(position + 1) * width]))
+        return record
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        return (self.record(position) for position in range(len(self)))
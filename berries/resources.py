@@ -0,0 +1,106 @@
+"""
+PokeAPI resources served by the `/resourceStats/<resource>/` endpoint, and the numeric fields whose
+statistics are computed for each of them.
+
+Serving the statistics of another resource, or of another field, only takes a new entry here: the
+crawl, the aggregation and the snapshot of every resource go through the same code. The berries
+aren't one of them: their statistics are served by `/berryStats/` (see `AttributeStatistics`).
+"""
+from berries.stats import StreamingStatistics
+from dataclasses import dataclass
+from statistics import StatisticsError
+from typing import Dict, Any, Callable, Optional, Sequence, Iterable
+
+FieldGetter = Callable[[Dict[str, Any]], Optional[int]]
+
+
+def value_of(key: str) -> FieldGetter:
+    """
+    Reads an integer field of a detail payload. Entries without a value (null) are left out.
+    """
+    return lambda payload: payload.get(key)
+
+
+def length_of(key: str) -> FieldGetter:
+    """
+    Reads the number of elements of a list field of a detail payload (e.g. the berries of a firmness).
+    """
+    return lambda payload: len(payload.get(key) or ())
+
+
+@dataclass(frozen=True)
+class Resource:
+    """
+    A PokeAPI resource, e.g. "berry-flavor" (listed at `/api/v2/berry-flavor`), and how each of its
+    fields is read from a detail payload.
+    """
+    name: str
+    fields: Dict[str, FieldGetter]
+
+
+RESOURCES: Dict[str, Resource] = {resource.name: resource for resource in (
+    Resource("berry-firmness", {"berries": length_of("berries")}),
+    Resource("berry-flavor", {"berries": length_of("berries")}),
+    Resource("item", {"cost": value_of("cost"), "fling_power": value_of("fling_power"), "attributes": length_of("attributes")}),
+)}
+
+
+class ResourceStatistics:
+    """
+    Streaming statistics of every field of a resource.
+
+    Detail payloads are fed one at a time with `add`, and each field is accumulated into its own
+    `StreamingStatistics`, so a single crawl of a resource serves the statistics of all its fields
+    and the payloads can be dropped as soon as they are added.
+    """
+
+    def __init__(self, resource: Resource, fields: Optional[Sequence[str]] = None):
+        self.__resource = resource
+        self.__fields = {field: resource.fields[field] for field in (fields or resource.fields)}
+        self.__statistics = {field: StreamingStatistics() for field in self.__fields}
+        self.__count = 0
+
+    def add(self, payload: Dict[str, Any]):
+        self.__count += 1
+        for field, get_value in self.__fields.items():
+            value = get_value(payload)
+            if value is not None:
+                self.__statistics[field].add(value)
+
+    def add_all(self, payloads: Iterable[Dict[str, Any]]) -> "ResourceStatistics":
+        for payload in payloads:
+            self.add(payload)
+        return self
+
+    @staticmethod
+    def __summarize(values: StreamingStatistics) -> Dict[str, Any]:
+        return {
+            "count": values.count,
+            "min": values.min(),
+            "median": round(float(values.median()), 2),
+            "max": values.max(),
+            "variance": round(float(values.variance()), 2),
+            "mean": round(float(values.mean()), 2),
+            "mode": values.mode(),
+        }
+
+    def compute(self) -> Dict[str, Any]:
+        """
+        Computes the statistics of every field, rounded like the growth time statistics.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the "resource" name, the "count" of entries and, under
+            "fields", the following statistics for each field: the "count" of entries with a value,
+            "min" (int), "median" (float), "max" (int), "variance" (float), "mean" (float) and "mode"
+            (int). A field no entry has a value for only has its "count".
+        """
+        if not self.__count:
+            raise StatisticsError(f"there are no {self.__resource.name} entries to compute statistics from")
+        return {
+            "resource": self.__resource.name,
+            "count": self.__count,
+            "fields": {
+                field: self.__summarize(values) if values.count else {"count": 0}
+                for field, values in self.__statistics.items()
+            },
+        }
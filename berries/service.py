@@ -1,73 +1,189 @@
-from typing import List, Dict, Any, Union, Tuple
-from collections import Counter
-import matplotlib
-matplotlib.use('Agg')
-from matplotlib.axes import Axes
-import matplotlib.pyplot as plt
-import io
+from typing import List, Dict, Any, Union, Tuple, Optional, Iterator, TYPE_CHECKING
 import base64
-import statistics
-import requests
+import asyncio
+from berries.catalog import BerryCatalog
+from berries.client import PokeAPIClient, get_client
+from berries.crawler import ResourceCrawler, AsyncResourceCrawler
+from berries.resources import Resource, ResourceStatistics, RESOURCES
+from berries.stats import StreamingStatistics, NUMERIC_FIELDS
+from berries.records import BerryTable
+from berries import metrics
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from berries.async_client import AsyncPokeAPIClient
+
+# Titles and axis labels of the charts, shared by the PNG renders and the chart data drawn by the browsers.
+BAR_CHART_LABELS = {"title": "Growth Times among the Berries", "x_label": "Growth Time", "y_label": "Frequency"}
+BINS_HISTOGRAM_LABELS = {"title": "Bins of Growth Times", "x_label": "Growth Time Bins", "y_label": "Number of Berries"}
+HISTOGRAM_BINS = 5
 
 class BerriesService:
     
-    def __init__(self):
-        self.__base_url = "https://pokeapi.co/api/v2/berry"
-        self.__session = requests.Session()
+    def __init__(
+            self, base_url: str = "https://pokeapi.co/api/v2/berry", max_workers: int = 10, timeout: float = 10.0,
+            catalog: Optional[BerryCatalog] = None, chart_processes: int = 0, client: Optional[PokeAPIClient] = None,
+            async_client: Optional["AsyncPokeAPIClient"] = None):
+        self.__base_url = base_url
+        self.__catalog = catalog
+        self.__chart_processes = chart_processes
+        self.__max_workers = max(1, max_workers)
+        self.__timeout = timeout
+        self.__client = client if client is not None else PokeAPIClient(read_timeout=timeout, pool_maxsize=self.__max_workers)
+        self.__crawler = ResourceCrawler(self.__client, self.__max_workers)
+        self.__async_client = async_client
+
+    @classmethod
+    def from_settings(cls, async_client: Optional["AsyncPokeAPIClient"] = None) -> "BerriesService":
+        catalog_path = settings.BERRIES_CATALOG_PATH
+        return cls(
+            base_url=settings.POKEAPI_BASE_URL,
+            max_workers=settings.POKEAPI_MAX_WORKERS,
+            catalog=BerryCatalog(catalog_path) if catalog_path else None,
+            chart_processes=settings.BERRIES_CHART_PROCESSES,
+            client=get_client(),
+            async_client=async_client
+        )
 
     @staticmethod
-    def __get_growth_time_median(growth_times: List[int]) -> float:
-        return round(float(statistics.median(growth_times)), 2)
+    def __get_growth_time_median(growth_times: StreamingStatistics) -> float:
+        return round(float(growth_times.median()), 2)
 
     @staticmethod
-    def __get_growth_time_variance(growth_times: List[int]) -> float:
-        if len(growth_times) == 1:
-            return 0.0
-        return round(float(statistics.variance(growth_times)), 2)
+    def __get_growth_time_variance(growth_times: StreamingStatistics) -> float:
+        return round(float(growth_times.variance()), 2)
 
     @staticmethod
-    def __get_growth_time_mean(growth_times: List[int]) -> float:
-        return round(float(statistics.mean(growth_times)), 2)
+    def __get_growth_time_mean(growth_times: StreamingStatistics) -> float:
+        return round(float(growth_times.mean()), 2)
     
     @staticmethod
-    def __get_growth_time_frequency(growth_times: List[int]) -> int:
-        return statistics.mode(growth_times)
+    def __get_growth_time_frequency(growth_times: StreamingStatistics) -> int:
+        return growth_times.mode()
 
-    def __get_all_berries(self) -> List[Dict[str, str]]:
+    def __get_all_berries(self) -> Tuple[int, List[Dict[str, str]]]:
         """
-        Fetches all berry data from the PokeAPI by iterating through paginated results.
-
-        This function makes a GET request to the "https://pokeapi.co/api/v2/berry" endpoint 
-        to retrieve a list of berries. Each request contains a portion of the results 
-        with a 'next' field pointing to the next page, if available. The function 
-        continues making requests until all pages are retrieved.
+        Fetches all berry data from the PokeAPI by iterating through paginated results (see 
+        `ResourceCrawler.list`).
 
-        Returns: A list of dictionaries, where each dictionary contains a 'name' and 'url' field for each berry.
+        Returns: A tuple with the 'count' reported by the endpoint and a list of dictionaries, 
+        where each dictionary contains a 'name' and 'url' field for each berry.
         
         Example return format:
-        [
+        (64, [
             {"name": "cheri", "url": "https://pokeapi.co/api/v2/berry/1/"},
             {"name": "chesto", "url": "https://pokeapi.co/api/v2/berry/2/"},
             ...
-        ]
+        ])
         """
-        response = self.__session.get(self.__base_url).json()
-        berries: List[Dict[str, str]] = response.get('results')
+        return self.__crawler.list(self.__base_url)
 
-        while next_request:= response.get('next'):
-            response = self.__session.get(next_request).json()
-            berries.extend(response.get('results'))
-        
-        return berries
+    def __get_berries_details(self, berries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Fetches the detail payload of every berry concurrently (see `ResourceCrawler.get_details`).
+
+        At most `max_workers` requests are in flight at the same time, and each one is bounded by
+        `timeout` seconds. The results keep the same order as `berries`, so the berries names
+        are returned in the same order as the PokeAPI list endpoint.
+        """
+        return self.__crawler.get_details(berries)
+
+    def __get_resource_url(self, resource: Resource) -> str:
+        # The resources are listed next to the berries, e.g. https://pokeapi.co/api/v2/berry-flavor.
+        return f"{self.__base_url.rstrip('/').rsplit('/', 1)[0]}/{resource.name}"
+
+    async def __acrawl(self, url: str) -> List[Dict[str, Any]]:
+        if self.__async_client is not None:
+            return await AsyncResourceCrawler(self.__async_client, self.__max_workers).crawl(url)
+        # Imported here so that the synchronous deployments never load httpx.
+        from berries.async_client import AsyncPokeAPIClient
+        async with AsyncPokeAPIClient(read_timeout=self.__timeout, max_connections=self.__max_workers) as client:
+            return await AsyncResourceCrawler(client, self.__max_workers).crawl(url)
+
+    @property
+    def has_catalog(self) -> bool:
+        return self.__catalog is not None
+
+    def sync_catalog(self, force: bool = False) -> Dict[str, int]:
+        """
+        Updates the berry catalog with the berries currently listed by the PokeAPI.
+
+        Only the details of new or changed berries are fetched, unless `force` is set.
+
+        Args:
+            force (bool, optional): Fetch the details of every berry again. Defaults to False.
+
+        Returns:
+            Dict[str, int]: The number of berries "added", "updated", "removed" and "unchanged".
+        """
+        if self.__catalog is None:
+            raise ValueError("There is no berry catalog configured.")
+        count, berries = self.__get_all_berries()
+        return self.__catalog.sync(count, berries, self.__get_berries_details, force=force)
+
+    def __iter_berries_data(self) -> Iterator[Dict[str, Any]]:
+        # Yields the detail payloads one by one, as they are fetched or read from the catalog.
+        if self.__catalog is None:
+            _, berries = self.__get_all_berries()
+            yield from self.__crawler.iter_details(berries)
+            return
+        if self.__catalog.is_empty():
+            self.sync_catalog()
+        with metrics.stage("catalog"):
+            yield from self.__catalog.iter_berries()
+
+    async def __aget_berries_data(self) -> List[Dict[str, Any]]:
+        if self.__catalog is not None:
+            # The catalog is a local SQLite file, and syncing it only happens when it's empty.
+            if await asyncio.to_thread(self.__catalog.is_empty):
+                await asyncio.to_thread(self.sync_catalog)
+            with metrics.stage("catalog"):
+                return await asyncio.to_thread(self.__catalog.get_berries)
+        return await self.__acrawl(self.__base_url)
     
+    def __get_berries_table(self) -> BerryTable:
+        # The table is filled as the detail payloads arrive, and each payload is dropped once it's
+        # parsed, so they are never all held at once. The "table" stage includes waiting for them.
+        with metrics.stage("table"):
+            return BerryTable(self.__iter_berries_data())
+
+    async def __aget_berries_table(self) -> BerryTable:
+        # The payloads are gathered as coroutines before being parsed, so they are all held at once.
+        berries = await self.__aget_berries_data()
+        with metrics.stage("table"):
+            return BerryTable(berries)
+    
+    def __build_statistics(self, berries: BerryTable) -> Tuple[Dict[str, Any], StreamingStatistics]:
+        with metrics.stage("statistics"):
+            return self.__compute_statistics(berries)
+
+    def __compute_statistics(self, berries: BerryTable) -> Tuple[Dict[str, Any], StreamingStatistics]:
+        growth_times = StreamingStatistics()
+        for growth_time in berries.column('growth_time'):
+            growth_times.add(growth_time)
+
+        statistics_data = {
+            "berries_names": list(berries.names),
+            "min_growth_time": growth_times.min(),
+            "median_growth_time": self.__get_growth_time_median(growth_times),
+            "max_growth_time": growth_times.max(),
+            "variance_growth_time": self.__get_growth_time_variance(growth_times),
+            "mean_growth_time": self.__get_growth_time_mean(growth_times),
+            "frequency_growth_time": self.__get_growth_time_frequency(growth_times)
+        }
+        return statistics_data, growth_times
+
     def get_statistics(self, for_visualization: bool = False) -> Union[Dict[str, Any], Tuple[Dict[str, Any], List[int]]]:
         """
         Retrieves statistics about berries growth times from the PokeAPI.
 
         This function fetches all berries from the PokeAPI, then retrieves the 
         detailed data for each berry, specifically focusing on their growth times. 
+        If a berry catalog is configured, the berries are read from it instead, 
+        without making any request to the PokeAPI (unless the catalog is empty). 
         It calculates various statistical metrics such as the minimum, median, 
-        maximum, variance, mean, and the most frequent growth time.
+        maximum, variance, mean, and the most frequent growth time, in a single 
+        pass over the berries (see `StreamingStatistics`).
 
         If `for_visualization` is set to True, the function also returns the list 
         of growth times used for statistical calculations. Otherwise, only the 
@@ -90,72 +206,172 @@ class BerriesService:
                 - "frequency_growth_time" (int): Most frequent growth time.
                 - If `for_visualization` is True, returns a tuple where the first 
                 element is the statistics dictionary (same as above) and the second 
-                element is the list of all growth times (List[int]).
+                element is the list of all growth times (List[int]), in the same 
+                order as "berries_names".
         """
-        berries_names = []
-        growth_times = []
-        for berry in self.__get_all_berries():
-            berry_data: Dict[str, Any] = self.__session.get(berry.get('url')).json()
-            berries_names.append(berry_data.get('name'))
-            growth_times.append(berry_data.get('growth_time'))
-
-        statistics_data = {
-            "berries_names": berries_names,
-            "min_growth_time": min(growth_times),
-            "median_growth_time": self.__get_growth_time_median(growth_times),
-            "max_growth_time": max(growth_times),
-            "variance_growth_time": self.__get_growth_time_variance(growth_times),
-            "mean_growth_time": self.__get_growth_time_mean(growth_times),
-            "frequency_growth_time": self.__get_growth_time_frequency(growth_times)
-        }
+        berries = self.__get_berries_table()
+        statistics_data, _ = self.__build_statistics(berries)
 
         if not for_visualization:
             return statistics_data
         
-        return statistics_data, growth_times
-    
-    @staticmethod
-    def __encode_plot() -> str:
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_png = buffer.getvalue()
-        buffer.close()
-
-        return base64.b64encode(image_png).decode('utf-8')
-    
-    @staticmethod
-    def __setup_plot(title: str, x_label: str, y_label: str) -> Axes:
-        _, ax = plt.subplots()
-        ax.set_title(title)
-        ax.set_xlabel(x_label)
-        ax.set_ylabel(y_label)
-        return ax
-    
-    def __generate_bar_chart_image(self, labels: List[Any], values: List[Any], title: str, x_label: str, y_label: str) -> str:
-        ax = self.__setup_plot(title, x_label, y_label)
-        ax.set_xticks(labels)
-        ax.set_yticks(range(0, max(values) + 1))
-        ax.bar(labels, values)
-        return self.__encode_plot()
+        return statistics_data, list(berries.column('growth_time'))
+
+    async def aget_statistics(self, for_visualization: bool = False) -> Union[Dict[str, Any], Tuple[Dict[str, Any], List[int]]]:
+        """
+        Asynchronous version of `get_statistics`: the berries are fetched from the PokeAPI 
+        concurrently as coroutines, instead of in a thread pool.
+        """
+        berries = await self.__aget_berries_table()
+        statistics_data, _ = self.__build_statistics(berries)
+
+        if not for_visualization:
+            return statistics_data
         
-    def __generate_bins_histogram_image(self, values: List[int], bins: int, title: str, x_label: str, y_label: str) -> str:
-        ax = self.__setup_plot(title, x_label, y_label)
-        ax.hist(values, bins=bins, rwidth=0.8)
-        return self.__encode_plot()
+        return statistics_data, list(berries.column('growth_time'))
     
-    def get_data_for_visualization(self) -> Dict[str, Any]:
+    def get_attribute_statistics(
+            self, fields: Optional[List[str]] = None, berries: Optional[BerryTable] = None) -> Dict[str, Any]:
+        """
+        Retrieves statistics about every numeric attribute of the berries.
+
+        The berries are retrieved in the same way as in `get_statistics`, and then the minimum, 
+        median, maximum, variance, mean, most frequent value and percentiles of each field are 
+        calculated at once (see `AttributeStatistics`).
+
+        Args:
+            fields (List[str], optional): The fields to calculate the statistics of. Defaults to 
+            all the numeric fields ("growth_time", "max_harvest", "natural_gift_power", "size", 
+            "smoothness" and "soil_dryness").
+            berries (BerryTable, optional): The berries to calculate the statistics of, e.g. from 
+            `get_berry_table`. Defaults to retrieving them.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the "berries_count" and, under "fields", the 
+            statistics of each requested field.
+        """
+        # Imported here so that serving only the growth time statistics never loads NumPy.
+        from berries.attribute_stats import AttributeStatistics
+        berries = berries if berries is not None else self.__get_berries_table()
+        with metrics.stage("attribute_statistics"):
+            return AttributeStatistics(berries, fields or NUMERIC_FIELDS).compute()
+
+    async def aget_attribute_statistics(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Asynchronous version of `get_attribute_statistics`.
+        """
+        from berries.attribute_stats import AttributeStatistics
+        berries = await self.__aget_berries_table()
+        with metrics.stage("attribute_statistics"):
+            return AttributeStatistics(berries, fields or NUMERIC_FIELDS).compute()
+
+    def get_resource_statistics(self, resource: str) -> Dict[str, Any]:
+        """
+        Retrieves statistics about every numeric field of a PokeAPI resource (see `RESOURCES`).
+
+        Every entry of the resource is listed and its detail payload fetched concurrently, like the 
+        berries, and the payloads are aggregated into the statistics of all the fields as they 
+        arrive (see `ResourceStatistics`), so one crawl serves every field.
+
+        Args:
+            resource (str): The name of the resource, e.g. "berry-flavor".
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the "resource", the "count" of entries and, 
+            under "fields", the statistics of each field.
+
+        Raises:
+            KeyError: If the resource isn't one of `RESOURCES`.
+        """
+        statistics = ResourceStatistics(RESOURCES[resource])
+        _, entries = self.__crawler.list(self.__get_resource_url(RESOURCES[resource]))
+        statistics.add_all(self.__crawler.iter_details(entries))
+        with metrics.stage("resource_statistics"):
+            return statistics.compute()
+
+    async def aget_resource_statistics(self, resource: str) -> Dict[str, Any]:
+        """
+        Asynchronous version of `get_resource_statistics`.
+        """
+        statistics = ResourceStatistics(RESOURCES[resource])
+        statistics.add_all(await self.__acrawl(self.__get_resource_url(RESOURCES[resource])))
+        with metrics.stage("resource_statistics"):
+            return statistics.compute()
+
+    def get_berry_table(self) -> BerryTable:
+        """
+        Retrieves every berry as a compact `BerryTable`, in the order of the PokeAPI list endpoint.
+
+        The berries are retrieved in the same way as in `get_statistics`, keeping only the fields 
+        served by the API: the id, name and numeric attributes of each berry, and the names of its 
+        firmness, natural gift type, item and flavors (with their potency).
+
+        Returns:
+            BerryTable: The table of the berries.
+        """
+        return self.__get_berries_table()
+
+    async def aget_berry_table(self) -> BerryTable:
+        """
+        Asynchronous version of `get_berry_table`.
+        """
+        return await self.__aget_berries_table()
+
+    def get_chart_data(self) -> Dict[str, Any]:
+        """
+        Retrieves the data the berries charts are drawn from, so clients can draw them themselves.
+
+        The berries are retrieved in the same way as in `get_statistics`, and no image is rendered.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the "berries_count" and the data of each chart:
+            - "bar_chart": the growth times ("labels", in ascending order) and how many berries 
+            have each of them ("values").
+            - "bins_histogram": the growth times split into 5 bins of equal width, like 
+            `Axes.hist(bins=5)` does: the 6 "edges" of the bins and the "counts" of berries in each bin.
+            Each chart also has its "title", "x_label" and "y_label".
+        """
+        _, growth_times = self.__build_statistics(self.__get_berries_table())
+        return self.__build_chart_data(growth_times)
+
+    async def aget_chart_data(self) -> Dict[str, Any]:
+        """
+        Asynchronous version of `get_chart_data`.
+        """
+        _, growth_times = self.__build_statistics(await self.__aget_berries_table())
+        return self.__build_chart_data(growth_times)
+
+    def __build_chart_data(self, growth_times: StreamingStatistics) -> Dict[str, Any]:
+        frequencies = growth_times.frequencies
+        labels = sorted(frequencies)
+        edges, counts = growth_times.histogram(HISTOGRAM_BINS)
+        return {
+            "berries_count": growth_times.count,
+            "bar_chart": dict(BAR_CHART_LABELS, labels=labels, values=[frequencies[label] for label in labels]),
+            "bins_histogram": dict(BINS_HISTOGRAM_LABELS, bins=HISTOGRAM_BINS, edges=edges, counts=counts),
+        }
+
+    def get_data_for_visualization(
+            self, encoded: bool = True, images: bool = True, berries: Optional[BerryTable] = None) -> Dict[str, Any]:
         """
         Prepares and returns berry growth statistics along with visualization data.
 
         This method first retrieves berry growth statistics and their corresponding 
-        growth times by calling `get_statistics(for_visualization=True)`. It then 
+        growth times, in the same way as `get_statistics`. It then 
         creates two visualizations: 
         1. A bar chart showing the frequency of each growth time.
         2. A histogram dividing the growth times into bins.
 
         The generated images for both charts are included in the returned dictionary 
-        as encoded strings.
+        as encoded strings, or as the raw PNG bytes if `encoded` is set to False. The data 
+        the charts are drawn from (see `get_chart_data`) is included as well, under "charts".
+
+        Args:
+            encoded (bool, optional): Flag to return the images Base64-encoded. Defaults to True.
+            images (bool, optional): Flag to render the images. Without them, only the statistics 
+            and the chart data are returned, and matplotlib isn't used. Defaults to True.
+            berries (BerryTable, optional): The berries to calculate the statistics of, e.g. from 
+            `get_berry_table`. Defaults to retrieving them.
 
         Returns:
             Dict[str, Any]: A dictionary containing the same statistical data returned by `get_statistics` along with 
@@ -164,16 +380,47 @@ class BerriesService:
             growth time frequencies.
             - "bins_histogram" (str): Base64-encoded image of the histogram dividing 
             growth times into bins.
+            - "charts" (Dict[str, Any]): The data of both charts, as returned by `get_chart_data`.
         """
-        statistics_data, growth_times = self.get_statistics(for_visualization=True)
-        growth_times_counter = Counter(growth_times)
-        labels, values= zip(*growth_times_counter.items())
+        berries = berries if berries is not None else self.__get_berries_table()
+        statistics_data, growth_times = self.__build_statistics(berries)
+        statistics_data["charts"] = self.__build_chart_data(growth_times)
+        if not images:
+            return statistics_data
+        return self.__build_visualization(statistics_data, growth_times, encoded)
 
-        bar_chart_image = self.__generate_bar_chart_image(
-            labels, values, title="Growth Times among the Berries", x_label="Growth Time", y_label="Frequency")
+    async def aget_data_for_visualization(self, encoded: bool = True, images: bool = True) -> Dict[str, Any]:
+        """
+        Asynchronous version of `get_data_for_visualization`. The charts are rendered in a 
+        separate thread, so they don't block the event loop.
+        """
+        statistics_data, growth_times = self.__build_statistics(await self.__aget_berries_table())
+        statistics_data["charts"] = self.__build_chart_data(growth_times)
+        if not images:
+            return statistics_data
+        return await asyncio.to_thread(self.__build_visualization, statistics_data, growth_times, encoded)
+
+    def __build_visualization(
+            self, statistics_data: Dict[str, Any], growth_times: StreamingStatistics, encoded: bool) -> Dict[str, Any]:
+        with metrics.stage("charts"):
+            return self.__render_charts(statistics_data, growth_times, encoded)
+
+    def __render_charts(
+            self, statistics_data: Dict[str, Any], growth_times: StreamingStatistics, encoded: bool) -> Dict[str, Any]:
+        # Imported here so that workers serving only the JSON endpoints never load matplotlib.
+        from berries.charts import ChartRenderer
+        chart_renderer = ChartRenderer(processes=self.__chart_processes)
+
+        labels, values= zip(*growth_times.frequencies.items())
+
+        bar_chart_image = chart_renderer.render_bar_chart(labels, values, **BAR_CHART_LABELS)
         
-        bins_histogram_image = self.__generate_bins_histogram_image(
-            growth_times, bins=5, title="Bins of Growth Times", x_label="Growth Time Bins", y_label="Number of Berries")
+        bins_histogram_image = chart_renderer.render_bins_histogram(
+            growth_times.values(), bins=HISTOGRAM_BINS, **BINS_HISTOGRAM_LABELS)
+
+        if encoded:
+            bar_chart_image = base64.b64encode(bar_chart_image).decode('utf-8')
+            bins_histogram_image = base64.b64encode(bins_histogram_image).decode('utf-8')
 
         statistics_data["bar_chart"] = bar_chart_image
         statistics_data["bins_histogram"] = bins_histogram_image
@@ -0,0 +1,94 @@
+from typing import Dict, Any, Callable, Awaitable, Hashable, Optional
+import collections
+import threading
+import asyncio
+import weakref
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls within a process: while a call for a key is in flight, the other
+    callers with the same key wait for it and share its result (or its exception) instead of
+    running their own.
+
+    Calls from threads (`do`) and from coroutines of the same event loop (`ado`) are coalesced
+    separately. The counters of each key report how many calls ran and how many were coalesced.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: Dict[Hashable, _Call] = {}
+        self.__tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary())
+        self.__counters: Dict[Hashable, collections.Counter] = collections.defaultdict(collections.Counter)
+
+    def __count(self, key: Hashable, coalesced: bool):
+        # Called with the lock held.
+        self.__counters[key]["coalesced" if coalesced else "executed"] += 1
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Returns `function()`, or the result of the call for `key` that is already in flight.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+            self.__count(key, coalesced=not leader)
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as error:
+                call.error = error
+            finally:
+                with self.__lock:
+                    del self.__calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous version of `do`. The shared call runs in its own task, so it isn't cancelled
+        when one of its callers is.
+        """
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            tasks = self.__tasks.setdefault(loop, {})
+            task = tasks.get(key)
+            leader = task is None
+            if leader:
+                task = tasks[key] = loop.create_task(function())
+                task.add_done_callback(lambda _: tasks.pop(key, None))
+            self.__count(key, coalesced=not leader)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[Hashable, Dict[str, int]]:
+        """
+        Returns, for each key, how many calls were `executed` and how many were `coalesced` into them.
+        """
+        with self.__lock:
+            return {
+                key: {"executed": counter["executed"], "coalesced": counter["coalesced"]}
+                for key, counter in self.__counters.items()
+            }
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__counters.clear()
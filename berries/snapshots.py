@@ -0,0 +1,491 @@
+from berries.service import BerriesService
+from berries.single_flight import SingleFlight
+from berries.encoding import encode_body, IDENTITY
+from berries.bundle import SnapshotBundle
+from berries.resources import RESOURCES
+from berries import metrics
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.core.cache import cache, BaseCache
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Sequence
+import threading
+import hashlib
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+STATISTICS_SNAPSHOT = "statistics"
+VISUALIZATION_SNAPSHOT = "visualization"
+ATTRIBUTES_SNAPSHOT = "attributes"
+RECORDS_SNAPSHOT = "records"
+CHARTS_SNAPSHOT = "charts"
+# The statistics of each resource (see `berries.resources`) are kept in a snapshot of their own.
+RESOURCE_SNAPSHOT_PREFIX = "resource:"
+# Snapshots served as they are by the JSON endpoints, so their bodies are encoded when they are saved.
+JSON_SNAPSHOTS = (STATISTICS_SNAPSHOT, ATTRIBUTES_SNAPSHOT, CHARTS_SNAPSHOT)
+CHART_KEYS = ("bar_chart", "bins_histogram", "charts")
+# Snapshots of the visualization page when the browsers draw the charts, built together on a miss.
+CLIENT_CHARTS_SNAPSHOTS = (STATISTICS_SNAPSHOT, CHARTS_SNAPSHOT)
+# Where the charts of the visualization page are drawn (the BERRIES_CHARTS_RENDERING setting): by
+# the browsers from the chart data, or by the server as PNG images.
+CLIENT_CHARTS = "client"
+SERVER_CHARTS = "server"
+CHARTS_RENDERINGS = (CLIENT_CHARTS, SERVER_CHARTS)
+# Bumped whenever the layout of the snapshots changes, so the old ones are ignored.
+SNAPSHOT_VERSION = 7
+
+# Builds of the snapshots in flight in this process, keyed by snapshot name. `snapshot_builds.stats()`
+# reports how many builds ran and how many requests were coalesced into them.
+snapshot_builds = SingleFlight()
+
+
+def collect_snapshot_builds(result: str) -> List[metrics.Sample]:
+    # The counters of `snapshot_builds` are exported as they are, whether the metrics are enabled or not.
+    return [
+        (f"berries_snapshot_builds_{result}_total", {"snapshot": name}, counters[result])
+        for name, counters in snapshot_builds.stats().items()
+    ]
+
+
+metrics.registry.register(metrics.CollectedMetric(
+    "berries_snapshot_builds_executed_total", "Builds of the missing snapshots run by this process.", "counter",
+    lambda: collect_snapshot_builds("executed")))
+metrics.registry.register(metrics.CollectedMetric(
+    "berries_snapshot_builds_coalesced_total", "Requests that waited for a build of a missing snapshot in flight.",
+    "counter", lambda: collect_snapshot_builds("coalesced")))
+
+
+def get_resource_snapshot(resource: str) -> str:
+    return f"{RESOURCE_SNAPSHOT_PREFIX}{resource}"
+
+
+def is_json_snapshot(name: str) -> bool:
+    return name in JSON_SNAPSHOTS or name.startswith(RESOURCE_SNAPSHOT_PREFIX)
+
+
+def split_visualization_data(visualization_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the data of the statistics and charts snapshots, by name, from the output of
+    `BerriesService.get_data_for_visualization`.
+    """
+    return {
+        STATISTICS_SNAPSHOT: {key: value for key, value in visualization_data.items() if key not in CHART_KEYS},
+        CHARTS_SNAPSHOT: visualization_data["charts"],
+    }
+
+
+@dataclass(frozen=True)
+class SnapshotVersion:
+    """
+    Identifies the data of a snapshot without the data itself, to answer conditional requests.
+
+    `digest` is a hash of the data, `generated_at` when the snapshot was built and `modified_at`
+    when its data last changed: rebuilding a snapshot with the same data keeps the previous one.
+    """
+    digest: str
+    generated_at: datetime
+    modified_at: datetime
+
+    @property
+    def etag(self) -> str:
+        # Weak, because the same data is sent with different content codings.
+        return f'W/"{self.digest}"'
+
+    @property
+    def age(self) -> int:
+        return max(0, int((datetime.now(timezone.utc) - self.generated_at).total_seconds()))
+
+
+@dataclass
+class Snapshot:
+    data: Dict[str, Any]
+    assets: Dict[str, bytes] = field(default_factory=dict)
+    generated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # The data serialized to JSON, by content coding ("identity", "gzip", "br"), for the JSON snapshots.
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+    digest: str = ""
+    modified_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        if self.modified_at is None:
+            self.modified_at = self.generated_at
+
+    @property
+    def version(self) -> SnapshotVersion:
+        return SnapshotVersion(self.digest, self.generated_at, self.modified_at)
+
+    @property
+    def age(self) -> int:
+        return self.version.age
+
+
+def get_digest(data: Dict[str, Any], bodies: Dict[str, bytes]) -> str:
+    """
+    Returns a hash of the data of a snapshot: of its JSON body if it has one, or of the pickled data.
+    """
+    content = bodies[IDENTITY] if IDENTITY in bodies else pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+class SnapshotStore:
+    """
+    Keeps the last good statistics and visualization payloads in the cache shared by all the workers.
+
+    Snapshots never expire: they are only replaced by a newer one, so the views can always answer
+    with the last good data even while the PokeAPI is down. Binary values of the data (the chart
+    images) are kept apart as content-hashed assets, and replaced in the data by their URL. The
+    JSON snapshots also keep their data serialized and compressed, so serving them only copies bytes.
+
+    The version of each snapshot (see `SnapshotVersion`) is also stored on its own, so conditional
+    requests are answered without loading the snapshot.
+    """
+
+    def __init__(self, snapshots_cache: Optional[BaseCache] = None):
+        self.__cache = snapshots_cache if snapshots_cache is not None else cache
+
+    @staticmethod
+    def __key(name: str) -> str:
+        return f"berries:snapshot:{name}"
+
+    @staticmethod
+    def __version_key(name: str) -> str:
+        return f"berries:snapshot:{name}:version"
+
+    def __exists(self, name: str) -> bool:
+        return self.__cache.get(self.__version_key(name), version=SNAPSHOT_VERSION) is not None
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        return self.__cache.get(self.__key(name), version=SNAPSHOT_VERSION)
+
+    async def aget(self, name: str) -> Optional[Snapshot]:
+        return await self.__cache.aget(self.__key(name), version=SNAPSHOT_VERSION)
+
+    def seed(self, bundle: SnapshotBundle) -> List[str]:
+        """
+        Adds the snapshots of a bundle to the cache, once per bundle: the first worker started with it
+        seeds the cache, and the others (or the same one restarted later) leave it as it is, so the
+        bundle never replaces snapshots that were refreshed or evicted since. A snapshot already in
+        the cache is kept as well, and a corrupted one is logged and left to be built on demand.
+
+        Returns:
+            List[str]: The names of the snapshots added to the cache.
+        """
+        seeded_key = f"berries:bundle:{bundle.header['created_at']}"
+        if not self.__cache.add(seeded_key, True, timeout=None, version=SNAPSHOT_VERSION):
+            return []
+        seeded = []
+        for name in bundle.names():
+            try:
+                snapshot = bundle.get(name)
+            except ValueError:
+                logger.warning("Could not load the %s snapshot of the berries bundle at %s.", name, bundle.path, exc_info=True)
+                continue
+            if self.__cache.add(self.__key(name), snapshot, timeout=None, version=SNAPSHOT_VERSION):
+                self.__cache.set(self.__version_key(name), snapshot.version, timeout=None, version=SNAPSHOT_VERSION)
+                seeded.append(name)
+        return seeded
+
+    def get_version(self, name: str) -> Optional[SnapshotVersion]:
+        """
+        Returns the version of the stored snapshot, or None if there isn't one.
+        """
+        version = self.__cache.get(self.__version_key(name), version=SNAPSHOT_VERSION)
+        if version is None:
+            # The version entry may have been culled from the cache while the snapshot was kept.
+            snapshot = self.get(name)
+            if snapshot is not None:
+                version = snapshot.version
+                self.__cache.set(self.__version_key(name), version, timeout=None, version=SNAPSHOT_VERSION)
+        metrics.count_snapshot_lookup(name, "version", hit=version is not None)
+        return version
+
+    async def aget_version(self, name: str) -> Optional[SnapshotVersion]:
+        """
+        Asynchronous version of `get_version`, for the ASGI views.
+        """
+        version = await self.__cache.aget(self.__version_key(name), version=SNAPSHOT_VERSION)
+        if version is None:
+            return await sync_to_async(self.get_version)(name)
+        metrics.count_snapshot_lookup(name, "version", hit=True)
+        return version
+
+    def save(self, name: str, data: Dict[str, Any]) -> Snapshot:
+        data, assets = dict(data), {}
+        for key, value in data.items():
+            if isinstance(value, bytes):
+                digest = hashlib.sha256(value).hexdigest()[:32]
+                assets[digest] = value
+                data[key] = reverse("chart_asset", args=[digest])
+        bodies = encode_body(data) if is_json_snapshot(name) else {}
+        digest = get_digest(data, bodies)
+        previous = self.__cache.get(self.__version_key(name), version=SNAPSHOT_VERSION)
+        modified_at = previous.modified_at if previous is not None and previous.digest == digest else None
+        snapshot = Snapshot(data, assets, bodies=bodies, digest=digest, modified_at=modified_at)
+        # The snapshot is stored before its version, so a version never refers to a missing snapshot.
+        self.__cache.set(self.__key(name), snapshot, timeout=None, version=SNAPSHOT_VERSION)
+        self.__cache.set(self.__version_key(name), snapshot.version, timeout=None, version=SNAPSHOT_VERSION)
+        return snapshot
+
+    def delete(self, name: str):
+        self.__cache.delete_many([self.__key(name), self.__version_key(name)], version=SNAPSHOT_VERSION)
+
+    def get_or_build(self, name: str, build: Callable[[], Dict[str, Any]]) -> Snapshot:
+        """
+        Returns the stored snapshot, building and saving it only if there isn't one yet.
+
+        Concurrent misses of the same snapshot in this process are coalesced into a single build.
+        """
+        snapshot = self.get(name)
+        metrics.count_snapshot_lookup(name, "snapshot", hit=snapshot is not None)
+        if snapshot is None:
+            snapshot = snapshot_builds.do(name, lambda: self.__build(name, build))
+        return snapshot
+
+    def __build(self, name: str, build: Callable[[], Dict[str, Any]]) -> Snapshot:
+        # A build that finished right before this one started already saved the snapshot.
+        snapshot = self.get(name)
+        return snapshot if snapshot is not None else self.save(name, build())
+
+    async def aget_or_build(self, name: str, build: Callable[[], Awaitable[Dict[str, Any]]]) -> Snapshot:
+        """
+        Asynchronous version of `get_or_build`, for the ASGI views.
+        """
+        snapshot = await self.aget(name)
+        metrics.count_snapshot_lookup(name, "snapshot", hit=snapshot is not None)
+        if snapshot is None:
+            snapshot = await snapshot_builds.ado(name, lambda: self.__abuild(name, build))
+        return snapshot
+
+    async def __abuild(self, name: str, build: Callable[[], Awaitable[Dict[str, Any]]]) -> Snapshot:
+        snapshot = await self.aget(name)
+        return snapshot if snapshot is not None else await sync_to_async(self.save)(name, await build())
+
+    def get_or_build_many(
+            self, names: Sequence[str], build: Callable[[], Dict[str, Dict[str, Any]]]) -> Dict[str, Snapshot]:
+        """
+        Returns the stored snapshots of every name, building and saving all of them if any is missing,
+        from a single call to `build`, which returns the data of each snapshot by name.
+
+        Concurrent misses of the same snapshots in this process are coalesced into a single build.
+        """
+        snapshots = self.__get_many(names)
+        if snapshots is None:
+            snapshots = snapshot_builds.do("+".join(names), lambda: self.__build_many(names, build))
+        return snapshots
+
+    def __get_many(self, names: Sequence[str]) -> Optional[Dict[str, Snapshot]]:
+        snapshots = {}
+        for name in names:
+            snapshots[name] = self.get(name)
+            metrics.count_snapshot_lookup(name, "snapshot", hit=snapshots[name] is not None)
+        return None if None in snapshots.values() else snapshots
+
+    def __build_many(self, names: Sequence[str], build: Callable[[], Dict[str, Dict[str, Any]]]) -> Dict[str, Snapshot]:
+        snapshots = {name: self.get(name) for name in names}
+        if None not in snapshots.values():
+            return snapshots
+        data = build()
+        return {name: self.save(name, data[name]) for name in names}
+
+    async def aget_or_build_many(
+            self, names: Sequence[str], build: Callable[[], Awaitable[Dict[str, Dict[str, Any]]]]) -> Dict[str, Snapshot]:
+        """
+        Asynchronous version of `get_or_build_many`, for the ASGI views.
+        """
+        snapshots = {}
+        for name in names:
+            snapshots[name] = await self.aget(name)
+            metrics.count_snapshot_lookup(name, "snapshot", hit=snapshots[name] is not None)
+        if None in snapshots.values():
+            snapshots = await snapshot_builds.ado("+".join(names), lambda: self.__abuild_many(names, build))
+        return snapshots
+
+    async def __abuild_many(
+            self, names: Sequence[str], build: Callable[[], Awaitable[Dict[str, Dict[str, Any]]]]) -> Dict[str, Snapshot]:
+        snapshots = {name: await self.aget(name) for name in names}
+        if None not in snapshots.values():
+            return snapshots
+        data = await build()
+        return await sync_to_async(lambda: {name: self.save(name, data[name]) for name in names})()
+
+    def refresh(
+            self, service: Optional[BerriesService] = None, sync: bool = True, attributes: bool = False
+    ) -> Dict[str, Snapshot]:
+        """
+        Rebuilds every snapshot. The berries are retrieved once, and every snapshot is built from 
+        that same `BerryTable`: the statistics, charts and visualization snapshots from a single run 
+        of the berries pipeline.
+
+        The chart images are only rendered when the server draws the charts (BERRIES_CHARTS_RENDERING 
+        is "server"). Otherwise, the visualization snapshot is dropped instead, and only rebuilt if a 
+        page with the images is requested.
+
+        When the service has a berry catalog, it's synced with the PokeAPI first (see 
+        `BerriesService.sync_catalog`), so the snapshots pick up the berries added or changed upstream.
+
+        If the sync or the pipeline fails (e.g. while the PokeAPI is down), the exception is raised 
+        and the previous snapshots are kept.
+
+        The statistics of every berry attribute and of the other resources are only rebuilt if they 
+        were requested before (their snapshot exists), so refreshing never loads NumPy or crawls a 
+        resource nobody asked for. A resource that fails to be crawled is logged, and its previous 
+        snapshot is kept.
+
+        Args:
+            service (BerriesService, optional): The service the berries are read from. Defaults to
+            the one configured in the settings.
+            sync (bool, optional): Flag to sync the berry catalog first. Defaults to True.
+            attributes (bool, optional): Flag to build the attributes snapshot even if it doesn't 
+            exist yet. Defaults to False.
+
+        Returns:
+            Dict[str, Snapshot]: The new "statistics", "charts" and "records" snapshots, the 
+            "visualization" one if the chart images were rendered, and the rebuilt "attributes" and 
+            resource ones.
+        """
+        service = service if service is not None else BerriesService.from_settings()
+        if sync and service.has_catalog:
+            service.sync_catalog()
+        images = settings.BERRIES_CHARTS_RENDERING == SERVER_CHARTS
+        berries = service.get_berry_table()
+        visualization_data = service.get_data_for_visualization(encoded=False, images=images, berries=berries)
+        records_data = {"berries": berries}
+        snapshots = {
+            name: self.save(name, data) for name, data in split_visualization_data(visualization_data).items()
+        }
+        snapshots[RECORDS_SNAPSHOT] = self.save(RECORDS_SNAPSHOT, records_data)
+        if images:
+            snapshots[VISUALIZATION_SNAPSHOT] = self.save(VISUALIZATION_SNAPSHOT, visualization_data)
+        else:
+            self.delete(VISUALIZATION_SNAPSHOT)
+        if attributes or self.__exists(ATTRIBUTES_SNAPSHOT):
+            snapshots[ATTRIBUTES_SNAPSHOT] = self.save(
+                ATTRIBUTES_SNAPSHOT, service.get_attribute_statistics(berries=berries))
+        for resource in RESOURCES:
+            name = get_resource_snapshot(resource)
+            if not self.__exists(name):
+                continue
+            try:
+                snapshots[name] = self.save(name, service.get_resource_statistics(resource))
+            except Exception:
+                logger.exception("Could not refresh the %s statistics, the previous ones will be served.", resource)
+        return snapshots
+
+
+class SnapshotRefresher(threading.Thread):
+    """
+    Background thread that rebuilds the snapshots every `interval` seconds, before they get old.
+
+    When several workers run a refresher, a lock in the shared cache makes only one of them
+    refresh per interval. Failures are logged and the previous snapshots keep being served.
+    """
+    lock_key = "berries:snapshot:refresh-lock"
+    # The lock is released this many seconds before the interval ends, so the refresher that
+    # wakes up next (in any worker) isn't locked out by timing jitter.
+    lock_skew = 5
+
+    def __init__(self, interval: float, store: Optional[SnapshotStore] = None, lock_cache: Optional[BaseCache] = None):
+        super().__init__(name="berries-snapshot-refresher", daemon=True)
+        self.interval = interval
+        self.__store = store if store is not None else SnapshotStore()
+        self.__lock_cache = lock_cache if lock_cache is not None else cache
+        self.__stopped = threading.Event()
+
+    def refresh(self) -> bool:
+        if not self.__lock_cache.add(self.lock_key, True, timeout=max(1, int(self.interval - self.lock_skew))):
+            return False
+        try:
+            self.__store.refresh()
+            return True
+        except Exception:
+            logger.exception("Could not refresh the berries snapshots, the previous ones will be served.")
+            return False
+
+    def run(self):
+        while not self.__stopped.wait(self.interval):
+            self.refresh()
+
+    def stop(self):
+        self.__stopped.set()
+
+
+_refresher: Optional[SnapshotRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def ensure_refresher_started() -> Optional[SnapshotRefresher]:
+    """
+    Starts the background refresher of this process, once, if `BERRIES_REFRESH_INTERVAL` is set.
+    """
+    global _refresher
+    if _refresher is None and settings.BERRIES_REFRESH_INTERVAL > 0:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = SnapshotRefresher(settings.BERRIES_REFRESH_INTERVAL)
+                _refresher.start()
+    return _refresher
+
+
+_bundle: Optional[SnapshotBundle] = None
+_bundle_loaded = False
+_bundle_lock = threading.Lock()
+
+
+def get_bundle() -> Optional[SnapshotBundle]:
+    """
+    Returns the bundle of snapshots at `BERRIES_BUNDLE_PATH`, memory-mapped once per process, or
+    None if there is none. A bundle of another snapshots layout is ignored.
+    """
+    global _bundle, _bundle_loaded
+    if not _bundle_loaded:
+        with _bundle_lock:
+            if not _bundle_loaded:
+                _bundle, _bundle_loaded = _load_bundle(settings.BERRIES_BUNDLE_PATH), True
+    return _bundle
+
+
+def _load_bundle(path: str) -> Optional[SnapshotBundle]:
+    if not path:
+        return None
+    try:
+        bundle = SnapshotBundle(path)
+    except (OSError, ValueError):
+        logger.warning("Could not load the berries bundle at %s, the snapshots will be built.", path, exc_info=True)
+        return None
+    if bundle.snapshot_version != SNAPSHOT_VERSION:
+        logger.warning(
+            "The berries bundle at %s holds snapshots of version %s instead of %s, it's ignored.",
+            path, bundle.snapshot_version, SNAPSHOT_VERSION)
+        bundle.close()
+        return None
+    return bundle
+
+
+def seed_from_bundle() -> List[str]:
+    """
+    Seeds the shared cache with the bundle at `BERRIES_BUNDLE_PATH`, if there is one (see
+    `SnapshotStore.seed`). Called once by the WSGI and ASGI entry points when a worker starts.
+    """
+    bundle = get_bundle()
+    if bundle is None:
+        return []
+    seeded = SnapshotStore().seed(bundle)
+    if seeded:
+        logger.info("Seeded the %s snapshots from the berries bundle at %s.", ", ".join(seeded), bundle.path)
+    return seeded
+
+
+@receiver(setting_changed)
+def reset_bundle(setting: str, **kwargs):
+    global _bundle, _bundle_loaded
+    if setting == "BERRIES_BUNDLE_PATH":
+        with _bundle_lock:
+            if _bundle is not None:
+                _bundle.close()
+            _bundle, _bundle_loaded = None, False
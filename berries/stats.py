@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional, Tuple
+from statistics import StatisticsError
+from fractions import Fraction
+
+# Numeric attributes of the berries detail payload.
+NUMERIC_FIELDS = ("growth_time", "max_harvest", "natural_gift_power", "size", "smoothness", "soil_dryness")
+
+
+class StreamingStatistics:
+    """
+    Single-pass accumulator of small non-negative integer values, such as the berries growth times.
+
+    Values are fed one at a time with `add` and kept as a histogram (value -> frequency, in the
+    order each value was first seen) plus running integer sums, so memory only grows with the
+    number of distinct values. Every statistic is computed exactly, giving the same results as the
+    `statistics` module functions over the full list of values.
+    """
+
+    def __init__(self):
+        self.__frequencies: Dict[int, int] = {}
+        self.__count = 0
+        self.__sum = 0
+        self.__sum_of_squares = 0
+        self.__min: Optional[int] = None
+        self.__max: Optional[int] = None
+
+    def add(self, value: int):
+        self.__frequencies[value] = self.__frequencies.get(value, 0) + 1
+        self.__count += 1
+        self.__sum += value
+        self.__sum_of_squares += value * value
+        self.__min = value if self.__min is None else min(self.__min, value)
+        self.__max = value if self.__max is None else max(self.__max, value)
+
+    def __check_not_empty(self):
+        if not self.__count:
+            raise StatisticsError("no values were added")
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def frequencies(self) -> Dict[int, int]:
+        """
+        Frequency of each value, in the order the values were first added (like `collections.Counter`).
+        """
+        return dict(self.__frequencies)
+
+    def min(self) -> int:
+        self.__check_not_empty()
+        return self.__min
+
+    def max(self) -> int:
+        self.__check_not_empty()
+        return self.__max
+
+    def mean(self) -> float:
+        self.__check_not_empty()
+        return self.__sum / self.__count
+
+    def variance(self) -> float:
+        """
+        Sample variance, computed exactly from the integer sums. It's 0.0 when there is only one value.
+        """
+        self.__check_not_empty()
+        if self.__count == 1:
+            return 0.0
+        squared_deviations = Fraction(self.__count * self.__sum_of_squares - self.__sum * self.__sum, self.__count)
+        return float(squared_deviations / (self.__count - 1))
+
+    def __value_at(self, index: int) -> int:
+        seen = 0
+        for value in sorted(self.__frequencies):
+            seen += self.__frequencies[value]
+            if seen > index:
+                return value
+
+    def median(self) -> float:
+        self.__check_not_empty()
+        middle = self.__count // 2
+        if self.__count % 2:
+            return self.__value_at(middle)
+        return (self.__value_at(middle - 1) + self.__value_at(middle)) / 2
+
+    def mode(self) -> int:
+        """
+        Most frequent value. On ties, the one that was added first wins, like `statistics.mode`.
+        """
+        self.__check_not_empty()
+        return max(self.__frequencies, key=self.__frequencies.get)
+
+    def values(self) -> List[int]:
+        """
+        Expands the histogram back into the sorted list of every added value.
+        """
+        return [value for value in sorted(self.__frequencies) for _ in range(self.__frequencies[value])]
+
+    def histogram(self, bins: int) -> Tuple[List[float], List[int]]:
+        """
+        Splits the values into `bins` bins of equal width between the minimum and the maximum, like
+        `numpy.histogram` (and so matplotlib's `Axes.hist`) does: every bin is half-open except the
+        last one, which also holds the maximum. When every value is the same, the bins span from
+        half a unit below it to half a unit above it.
+
+        Returns:
+            Tuple[List[float], List[int]]: The `bins + 1` edges of the bins, and the number of values in each bin.
+        """
+        self.__check_not_empty()
+        if bins < 1:
+            raise ValueError("bins must be a positive integer")
+        first, last = float(self.__min), float(self.__max)
+        if first == last:
+            first, last = first - 0.5, last + 0.5
+        step = (last - first) / bins
+        edges = [index * step + first for index in range(bins)] + [last]
+        norm = bins / (last - first)
+        counts = [0] * bins
+        for value, frequency in self.__frequencies.items():
+            index = min(int((value - first) * norm), bins - 1)
+            # The division may round a value next to an edge into the neighbouring bin.
+            if value < edges[index]:
+                index -= 1
+            elif index != bins - 1 and value >= edges[index + 1]:
+                index += 1
+            counts[index] += frequency
+        return edges, counts
@@ -1,29 +1,298 @@
 from berries.service import BerriesService
+from berries.snapshots import (
+    SnapshotStore, Snapshot, SnapshotVersion, STATISTICS_SNAPSHOT, VISUALIZATION_SNAPSHOT, ATTRIBUTES_SNAPSHOT, RECORDS_SNAPSHOT,
+    CHARTS_SNAPSHOT, CLIENT_CHARTS_SNAPSHOTS, SERVER_CHARTS, CHARTS_RENDERINGS, get_resource_snapshot,
+    split_visualization_data, ensure_refresher_started)
+from berries.resources import RESOURCES
+from berries.stats import NUMERIC_FIELDS
+from berries.index import BerryIndex, parse_query
+from berries.encoding import json_response, encode_response
+from berries import metrics
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.cache import cache_page
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag, http_date
 from django.shortcuts import render
+from django.urls import reverse
 from django.http.request import HttpRequest
 from django.http import JsonResponse, HttpResponse
-from typing import Union
+from typing import Union, Dict, Any, Callable, List, Optional, Tuple, Sequence
+import threading
 
+STATISTICS_ERROR = 'There was an error processing the berry statistics.'
+VISUALIZATION_ERROR = 'There was an error generating the visualization for the berries data.'
+BERRIES_ERROR = 'There was an error retrieving the berries.'
+CHARTS_ERROR = 'There was an error processing the berry charts data.'
+RESOURCE_STATISTICS_ERROR = 'There was an error processing the resource statistics.'
+METRICS_DISABLED_ERROR = 'The metrics are disabled. Set BERRIES_METRICS_ENABLED to enable them.'
+
+_berry_index: Optional[Tuple[str, BerryIndex]] = None
+_berry_index_lock = threading.Lock()
+
+
+def get_snapshot(name: str, build: Callable[[], Dict[str, Any]]) -> Snapshot:
+    ensure_refresher_started()
+    return SnapshotStore().get_or_build(name, build)
+
+def get_snapshots(names: Sequence[str], build: Callable[[], Dict[str, Dict[str, Any]]]) -> Dict[str, Snapshot]:
+    ensure_refresher_started()
+    return SnapshotStore().get_or_build_many(names, build)
+
+def get_snapshot_version(name: str) -> Optional[SnapshotVersion]:
+    ensure_refresher_started()
+    return SnapshotStore().get_version(name)
+
+def add_snapshot_headers(response: HttpResponse, snapshot: Union[Snapshot, SnapshotVersion]) -> HttpResponse:
+    response["Age"] = str(snapshot.age)
+    response["X-Data-Generated-At"] = snapshot.generated_at.isoformat()
+    return response
+
+def add_version_headers(response: HttpResponse, version: SnapshotVersion) -> HttpResponse:
+    """
+    Adds the validators of a snapshot (`ETag` and `Last-Modified`) to a response with its whole data.
+    Clients must revalidate it before reusing it, which costs them a 304 while the data is the same.
+    """
+    response["ETag"] = version.etag
+    response["Last-Modified"] = http_date(version.modified_at.timestamp())
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return add_snapshot_headers(response, version)
+
+def get_not_modified_response(request: HttpRequest, version: Optional[SnapshotVersion]) -> Optional[HttpResponse]:
+    """
+    Returns a 304 response if the `If-None-Match` or `If-Modified-Since` header of `request` matches
+    the `version` of a snapshot, or None if the snapshot has to be sent.
+    """
+    if version is None:
+        return None
+    response = get_conditional_response(
+        request, etag=version.etag, last_modified=int(version.modified_at.timestamp()))
+    return add_version_headers(response, version) if response is not None else None
+
+def get_requested_fields(request: HttpRequest, valid_fields: Sequence[str] = NUMERIC_FIELDS) -> List[str]:
+    """
+    Returns the fields of the `fields` query parameter, or all the `valid_fields` (by default, the
+    numeric berry fields) if it's missing.
+
+    Raises:
+        ValueError: If any of the fields isn't one of `valid_fields`.
+    """
+    fields = [field for field in request.GET.get("fields", "").split(",") if field] or list(valid_fields)
+    unknown_fields = [field for field in fields if field not in valid_fields]
+    if unknown_fields:
+        raise ValueError(f'Unknown fields: {", ".join(unknown_fields)}. Valid fields are: {", ".join(valid_fields)}.')
+    return fields
+
+def get_fields_statistics(snapshot: Snapshot, fields: List[str]) -> Dict[str, Any]:
+    return dict(snapshot.data, fields={field: snapshot.data["fields"][field] for field in fields})
+
+def get_fields_response(
+        request: HttpRequest, snapshot: Snapshot, fields: List[str], all_fields: Sequence[str] = NUMERIC_FIELDS
+) -> JsonResponse:
+    # All the fields are the whole snapshot, which is sent as it was encoded when it was saved.
+    if tuple(fields) == tuple(all_fields):
+        return json_response(request, snapshot.data, bodies=snapshot.bodies)
+    return json_response(request, get_fields_statistics(snapshot, fields))
+
+def get_unknown_resource_error(resource: str) -> str:
+    if resource == "berry":
+        return f'The statistics of the berries are served by {reverse("berry_stats")}.'
+    return f'There is no resource named {resource}. Valid resources are: {", ".join(RESOURCES)}.'
+
+def get_charts_rendering(request: HttpRequest) -> str:
+    """
+    Returns where the charts of the visualization page are drawn: as asked by the `charts` query
+    parameter, or else as set by BERRIES_CHARTS_RENDERING.
+
+    Raises:
+        ValueError: If the rendering isn't "client" or "server".
+    """
+    rendering = request.GET.get("charts", settings.BERRIES_CHARTS_RENDERING)
+    if rendering not in CHARTS_RENDERINGS:
+        raise ValueError(f'Unknown charts rendering: {rendering}. Valid ones are: {", ".join(CHARTS_RENDERINGS)}.')
+    return rendering
+
+def get_client_charts_data(service: BerriesService) -> Dict[str, Dict[str, Any]]:
+    # One run of the berries pipeline, without the images, builds both snapshots of the page.
+    return split_visualization_data(service.get_data_for_visualization(encoded=False, images=False))
+
+def get_client_charts_context(statistics: Snapshot, charts: Snapshot) -> Dict[str, Any]:
+    # The page is rendered without images: the browser draws the charts from their data.
+    return dict(statistics.data, charts=charts.data, client_charts=True)
+
+def get_records_data() -> Dict[str, Any]:
+    return {"berries": BerriesService.from_settings().get_berry_table()}
+
+def get_berry_index(snapshot: Snapshot) -> BerryIndex:
+    """
+    Returns the index of the berries in the records `snapshot`, built once per snapshot data in this process.
+    """
+    global _berry_index
+    with _berry_index_lock:
+        if _berry_index is None or _berry_index[0] != snapshot.digest:
+            _berry_index = (snapshot.digest, BerryIndex(snapshot.data["berries"]))
+        return _berry_index[1]
+
+def get_cached_berry_index(version: Optional[SnapshotVersion]) -> Optional[BerryIndex]:
+    """
+    Returns the index already built for the records snapshot of `version`, or None if the snapshot
+    has to be loaded to build it. Only the version is read from the cache, not the snapshot.
+    """
+    with _berry_index_lock:
+        if version is not None and _berry_index is not None and _berry_index[0] == version.digest:
+            return _berry_index[1]
+        return None
+
+def get_records_index() -> Tuple[BerryIndex, Union[Snapshot, SnapshotVersion]]:
+    """
+    Returns the index of the berries and the records snapshot (or its version) it was built from.
+    """
+    version = get_snapshot_version(RECORDS_SNAPSHOT)
+    index = get_cached_berry_index(version)
+    if index is not None:
+        return index, version
+    snapshot = get_snapshot(RECORDS_SNAPSHOT, get_records_data)
+    return get_berry_index(snapshot), snapshot
+
+def get_page_url(request: HttpRequest, offset: int, limit: int) -> str:
+    params = request.GET.copy()
+    params["offset"], params["limit"] = str(offset), str(limit)
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+def get_berries_page(request: HttpRequest, index: BerryIndex, query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the page of berries matching `query`, shaped like the PokeAPI lists: the "count" of
+    matching berries, the URLs of the "next" and "previous" pages, and the "results".
+    """
+    count, berries = index.search(**query)
+    offset, limit = query["offset"], query["limit"]
+    return {
+        "count": count,
+        "next": get_page_url(request, offset + limit, limit) if offset + limit < count else None,
+        "previous": get_page_url(request, max(0, offset - limit), limit) if offset > 0 else None,
+        "results": berries
+    }
 
-@cache_page(60*60)
 @csrf_exempt
 @require_http_methods(["GET"])
 def all_berry_stats(request: HttpRequest) -> JsonResponse:
     try:
-        berry_stats = BerriesService().get_statistics()
-        return JsonResponse(berry_stats, status=200)
+        not_modified = get_not_modified_response(request, get_snapshot_version(STATISTICS_SNAPSHOT))
+        if not_modified is not None:
+            return not_modified
+        snapshot = get_snapshot(STATISTICS_SNAPSHOT, lambda: BerriesService.from_settings().get_statistics())
+    except Exception:
+        return JsonResponse({'error': STATISTICS_ERROR}, status=500)
+    return add_version_headers(json_response(request, snapshot.data, bodies=snapshot.bodies), snapshot.version)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def berry_stats(request: HttpRequest) -> JsonResponse:
+    try:
+        fields = get_requested_fields(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        snapshot = get_snapshot(ATTRIBUTES_SNAPSHOT, lambda: BerriesService.from_settings().get_attribute_statistics())
+    except Exception:
+        return JsonResponse({'error': STATISTICS_ERROR}, status=500)
+    return add_snapshot_headers(get_fields_response(request, snapshot, fields), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def resource_stats(request: HttpRequest, resource: str) -> JsonResponse:
+    if resource not in RESOURCES:
+        return JsonResponse({'error': get_unknown_resource_error(resource)}, status=404)
+    all_fields = tuple(RESOURCES[resource].fields)
+    try:
+        fields = get_requested_fields(request, all_fields)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        snapshot = get_snapshot(
+            get_resource_snapshot(resource), lambda: BerriesService.from_settings().get_resource_statistics(resource))
     except Exception:
-        return JsonResponse({'error': 'There was an error processing the berry statistics.'}, status=500)
+        return JsonResponse({'error': RESOURCE_STATISTICS_ERROR}, status=500)
+    return add_snapshot_headers(get_fields_response(request, snapshot, fields, all_fields), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def berry_stats_charts(request: HttpRequest) -> JsonResponse:
+    try:
+        not_modified = get_not_modified_response(request, get_snapshot_version(CHARTS_SNAPSHOT))
+        if not_modified is not None:
+            return not_modified
+        snapshot = get_snapshot(CHARTS_SNAPSHOT, lambda: BerriesService.from_settings().get_chart_data())
+    except Exception:
+        return JsonResponse({'error': CHARTS_ERROR}, status=500)
+    return add_version_headers(json_response(request, snapshot.data, bodies=snapshot.bodies), snapshot.version)
 
-@cache_page(60*60)
 @csrf_exempt
 @require_http_methods(["GET"])
 def berries_stats_visualization(request: HttpRequest) -> Union[HttpResponse, JsonResponse]:
     try:
-        berries_data = BerriesService().get_data_for_visualization()
-        return render(request, template_name='berries_stats_visualization.html', context=berries_data)
+        rendering = get_charts_rendering(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        if rendering == SERVER_CHARTS:
+            snapshot = get_snapshot(
+                VISUALIZATION_SNAPSHOT, lambda: BerriesService.from_settings().get_data_for_visualization(encoded=False))
+            context = snapshot.data
+        else:
+            snapshots = get_snapshots(
+                CLIENT_CHARTS_SNAPSHOTS, lambda: get_client_charts_data(BerriesService.from_settings()))
+            statistics, snapshot = snapshots[STATISTICS_SNAPSHOT], snapshots[CHARTS_SNAPSHOT]
+            context = get_client_charts_context(statistics, snapshot)
+        response = render(request, template_name='berries_stats_visualization.html', context=context)
+    except Exception:
+        return JsonResponse({'error': VISUALIZATION_ERROR}, status=500)
+    return add_snapshot_headers(encode_response(request, response), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def berries_list(request: HttpRequest) -> JsonResponse:
+    try:
+        query = parse_query(request.GET)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    try:
+        index, snapshot = get_records_index()
+    except Exception:
+        return JsonResponse({'error': BERRIES_ERROR}, status=500)
+    return add_snapshot_headers(json_response(request, get_berries_page(request, index, query)), snapshot)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def berry_detail(request: HttpRequest, name: str) -> JsonResponse:
+    try:
+        index, snapshot = get_records_index()
     except Exception:
-        return JsonResponse({'error': 'There was an error generating the visualization for the berries data.'}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': BERRIES_ERROR}, status=500)
+    berry = index.get(name.lower())
+    if berry is None:
+        return JsonResponse({'error': f'There is no berry named {name}.'}, status=404)
+    return add_snapshot_headers(json_response(request, berry), snapshot)
+
+@require_http_methods(["GET"])
+def chart_asset(request: HttpRequest, digest: str) -> HttpResponse:
+    # Chart assets are content-addressed: an asset never changes, so it can be cached forever
+    # and a matching If-None-Match is answered without looking it up.
+    etag = quote_etag(digest)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        snapshot = SnapshotStore().get(VISUALIZATION_SNAPSHOT)
+        image = snapshot.assets.get(digest) if snapshot is not None else None
+        if image is None:
+            return JsonResponse({'error': 'The requested chart does not exist.'}, status=404)
+        response = HttpResponse(image, content_type="image/png")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=365*24*60*60, immutable=True)
+    return response
+
+@require_http_methods(["GET"])
+def prometheus_metrics(request: HttpRequest) -> HttpResponse:
+    if not metrics.is_enabled():
+        return JsonResponse({'error': METRICS_DISABLED_ERROR}, status=404)
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
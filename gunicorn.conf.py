@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration used by the Docker image, serving the ASGI application with Uvicorn workers:
+    gunicorn pokeberries_api_project.asgi:application -c gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+# A cold request may wait on a full crawl of the PokeAPI, with its retries.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 10000
+max_requests_jitter = 1000
+accesslog = "-"
@@ -0,0 +1,23 @@
+"""
+ASGI config for pokeberries_api project.
+
+It exposes the ASGI callable as a module-level variable named ``application``, serving the
+asynchronous versions of the berries views.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokeberries_api_project.settings")
+os.environ.setdefault("BERRIES_ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
+
+# Seeds the shared cache with the bundle of precomputed snapshots (BERRIES_BUNDLE_PATH), if there is
+# one, before the first request, which is then served without calling the PokeAPI.
+from berries.snapshots import seed_from_bundle  # noqa: E402
+seed_from_bundle()
@@ -77,12 +77,17 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "pokeberries_api_project.wsgi.application"
+ASGI_APPLICATION = "pokeberries_api_project.asgi.application"
 
-# Simple cache setup
+# Whether to serve the asynchronous versions of the views. The ASGI entry point turns it on.
+BERRIES_ASYNC_VIEWS = env.bool('BERRIES_ASYNC_VIEWS', default=False)
+
+# Cache shared by all the worker processes, where the snapshots served by the views are kept.
+# Its `add` is atomic across processes, so it also holds the locks shared by the workers.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': env('CACHE_BACKEND', default='berries.cache.SingleFlightFileBasedCache'),
+        'LOCATION': env('CACHE_LOCATION', default=os.path.join(BASE_DIR, '.cache')),
         'TIMEOUT': 300,
         'OPTIONS': {
             'MAX_ENTRIES': 150
@@ -90,6 +95,44 @@ CACHES = {
     }
 }
 
+# PokeAPI settings
+POKEAPI_BASE_URL = env('POKEAPI_BASE_URL', default="https://pokeapi.co/api/v2/berry")
+# Maximum number of berry detail requests in flight at the same time.
+POKEAPI_MAX_WORKERS = env.int('POKEAPI_MAX_WORKERS', default=10)
+# Maximum number of connections to the PokeAPI kept by each process, shared by all its requests.
+POKEAPI_MAX_CONNECTIONS = env.int('POKEAPI_MAX_CONNECTIONS', default=100)
+# Timeouts, in seconds, to connect to the PokeAPI and to read each response.
+POKEAPI_CONNECT_TIMEOUT = env.float('POKEAPI_CONNECT_TIMEOUT', default=3.05)
+POKEAPI_TIMEOUT = env.float('POKEAPI_TIMEOUT', default=10.0)
+# Retries of requests that fail to connect or get a 429/5xx, with exponential backoff
+# (backoff_factor * 2 ** retry seconds, or the Retry-After header when there is one).
+POKEAPI_RETRIES = env.int('POKEAPI_RETRIES', default=3)
+POKEAPI_BACKOFF_FACTOR = env.float('POKEAPI_BACKOFF_FACTOR', default=0.5)
+# Consecutive failures that open the circuit breaker, and seconds it stays open before trying again.
+POKEAPI_CIRCUIT_FAILURE_THRESHOLD = env.int('POKEAPI_CIRCUIT_FAILURE_THRESHOLD', default=5)
+POKEAPI_CIRCUIT_RESET_TIMEOUT = env.float('POKEAPI_CIRCUIT_RESET_TIMEOUT', default=30.0)
+# SQLite file holding the berries catalog. Set it empty to always fetch the berries from the PokeAPI.
+BERRIES_CATALOG_PATH = env('BERRIES_CATALOG_PATH', default=os.path.join(BASE_DIR, 'berries_catalog.sqlite3'))
+
+# Seconds between background refreshes of the berries snapshots served by the views. Set it to 0
+# to disable the background refresher (e.g. when running `manage.py refresh_berry_stats` with cron).
+BERRIES_REFRESH_INTERVAL = env.int('BERRIES_REFRESH_INTERVAL', default=30*60)
+# Number of processes the charts are rendered in. Set it to 0 to render them in the worker itself.
+BERRIES_CHART_PROCESSES = env.int('BERRIES_CHART_PROCESSES', default=0)
+# Where the charts of the visualization page are drawn: "client" sends the chart data (also served
+# on /berryStats/charts/) for the browsers to draw, so no image is rendered; "server" renders PNG
+# images with matplotlib. Pages requested with ?charts=server always get the images.
+BERRIES_CHARTS_RENDERING = env('BERRIES_CHARTS_RENDERING', default='client')
+# Dotted path of the function that serializes the JSON responses to bytes: orjson when it's
+# installed, or the standard library with 'berries.encoding.stdlib_dumps'.
+BERRIES_JSON_SERIALIZER = env('BERRIES_JSON_SERIALIZER', default='berries.encoding.fast_dumps')
+# Record the timings of the stages, the PokeAPI requests and the snapshot lookups, and serve them
+# on /metrics in the Prometheus format. When disabled, the instrumentation is a few no-op calls.
+BERRIES_METRICS_ENABLED = env.bool('BERRIES_METRICS_ENABLED', default=False)
+# Bundle of precomputed snapshots written by `manage.py export_berry_bundle`, loaded by the workers
+# at startup so their first requests are served without calling the PokeAPI. Empty for none.
+BERRIES_BUNDLE_PATH = env('BERRIES_BUNDLE_PATH', default='')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -14,11 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.urls import path
 
-from berries import views
+# The ASGI entry point serves the asynchronous versions of the views.
+if settings.BERRIES_ASYNC_VIEWS:
+    from berries import async_views as views
+else:
+    from berries import views
 
 urlpatterns = [
     path("allBerryStats/", views.all_berry_stats, name="all_berry_stats"),
+    path("berryStats/", views.berry_stats, name="berry_stats"),
+    path("berryStats/charts/", views.berry_stats_charts, name="berry_stats_charts"),
+    path("resourceStats/<str:resource>/", views.resource_stats, name="resource_stats"),
+    path("berries/", views.berries_list, name="berries_list"),
+    path("berries/<str:name>/", views.berry_detail, name="berry_detail"),
+    path("charts/<str:digest>.png", views.chart_asset, name="chart_asset"),
+    path("metrics", views.prometheus_metrics, name="metrics"),
     path("", views.berries_stats_visualization, name="berries_stats_visualization"),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokeberries_api_project.settings")
 
 application = get_wsgi_application()
+
+# Seeds the shared cache with the bundle of precomputed snapshots (BERRIES_BUNDLE_PATH), if there is
+# one, before the first request, which is then served without calling the PokeAPI.
+from berries.snapshots import seed_from_bundle  # noqa: E402
+seed_from_bundle()
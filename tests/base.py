@@ -0,0 +1,17 @@
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BERRIES_CATALOG_PATH="", BERRIES_REFRESH_INTERVAL=0)
+class SnapshotTestCase(SimpleTestCase):
+    """
+    Base of the tests of the snapshots and the views serving them. The views serve the last good
+    snapshot, so every test starts with an empty local memory cache, and runs without a berry
+    catalog (which would be written in the project folder) or a background refresher.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
@@ -0,0 +1,229 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+import threading
+import random
+import json
+import time
+
+GROWTH_TIMES = [3, 4, 5, 6, 8, 12, 15, 18, 24, 2]
+FIRMNESSES = ["very-soft", "soft", "hard", "very-hard", "super-hard"]
+
+
+def make_berries(count: int = 64) -> List[Dict[str, Any]]:
+    """
+    Builds a deterministic list of berry detail payloads shaped like the PokeAPI /berry/<id>/ responses.
+    """
+    berries = []
+    for berry_id in range(1, count + 1):
+        firmness = FIRMNESSES[berry_id % len(FIRMNESSES)]
+        berries.append({
+            "id": berry_id,
+            "name": f"berry-{berry_id}",
+            "growth_time": GROWTH_TIMES[berry_id % len(GROWTH_TIMES)],
+            "max_harvest": 5 + berry_id % 11,
+            "natural_gift_power": 60 + 10 * (berry_id % 3),
+            "size": 20 + (berry_id * 37) % 280,
+            "smoothness": 20 + 5 * (berry_id % 7),
+            "soil_dryness": 4 + 3 * (berry_id % 11),
+            "firmness": {"name": firmness, "url": f"https://pokeapi.co/api/v2/berry-firmness/{FIRMNESSES.index(firmness) + 1}/"},
+            "flavors": [
+                {"potency": 10 * (berry_id % 4), "flavor": {"name": "spicy", "url": "https://pokeapi.co/api/v2/berry-flavor/1/"}},
+            ],
+            "item": {"name": f"berry-{berry_id}-item", "url": f"https://pokeapi.co/api/v2/item/{125 + berry_id}/"},
+            "natural_gift_type": {"name": "fire", "url": "https://pokeapi.co/api/v2/type/10/"},
+        })
+    return berries
+
+
+def make_items(count: int = 30) -> List[Dict[str, Any]]:
+    """
+    Builds a deterministic list of item detail payloads shaped like the PokeAPI /item/<id>/ responses.
+    Every third item has no fling power (null), like the PokeAPI key items.
+    """
+    return [{
+        "id": item_id,
+        "name": f"item-{item_id}",
+        "cost": 100 * (item_id % 7),
+        "fling_power": None if item_id % 3 == 0 else 10 * (item_id % 5),
+        "attributes": [{"name": "holdable", "url": "https://pokeapi.co/api/v2/item-attribute/5/"}] * (item_id % 3),
+    } for item_id in range(1, count + 1)]
+
+
+def save_fixture(path: str, berries: List[Dict[str, Any]], source: str):
+    """
+    Saves berry detail payloads (e.g. recorded from the PokeAPI) as a fixture for `FakePokeAPI`.
+    """
+    fixture = {"source": source, "recorded_at": datetime.now(timezone.utc).isoformat(), "berries": berries}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(fixture, file, indent=1)
+
+
+def load_fixture(path: str) -> Dict[str, Any]:
+    """
+    Loads a fixture saved with `save_fixture`: its "source", "recorded_at" and "berries".
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+class _Server(ThreadingHTTPServer):
+    # A large backlog, so load tests opening many connections at once don't get refused.
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class FakePokeAPI:
+    """
+    Local stand-in for the PokeAPI berry endpoints, so tests and benchmarks can run offline.
+
+    Serves the paginated `/api/v2/berry/` list and the `/api/v2/berry/<id>/` details on a random
+    local port, and the same endpoints for the entries of any other resource given in `resources`
+    (e.g. {"item": [...]}), optionally sleeping `latency` seconds (plus up to `jitter` random seconds) before
+    answering each request. Failures can be injected with `fail_next`, or at random in a share
+    `error_rate` of the requests. The random choices come from `seed`, so runs are reproducible.
+    """
+
+    def __init__(
+            self, berries: Optional[List[Dict[str, Any]]] = None, page_size: int = 20, latency: float = 0.0,
+            jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, seed: int = 0,
+            resources: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.berries = berries if berries is not None else make_berries()
+        self.resources = dict(resources or {})
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.__random = random.Random(seed)
+        self.request_count = 0
+        self.max_in_flight = 0
+        self.__in_flight = 0
+        self.__failures: List[Tuple[int, Optional[str], Optional[bytes]]] = []
+        self.__lock = threading.Lock()
+        self.__server: Optional[_Server] = None
+        self.__thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_fixture(cls, path: str, **kwargs) -> "FakePokeAPI":
+        """
+        Returns a fake PokeAPI serving the berries of a fixture saved with `save_fixture`.
+        """
+        return cls(berries=load_fixture(path)["berries"], **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        return self.get_resource_url("berry")
+
+    def get_resource_url(self, resource: str) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/api/v2/{resource}"
+
+    def start(self) -> str:
+        self.__server = _Server(("127.0.0.1", 0), self.__build_handler())
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def __enter__(self) -> "FakePokeAPI":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, count: int, status: int = 503, retry_after: Optional[str] = None, body: Optional[bytes] = None):
+        """
+        Answers the next `count` requests with `status`, adding a Retry-After header if given. A `body`
+        is sent as an HTML page instead of the JSON error (e.g. the error page of a proxy).
+        """
+        with self.__lock:
+            self.__failures.extend([(status, retry_after, body)] * count)
+
+    def clear_failures(self):
+        with self.__lock:
+            self.__failures.clear()
+
+    def __list_page(self, resource: str, entries: List[Dict[str, Any]], offset: int, limit: int) -> Dict[str, Any]:
+        page = entries[offset:offset + limit]
+        next_offset = offset + limit
+        url = self.get_resource_url(resource)
+        return {
+            "count": len(entries),
+            "next": f"{url}/?offset={next_offset}&limit={limit}" if next_offset < len(entries) else None,
+            "previous": None,
+            "results": [{"name": entry["name"], "url": f"{url}/{entry['id']}/"} for entry in page],
+        }
+
+    def __route(self, path: str, query: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        parts = [part for part in path.split("/") if part]
+        if parts[:2] != ["api", "v2"] or len(parts) < 3:
+            return None
+        entries = self.berries if parts[2] == "berry" else self.resources.get(parts[2])
+        if entries is None:
+            return None
+        if len(parts) == 3:
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", [str(self.page_size)])[0])
+            return self.__list_page(parts[2], entries, offset, limit)
+        for entry in entries:
+            if str(entry["id"]) == parts[3] or entry["name"] == parts[3]:
+                return entry
+        return None
+
+    def __handle(self, handler: BaseHTTPRequestHandler):
+        with self.__lock:
+            self.request_count += 1
+            self.__in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.__in_flight)
+            failure = self.__failures.pop(0) if self.__failures else None
+            if failure is None and self.error_rate and self.__random.random() < self.error_rate:
+                failure = (self.error_status, None, None)
+            latency = self.latency + (self.__random.uniform(0, self.jitter) if self.jitter else 0.0)
+        try:
+            if latency:
+                time.sleep(latency)
+            retry_after, body = None, None
+            if failure is not None:
+                (status, retry_after, body), payload = failure, {"detail": "Injected failure."}
+            else:
+                url = urlparse(handler.path)
+                payload = self.__route(url.path, parse_qs(url.query))
+                status = 200 if payload is not None else 404
+            content_type = "application/json" if body is None else "text/html"
+            if body is None:
+                body = json.dumps(payload if payload is not None else {"detail": "Not found."}).encode("utf-8")
+            handler.send_response(status)
+            handler.send_header("Content-Type", content_type)
+            if retry_after is not None:
+                handler.send_header("Retry-After", retry_after)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (e.g. a timeout test).
+            pass
+        finally:
+            with self.__lock:
+                self.__in_flight -= 1
+
+    def __build_handler(self):
+        handle = self.__handle
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
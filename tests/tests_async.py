@@ -0,0 +1,152 @@
+from berries import async_views
+from berries.async_client import AsyncPokeAPIClient
+from berries.client import CircuitBreaker, CircuitOpenError
+from berries.records import BerryTable
+from berries.service import BerriesService
+from django.test import SimpleTestCase, AsyncRequestFactory
+from tests.fake_pokeapi import FakePokeAPI, make_berries
+from tests.base import SnapshotTestCase
+from unittest.mock import patch
+import asyncio
+import httpx
+import json
+import threading
+
+STATISTICS = {"berries_names": ["cheri"], "min_growth_time": 3}
+
+
+class TestsAsyncFetch(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_api = FakePokeAPI(latency=0.01)
+        cls.fake_api.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_api.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.fake_api.clear_failures()
+
+    async def test_async_statistics_match_sync_statistics(self):
+        service = BerriesService(base_url=self.fake_api.base_url, max_workers=4)
+        self.fake_api.max_in_flight = 0
+        async_data = await service.aget_statistics()
+        self.assertLessEqual(self.fake_api.max_in_flight, 4)
+        self.assertGreater(self.fake_api.max_in_flight, 1)
+        self.assertEqual(async_data, service.get_statistics())
+        self.assertEqual(async_data["berries_names"], [berry["name"] for berry in self.fake_api.berries])
+
+    async def test_async_client_retries_and_opens_circuit(self):
+        async with AsyncPokeAPIClient(retries=2, backoff_factor=0.01, circuit_breaker=CircuitBreaker(2, 60)) as client:
+            self.fake_api.fail_next(2, status=503, retry_after="0")
+            self.assertEqual((await client.get_json(f"{self.fake_api.base_url}/1/"))["id"], 1)
+            self.fake_api.fail_next(6, status=500)
+            for _ in range(2):
+                with self.assertRaises(httpx.HTTPStatusError):
+                    await client.get_json(f"{self.fake_api.base_url}/1/")
+            with self.assertRaises(CircuitOpenError):
+                await client.get_json(f"{self.fake_api.base_url}/1/")
+
+    async def test_async_client_releases_half_open_trial(self):
+        circuit_breaker = CircuitBreaker(1, 0.1)
+        async with AsyncPokeAPIClient(retries=0, circuit_breaker=circuit_breaker) as client:
+            url = f"{self.fake_api.base_url}/1/"
+            # A body that isn't JSON is a failure of the PokeAPI, which reopens the circuit.
+            self.fake_api.fail_next(1, status=200, body=b"<html>Bad gateway</html>")
+            with self.assertRaises(ValueError):
+                await client.get_json(url)
+            self.assertEqual(circuit_breaker.state, CircuitBreaker.OPEN)
+            await asyncio.sleep(0.15)
+            # A cancelled trial call lets the next one through.
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.get_json(url), timeout=0.001)
+            self.assertEqual(circuit_breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertEqual((await client.get_json(url))["id"], 1)
+            self.assertEqual(circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_async_visualization_renders_charts(self):
+        service = BerriesService(base_url=self.fake_api.base_url)
+        data = await service.aget_data_for_visualization(encoded=False)
+        self.assertTrue(data["bar_chart"].startswith(b"\x89PNG"))
+        self.assertTrue(data["bins_histogram"].startswith(b"\x89PNG"))
+
+
+class TestsAsyncViews(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+
+    async def test_all_berry_stats(self):
+        request = self.factory.get("/allBerryStats/")
+        with patch("berries.service.BerriesService.aget_statistics", side_effect=Exception()):
+            response = await async_views.all_berry_stats(request)
+            self.assertEqual(response.status_code, 500)
+        with patch("berries.service.BerriesService.aget_statistics", return_value=STATISTICS) as mock_aget_statistics:
+            response = await async_views.all_berry_stats(request)
+            await async_views.all_berry_stats(request)
+            self.assertEqual(mock_aget_statistics.await_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("X-Data-Generated-At", response)
+        not_modified = await async_views.all_berry_stats(
+            self.factory.get("/allBerryStats/", headers={"If-None-Match": response["ETag"]}))
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_unreadable_version_is_a_json_error(self):
+        with patch("berries.snapshots.SnapshotStore.aget_version", side_effect=OSError()):
+            response = await async_views.all_berry_stats(self.factory.get("/allBerryStats/"))
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("error", json.loads(response.content))
+
+    async def test_opens_the_catalog_off_the_event_loop(self):
+        opening_threads = []
+
+        def open_catalog(path):
+            opening_threads.append(threading.current_thread())
+            raise OSError()
+
+        with self.settings(BERRIES_CATALOG_PATH="catalog.sqlite3"), \
+                patch("berries.service.BerryCatalog", side_effect=open_catalog):
+            response = await async_views.all_berry_stats(self.factory.get("/allBerryStats/"))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(opening_threads), 1)
+        self.assertIsNot(opening_threads[0], threading.current_thread())
+
+    async def test_berry_stats_charts(self):
+        charts = {"berries_count": 1, "bar_chart": {"labels": [3], "values": [1]}}
+        with patch("berries.service.BerriesService.aget_chart_data", return_value=charts) as mock_aget_chart_data:
+            response = await async_views.berry_stats_charts(self.factory.get("/berryStats/charts/"))
+            mock_aget_chart_data.assert_awaited_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), charts)
+
+    async def test_cold_visualization_page_runs_the_pipeline_once(self):
+        visualization_data = dict(STATISTICS, charts={"berries_count": 1})
+        with patch("berries.service.BerriesService.aget_data_for_visualization", return_value=visualization_data) as mock_visualization, \
+                patch("berries.service.BerriesService.aget_statistics", side_effect=AssertionError), \
+                patch("berries.service.BerriesService.aget_chart_data", side_effect=AssertionError):
+            responses = await asyncio.gather(*(
+                async_views.berries_stats_visualization(self.factory.get("/")) for _ in range(3)))
+            mock_visualization.assert_awaited_once_with(encoded=False, images=False)
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+
+    async def test_berry_detail_reuses_the_index(self):
+        table = BerryTable(make_berries(3))
+        with patch("berries.service.BerriesService.aget_berry_table", return_value=table):
+            response = await async_views.berry_detail(self.factory.get("/berries/berry-1/"), "berry-1")
+        self.assertEqual(response.status_code, 200)
+        with patch("berries.snapshots.SnapshotStore.aget", side_effect=AssertionError):
+            response = await async_views.berry_detail(self.factory.get("/berries/berry-2/"), "berry-2")
+        self.assertEqual(json.loads(response.content)["name"], "berry-2")
+
+    async def test_berry_stats_rejects_unknown_fields(self):
+        response = await async_views.berry_stats(self.factory.get("/berryStats/", {"fields": "flavor"}))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_only_get_is_allowed(self):
+        response = await async_views.berries_stats_visualization(self.factory.post("/"))
+        self.assertEqual(response.status_code, 405)
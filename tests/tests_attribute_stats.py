@@ -0,0 +1,48 @@
+from berries.attribute_stats import AttributeStatistics
+from berries.records import BerryTable
+from berries.stats import NUMERIC_FIELDS
+from django.test import Client
+from django.urls import reverse
+from tests.fake_pokeapi import make_berries
+from tests.base import SnapshotTestCase
+from unittest.mock import patch
+import statistics
+
+
+class TestsAttributeStatistics(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.berries = make_berries(37)
+        self.attribute_statistics = AttributeStatistics(BerryTable(self.berries)).compute()
+
+    def test_matches_statistics_module(self):
+        self.assertEqual(self.attribute_statistics["berries_count"], 37)
+        for field in NUMERIC_FIELDS:
+            values = [berry[field] for berry in self.berries]
+            field_statistics = self.attribute_statistics["fields"][field]
+            self.assertEqual(field_statistics["min"], min(values))
+            self.assertEqual(field_statistics["max"], max(values))
+            self.assertEqual(field_statistics["median"], round(float(statistics.median(values)), 2))
+            self.assertEqual(field_statistics["variance"], round(float(statistics.variance(values)), 2))
+            self.assertEqual(field_statistics["mean"], round(float(statistics.mean(values)), 2))
+            self.assertEqual(field_statistics["mode"], statistics.mode(values))
+            self.assertEqual(field_statistics["percentiles"]["50"], field_statistics["median"])
+
+    def test_single_berry(self):
+        field_statistics = AttributeStatistics(BerryTable(self.berries[:1]), ["size"]).compute()["fields"]["size"]
+        self.assertEqual(field_statistics["variance"], 0.0)
+        self.assertEqual(field_statistics["min"], field_statistics["max"])
+
+    def test_berry_stats_endpoint(self):
+        client = Client()
+        url = reverse("berry_stats")
+        with patch("berries.service.BerriesService.get_attribute_statistics", return_value=self.attribute_statistics):
+            response = client.get(url, {"fields": "size,smoothness"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.json()["fields"]), {"size", "smoothness"})
+            self.assertEqual(response.json()["fields"]["size"], self.attribute_statistics["fields"]["size"])
+            self.assertEqual(set(client.get(url).json()["fields"]), set(NUMERIC_FIELDS))
+        response = client.get(url, {"fields": "size,flavor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("flavor", response.json()["error"])
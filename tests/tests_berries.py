@@ -1,14 +1,21 @@
 from berries.service import BerriesService
 from unittest.mock import patch
-from django.test import SimpleTestCase, Client
+from django.test import SimpleTestCase, Client, override_settings
 from django.urls import reverse
 from django.http import JsonResponse, HttpResponse
 from PIL.ImageFile import ImageFile
 from PIL import Image
 import base64
+import numpy
 import io
 
 
+# The views serve the last good snapshot, so each run starts with an empty cache.
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-berries"}},
+    BERRIES_CATALOG_PATH="",
+    BERRIES_REFRESH_INTERVAL=0
+)
 class TestsBerries(SimpleTestCase):
     
     @classmethod
@@ -85,6 +92,9 @@ class TestsBerries(SimpleTestCase):
         statistics_data, growth_times = visualization_data[0], visualization_data[1]
         self.assertIsInstance(statistics_data, dict)
         self.assertIsInstance(growth_times, list)
+        # The growth times are in the same order as the berries names.
+        records = {record["name"]: record["growth_time"] for record in self.service.get_berry_table().records()}
+        self.assertEqual(growth_times, [records[name] for name in statistics_data["berries_names"]])
     
     @staticmethod
     def __decode_image(encoded_image: str) -> ImageFile:
@@ -96,6 +106,18 @@ class TestsBerries(SimpleTestCase):
         self.assertIsNotNone(image)
         self.assertEqual(image.format, 'PNG')
     
+    def test_get_chart_data_method(self):
+        chart_data = self.service.get_chart_data()
+        _, growth_times = self.service.get_statistics(for_visualization=True)
+        bar_chart, bins_histogram = chart_data["bar_chart"], chart_data["bins_histogram"]
+        self.assertEqual(chart_data["berries_count"], len(growth_times))
+        self.assertEqual(bar_chart["labels"], sorted(set(growth_times)))
+        self.assertEqual(bar_chart["values"], [growth_times.count(label) for label in bar_chart["labels"]])
+        expected_counts, expected_edges = numpy.histogram(growth_times, bins=5)
+        self.assertEqual(bins_histogram["edges"], expected_edges.tolist())
+        self.assertEqual(bins_histogram["counts"], expected_counts.tolist())
+        self.assertEqual(self.service.get_data_for_visualization(images=False)["charts"], chart_data)
+
     def test_get_data_for_visualization_method(self):
         visualization_data = self.service.get_data_for_visualization()
         self.assertIn("bar_chart", visualization_data)
@@ -120,6 +142,7 @@ class TestsBerries(SimpleTestCase):
         self.assertIsInstance(response, JsonResponse)
         self.assertEqual(response.status_code, 200)
     
+    @override_settings(BERRIES_CHARTS_RENDERING="server")
     def test_berries_stats_visualization_endpoint(self):
         client = Client()
         url = reverse("berries_stats_visualization")
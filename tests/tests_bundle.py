@@ -0,0 +1,111 @@
+from berries.bundle import SnapshotBundle, write_bundle
+from berries.snapshots import (
+    SnapshotStore, get_bundle, seed_from_bundle, STATISTICS_SNAPSHOT, RECORDS_SNAPSHOT, SNAPSHOT_VERSION)
+from tests.fake_pokeapi import make_berries, save_fixture
+from tests.base import SnapshotTestCase, LOCMEM_CACHES
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from unittest.mock import patch
+from io import StringIO
+import tempfile
+import stat
+import os
+
+
+@override_settings(BERRIES_CHART_PROCESSES=0)
+class TestsBundle(SnapshotTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.fixtures = os.path.join(cls.directory.name, "fixtures")
+        os.makedirs(cls.fixtures)
+        save_fixture(os.path.join(cls.fixtures, "berries.json"), make_berries(8), "synthetic")
+        cls.path = os.path.join(cls.directory.name, "berries.bundle")
+        with override_settings(CACHES=LOCMEM_CACHES, BERRIES_CHART_PROCESSES=0):
+            call_command("export_berry_bundle", output=cls.path, fixtures=cls.fixtures, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def test_export_from_fixtures(self):
+        bundle = SnapshotBundle(self.path)
+        self.addCleanup(bundle.close)
+        self.assertEqual(bundle.snapshot_version, SNAPSHOT_VERSION)
+        self.assertEqual(bundle.header["source"], os.path.abspath(self.fixtures))
+        self.assertIn(RECORDS_SNAPSHOT, bundle.names())
+        statistics = bundle.get(STATISTICS_SNAPSHOT)
+        self.assertEqual(statistics.data["berries_names"], [f"berry-{berry_id}" for berry_id in range(1, 9)])
+        self.assertIsNone(bundle.get("unknown"))
+        # The workers may run as another user than the one who exported the bundle.
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+    def test_export_from_fixtures_keeps_shared_cache(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, {"berries_names": ["cheri"]})
+        call_command("export_berry_bundle", output=os.path.join(self.directory.name, "other.bundle"),
+                     fixtures=self.fixtures, stdout=StringIO())
+        self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, {"berries_names": ["cheri"]})
+        self.assertIsNone(SnapshotStore().get(RECORDS_SNAPSHOT))
+
+    def test_serves_bundle_without_pokeapi(self):
+        with override_settings(BERRIES_BUNDLE_PATH=self.path), \
+                patch("berries.service.BerriesService.get_statistics", side_effect=AssertionError) as mock_get_statistics:
+            self.assertIn(STATISTICS_SNAPSHOT, seed_from_bundle())
+            response = Client().get(reverse("all_berry_stats"))
+            mock_get_statistics.assert_not_called()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["berries_names"][0], "berry-1")
+            # The bundled snapshot is in the shared cache, with its version.
+            self.assertIsNotNone(cache.get("berries:snapshot:statistics:version", version=SNAPSHOT_VERSION))
+            not_modified = Client().get(reverse("all_berry_stats"), headers={"If-None-Match": response["ETag"]})
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_seeds_cache_once(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, {"berries_names": ["cheri"]})
+        with override_settings(BERRIES_BUNDLE_PATH=self.path):
+            seeded = seed_from_bundle()
+            # Newer snapshots already in the cache are kept.
+            self.assertNotIn(STATISTICS_SNAPSHOT, seeded)
+            self.assertIn(RECORDS_SNAPSHOT, seeded)
+            self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, {"berries_names": ["cheri"]})
+            # A snapshot missing later on isn't read from the bundle again, even by another worker.
+            SnapshotStore().delete(RECORDS_SNAPSHOT)
+            self.assertEqual(seed_from_bundle(), [])
+            self.assertIsNone(SnapshotStore().get(RECORDS_SNAPSHOT))
+
+    def test_rejects_corrupted_snapshots(self):
+        with open(self.path, "rb") as file:
+            content = file.read()
+        bundle = SnapshotBundle(self.path)
+        entries = bundle.header["snapshots"]
+        bundle.close()
+        last = max(entries, key=lambda name: entries[name]["offset"])
+        truncated = os.path.join(self.directory.name, "truncated.bundle")
+        with open(truncated, "wb") as file:
+            file.write(content[:-10])
+        bundle = SnapshotBundle(truncated)
+        self.addCleanup(bundle.close)
+        with self.assertRaises(ValueError):
+            bundle.get(last)
+        with override_settings(BERRIES_BUNDLE_PATH=truncated), self.assertLogs("berries.snapshots", level="WARNING"):
+            seeded = seed_from_bundle()
+        # The other snapshots are still seeded, and the corrupted one is built when it's requested.
+        self.assertNotIn(last, seeded)
+        self.assertEqual(len(seeded), len(entries) - 1)
+
+    def test_ignores_unusable_bundles(self):
+        other_version = os.path.join(self.directory.name, "other-version.bundle")
+        write_bundle(other_version, {}, SNAPSHOT_VERSION + 1, "test")
+        not_a_bundle = os.path.join(self.directory.name, "not-a.bundle")
+        with open(not_a_bundle, "wb") as file:
+            file.write(b"{}")
+        for path in (other_version, not_a_bundle, os.path.join(self.directory.name, "missing.bundle")):
+            with self.subTest(path=path), override_settings(BERRIES_BUNDLE_PATH=path), \
+                    self.assertLogs("berries.snapshots", level="WARNING"):
+                self.assertIsNone(get_bundle())
+                self.assertEqual(seed_from_bundle(), [])
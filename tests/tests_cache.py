@@ -0,0 +1,51 @@
+from berries.cache import SingleFlightFileBasedCache
+from django.test import SimpleTestCase
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import os
+
+
+class TestsSingleFlightCache(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        params = {"TIMEOUT": 300, "OPTIONS": {"MAX_ENTRIES": 150}}
+        # Two instances over the same directory behave like two worker processes.
+        self.worker_a = SingleFlightFileBasedCache(self.temp_dir.name, params)
+        self.worker_b = SingleFlightFileBasedCache(self.temp_dir.name, params)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_shared_between_workers(self):
+        self.worker_a.set("stats", {"min_growth_time": 2})
+        self.assertEqual(self.worker_b.get("stats"), {"min_growth_time": 2})
+        self.assertTrue(self.worker_b.has_key("stats"))
+        self.assertIsNone(self.worker_b.get("missing"))
+
+    def test_abandoned_add_lock_is_taken_over(self):
+        lock_name = self.worker_a._key_to_file("refresh-lock") + SingleFlightFileBasedCache.add_lock_suffix
+        open(lock_name, "w").close()
+        # A worker is adding the key, so the others can't.
+        self.assertFalse(self.worker_b.add("refresh-lock", True))
+        os.utime(lock_name, (0, 0))
+        self.assertTrue(self.worker_b.add("refresh-lock", True))
+        self.assertFalse(os.path.exists(lock_name))
+
+    def test_add_is_atomic_across_workers(self):
+        workers = [self.worker_a, self.worker_b] * 8
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            added = list(executor.map(lambda worker: worker.add("refresh-lock", True, timeout=60), workers))
+        self.assertEqual(added.count(True), 1)
+        self.assertTrue(self.worker_b.get("refresh-lock"))
+        # An expired entry can be added again.
+        self.worker_a.set("stats", "old", timeout=-1)
+        self.assertTrue(self.worker_b.add("stats", "new"))
+        self.assertEqual(self.worker_a.get("stats"), "new")
+
+    def test_clear_removes_locks(self):
+        self.worker_a.set("stats", "old")
+        open(self.worker_a._key_to_file("refresh-lock") + SingleFlightFileBasedCache.add_lock_suffix, "w").close()
+        self.worker_a.clear()
+        self.assertIsNone(self.worker_b.get("stats"))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
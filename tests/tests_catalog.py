@@ -0,0 +1,75 @@
+from berries.catalog import BerryCatalog
+from berries.service import BerriesService
+from django.test import SimpleTestCase
+from tests.fake_pokeapi import FakePokeAPI, make_berries
+from unittest.mock import patch
+import tempfile
+import os
+
+
+class TestsCatalog(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog = BerryCatalog(os.path.join(self.temp_dir.name, "catalog.sqlite3"))
+        self.fake_api = FakePokeAPI(berries=make_berries(30))
+        self.fake_api.start()
+        self.service = BerriesService(base_url=self.fake_api.base_url, catalog=self.catalog)
+
+    def tearDown(self):
+        self.fake_api.stop()
+        self.temp_dir.cleanup()
+
+    def test_first_request_fills_catalog(self):
+        self.assertTrue(self.catalog.is_empty())
+        data = self.service.get_statistics()
+        self.assertFalse(self.catalog.is_empty())
+        self.assertEqual(data["berries_names"], [berry["name"] for berry in self.fake_api.berries])
+        self.assertEqual(self.catalog.get_sync_state()["count"], "30")
+
+    def test_reads_do_not_hit_upstream(self):
+        self.service.sync_catalog()
+        request_count = self.fake_api.request_count
+        self.service.get_statistics()
+        self.service.get_data_for_visualization()
+        self.assertEqual(self.fake_api.request_count, request_count)
+
+    def test_reads_stream_the_catalog(self):
+        self.service.sync_catalog()
+        # The table is filled row by row, without loading every payload first.
+        with patch.object(BerryCatalog, "get_berries", side_effect=AssertionError):
+            data = self.service.get_statistics()
+        self.assertEqual(data["berries_names"], [berry["name"] for berry in self.fake_api.berries])
+
+    def test_sync_only_fetches_changes(self):
+        self.assertEqual(self.service.sync_catalog()["added"], 30)
+        request_count = self.fake_api.request_count
+        summary = self.service.sync_catalog()
+        self.assertEqual(summary, {"added": 0, "updated": 0, "removed": 0, "unchanged": 30})
+        # Only the two list pages are requested.
+        self.assertEqual(self.fake_api.request_count - request_count, 2)
+
+        self.fake_api.berries = self.fake_api.berries[1:] + make_berries(32)[30:]
+        request_count = self.fake_api.request_count
+        summary = self.service.sync_catalog()
+        self.assertEqual(summary, {"added": 2, "updated": 0, "removed": 1, "unchanged": 29})
+        self.assertEqual(self.fake_api.request_count - request_count, 2 + 2)
+        self.assertEqual(self.service.get_statistics()["berries_names"], [berry["name"] for berry in self.fake_api.berries])
+
+    def test_force_sync_fetches_everything(self):
+        self.service.sync_catalog()
+        self.assertEqual(self.service.sync_catalog(force=True)["updated"], 30)
+
+    def test_incomplete_sync_fetches_everything_next_time(self):
+        self.service.sync_catalog()
+        self.assertTrue(self.catalog.is_complete())
+        # The list endpoint reported more berries than it listed, so the catalog is missing some.
+        berries = [
+            {"name": berry["name"], "url": f"{self.fake_api.base_url}/{berry['id']}/"} for berry in self.fake_api.berries]
+        self.catalog.sync(31, berries, lambda stale: [])
+        self.assertFalse(self.catalog.is_complete())
+        request_count = self.fake_api.request_count
+        summary = self.service.sync_catalog()
+        self.assertEqual(summary["updated"], 30)
+        self.assertEqual(self.fake_api.request_count - request_count, 2 + 30)
+        self.assertTrue(self.catalog.is_complete())
@@ -0,0 +1,52 @@
+from berries.charts import ChartRenderer, shutdown_process_pool
+from matplotlib._pylab_helpers import Gcf
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from unittest import skipUnless
+from PIL import Image
+import io
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+GROWTH_TIMES = [2, 3, 3, 4, 5, 5, 5, 8, 12, 15, 18, 18, 24]
+
+
+def render_charts(renderer: ChartRenderer) -> tuple:
+    bar_chart = renderer.render_bar_chart([2, 3, 5], [1, 2, 3], "Growth Times", "Growth Time", "Frequency")
+    bins_histogram = renderer.render_bins_histogram(GROWTH_TIMES, 5, "Bins", "Growth Time Bins", "Number of Berries")
+    return bar_chart, bins_histogram
+
+
+class TestsCharts(SimpleTestCase):
+
+    def test_renders_png_without_pyplot_figures(self):
+        for image in render_charts(ChartRenderer()):
+            self.assertEqual(Image.open(io.BytesIO(image)).format, "PNG")
+        self.assertEqual(Gcf.get_num_fig_managers(), 0)
+
+    def test_concurrent_renders_match_serial_renders(self):
+        expected = render_charts(ChartRenderer())
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: render_charts(ChartRenderer()), range(16)))
+        for result in results:
+            self.assertEqual(result, expected)
+
+    def test_process_pool_renders_match_in_process_renders(self):
+        self.addCleanup(shutdown_process_pool)
+        self.assertEqual(render_charts(ChartRenderer(processes=1)), render_charts(ChartRenderer()))
+
+    @skipUnless(resource is not None, "RSS is measured with the resource module.")
+    def test_memory_stays_flat_over_many_renders(self):
+        renderer = ChartRenderer()
+        for _ in range(10):
+            render_charts(renderer)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for _ in range(30):
+            render_charts(renderer)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # 60 charts; ru_maxrss is in kilobytes on Linux (bytes on macOS, where this is even stricter).
+        self.assertLess(rss_after - rss_before, 20 * 1024)
+        self.assertEqual(Gcf.get_num_fig_managers(), 0)
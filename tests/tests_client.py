@@ -0,0 +1,101 @@
+from berries.client import PokeAPIClient, CircuitBreaker, CircuitOpenError
+from berries.service import BerriesService
+from django.test import SimpleTestCase
+from tests.fake_pokeapi import FakePokeAPI, make_berries, save_fixture
+import tempfile
+import requests
+import time
+import os
+
+
+class TestsPokeAPIClient(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_api = FakePokeAPI()
+        cls.fake_api.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_api.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.fake_api.clear_failures()
+        self.fake_api.latency = 0.0
+        self.url = f"{self.fake_api.base_url}/1/"
+
+    def test_retries_server_errors(self):
+        client = PokeAPIClient(retries=3, backoff_factor=0.01)
+        self.fake_api.fail_next(2, status=503)
+        request_count = self.fake_api.request_count
+        self.assertEqual(client.get_json(self.url)["id"], 1)
+        self.assertEqual(self.fake_api.request_count - request_count, 3)
+
+    def test_honors_retry_after(self):
+        client = PokeAPIClient(retries=1, backoff_factor=0.01)
+        self.fake_api.fail_next(1, status=429, retry_after="1")
+        start = time.monotonic()
+        self.assertEqual(client.get_json(self.url)["id"], 1)
+        self.assertGreaterEqual(time.monotonic() - start, 1.0)
+
+    def test_gives_up_after_retries(self):
+        client = PokeAPIClient(retries=1, backoff_factor=0.01)
+        self.fake_api.fail_next(2, status=500)
+        with self.assertRaises(requests.HTTPError):
+            client.get_json(self.url)
+
+    def test_read_timeout(self):
+        client = PokeAPIClient(read_timeout=0.1, retries=0)
+        self.fake_api.latency = 0.5
+        # With retries configured, requests reports read timeouts as a ConnectionError.
+        with self.assertRaises(requests.RequestException):
+            client.get_json(self.url)
+
+    def test_circuit_opens_and_recovers(self):
+        client = PokeAPIClient(retries=0, failure_threshold=2, reset_timeout=0.2)
+        self.fake_api.fail_next(2, status=502)
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                client.get_json(self.url)
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.OPEN)
+        request_count = self.fake_api.request_count
+        with self.assertRaises(CircuitOpenError):
+            client.get_json(self.url)
+        self.assertEqual(self.fake_api.request_count, request_count)
+        time.sleep(0.25)
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(client.get_json(self.url)["id"], 1)
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_invalid_json_is_a_failure(self):
+        client = PokeAPIClient(retries=0, failure_threshold=1, reset_timeout=0.2)
+        self.fake_api.fail_next(1, status=200, body=b"<html>Bad gateway</html>")
+        with self.assertRaises(requests.JSONDecodeError):
+            client.get_json(self.url)
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.OPEN)
+
+    def test_not_found_does_not_open_circuit(self):
+        client = PokeAPIClient(retries=0, failure_threshold=1)
+        with self.assertRaises(requests.HTTPError):
+            client.get_json(f"{self.fake_api.base_url}/9999/")
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_service_survives_transient_failures(self):
+        client = PokeAPIClient(retries=3, backoff_factor=0.01)
+        self.fake_api.fail_next(3, status=503)
+        data = BerriesService(base_url=self.fake_api.base_url, client=client).get_statistics()
+        self.assertEqual(len(data["berries_names"]), len(self.fake_api.berries))
+
+    def test_service_on_recorded_fixture_with_injected_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "berries.json")
+            save_fixture(path, make_berries(30), source="synthetic")
+            fake_api = FakePokeAPI.from_fixture(path, error_rate=0.2, seed=1)
+        with fake_api:
+            client = PokeAPIClient(retries=5, backoff_factor=0.001)
+            data = BerriesService(base_url=fake_api.base_url, client=client).get_statistics()
+            self.assertEqual(data["berries_names"], [berry["name"] for berry in make_berries(30)])
+            # Some requests failed and were retried.
+            self.assertGreater(fake_api.request_count, 2 + 30)
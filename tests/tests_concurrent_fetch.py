@@ -0,0 +1,36 @@
+from berries.service import BerriesService
+from django.test import SimpleTestCase
+from tests.fake_pokeapi import FakePokeAPI
+import statistics
+
+
+class TestsConcurrentFetch(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_api = FakePokeAPI(latency=0.02)
+        cls.fake_api.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_api.stop()
+        super().tearDownClass()
+
+    def test_berries_names_keep_list_order(self):
+        data = BerriesService(base_url=self.fake_api.base_url, max_workers=8).get_statistics()
+        expected_names = [berry["name"] for berry in self.fake_api.berries]
+        self.assertEqual(data["berries_names"], expected_names)
+
+    def test_statistics_match_serial_fetch(self):
+        concurrent_data = BerriesService(base_url=self.fake_api.base_url, max_workers=8).get_statistics()
+        serial_data = BerriesService(base_url=self.fake_api.base_url, max_workers=1).get_statistics()
+        self.assertEqual(concurrent_data, serial_data)
+        growth_times = [berry["growth_time"] for berry in self.fake_api.berries]
+        self.assertEqual(concurrent_data["mean_growth_time"], round(statistics.mean(growth_times), 2))
+
+    def test_concurrency_is_bounded(self):
+        self.fake_api.max_in_flight = 0
+        BerriesService(base_url=self.fake_api.base_url, max_workers=4).get_statistics()
+        self.assertGreater(self.fake_api.max_in_flight, 1)
+        self.assertLessEqual(self.fake_api.max_in_flight, 4)
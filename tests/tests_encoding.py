@@ -0,0 +1,68 @@
+from berries.encoding import negotiate_encoding, fast_dumps, stdlib_dumps, encode_body, IDENTITY, GZIP, BROTLI
+from berries.records import BerryTable
+from berries.snapshots import SnapshotStore, STATISTICS_SNAPSHOT
+from django.test import SimpleTestCase, Client, override_settings
+from django.urls import reverse
+from tests.fake_pokeapi import make_berries
+from tests.base import SnapshotTestCase
+from unittest.mock import patch
+import brotli
+import gzip
+import json
+
+STATISTICS = {"berries_names": [berry["name"] for berry in make_berries(64)], "min_growth_time": 2, "mean_growth_time": 9.5}
+
+
+class TestsEncoding(SimpleTestCase):
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding(""), IDENTITY)
+        self.assertEqual(negotiate_encoding("gzip, deflate"), GZIP)
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), BROTLI)
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip;q=0.8"), GZIP)
+        self.assertEqual(negotiate_encoding("br;q=0, *"), GZIP)
+        self.assertEqual(negotiate_encoding("gzip;q=0"), IDENTITY)
+        self.assertEqual(negotiate_encoding("deflate"), IDENTITY)
+
+    def test_serializers_agree(self):
+        self.assertEqual(json.loads(fast_dumps(STATISTICS)), json.loads(stdlib_dumps(STATISTICS)))
+
+    def test_encode_body(self):
+        bodies = encode_body(STATISTICS)
+        self.assertEqual(json.loads(bodies[IDENTITY]), STATISTICS)
+        self.assertEqual(gzip.decompress(bodies[GZIP]), bodies[IDENTITY])
+        self.assertEqual(brotli.decompress(bodies[BROTLI]), bodies[IDENTITY])
+        # Small bodies aren't worth compressing.
+        self.assertEqual(list(encode_body({"a": 1})), [IDENTITY])
+
+
+class TestsEncodedResponses(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_snapshot_is_served_as_encoded_when_saved(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        with patch("berries.encoding.dumps", side_effect=AssertionError), \
+                patch("berries.encoding.compress", side_effect=AssertionError):
+            gzip_response = self.client.get(reverse("all_berry_stats"), HTTP_ACCEPT_ENCODING="gzip, deflate")
+            brotli_response = self.client.get(reverse("all_berry_stats"), HTTP_ACCEPT_ENCODING="gzip, br")
+            identity_response = self.client.get(reverse("all_berry_stats"))
+
+        self.assertEqual(gzip_response["Content-Encoding"], GZIP)
+        self.assertEqual(json.loads(gzip.decompress(gzip_response.content)), STATISTICS)
+        self.assertEqual(brotli_response["Content-Encoding"], BROTLI)
+        self.assertEqual(json.loads(brotli.decompress(brotli_response.content)), STATISTICS)
+        self.assertNotIn("Content-Encoding", identity_response)
+        self.assertEqual(identity_response.json(), STATISTICS)
+        for response in (gzip_response, brotli_response, identity_response):
+            self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertLess(len(gzip_response.content), len(identity_response.content))
+
+    @override_settings(BERRIES_JSON_SERIALIZER="berries.encoding.stdlib_dumps")
+    def test_dynamic_responses_are_compressed_on_the_fly(self):
+        with patch("berries.service.BerriesService.get_berry_table", return_value=BerryTable(make_berries(64))):
+            response = self.client.get(reverse("berries_list"), {"limit": 50}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], GZIP)
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))["results"]), 50)
@@ -0,0 +1,109 @@
+from berries.index import BerryIndex, parse_query, DEFAULT_LIMIT
+from berries.records import BerryTable
+from django.test import SimpleTestCase, Client
+from django.urls import reverse
+from tests.fake_pokeapi import make_berries
+from tests.base import SnapshotTestCase
+from unittest.mock import patch
+
+TABLE = BerryTable(make_berries(64))
+RECORDS = list(TABLE.records())
+
+
+class TestsBerryIndex(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = BerryIndex(TABLE)
+
+    def test_table_record(self):
+        self.assertEqual(RECORDS[0], {
+            "id": 1, "name": "berry-1", "growth_time": 4, "max_harvest": 6, "natural_gift_power": 70, "size": 57,
+            "smoothness": 25, "soil_dryness": 7, "firmness": "soft", "natural_gift_type": "fire",
+            "item": "berry-1-item", "flavors": {"spicy": 10}
+        })
+
+    def test_get_by_name(self):
+        self.assertEqual(self.index.get("berry-10"), RECORDS[9])
+        self.assertIsNone(self.index.get("unknown"))
+
+    def test_range_filters_match_a_full_scan(self):
+        lookups = {"gte": lambda a, b: a >= b, "gt": lambda a, b: a > b, "lte": lambda a, b: a <= b,
+                   "lt": lambda a, b: a < b, "exact": lambda a, b: a == b}
+        for lookup, compare in lookups.items():
+            for value in (0, 5, 12, 24, 30):
+                count, berries = self.index.search(ranges={"growth_time": {lookup: value}}, limit=len(RECORDS))
+                expected = [record for record in RECORDS if compare(record["growth_time"], value)]
+                self.assertEqual(berries, expected, f"growth_time__{lookup}={value}")
+                self.assertEqual(count, len(expected))
+
+    def test_combined_filters_sort_and_pagination(self):
+        query = parse_query({
+            "growth_time__gte": "5", "growth_time__lt": "18", "firmness": "soft,hard", "sort": "-size", "limit": "3",
+            "offset": "2"})
+        count, berries = self.index.search(**query)
+        expected = sorted(
+            (record for record in RECORDS
+             if 5 <= record["growth_time"] < 18 and record["firmness"] in ("soft", "hard")),
+            key=lambda record: -record["size"])
+        self.assertEqual(count, len(expected))
+        self.assertEqual(berries, expected[2:5])
+
+    def test_parse_query_errors(self):
+        for params in ({"flavor": "spicy"}, {"size__in": "1"}, {"growth_time__gte": "soon"}, {"sort": "color"},
+                       {"limit": "0"}, {"limit": "101"}, {"offset": "-1"}):
+            with self.assertRaises(ValueError, msg=params):
+                parse_query(params)
+
+
+class TestsBerriesViews(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        patcher = patch("berries.service.BerriesService.get_berry_table", return_value=TABLE)
+        self.mock_get_berry_table = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_berry_detail(self):
+        response = self.client.get(reverse("berry_detail", args=["Berry-3"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), RECORDS[2])
+        self.assertIn("X-Data-Generated-At", response)
+        self.assertEqual(self.client.get(reverse("berry_detail", args=["unknown"])).status_code, 404)
+        # Both requests were served from the same snapshot.
+        self.assertEqual(self.mock_get_berry_table.call_count, 1)
+
+    def test_lookups_reuse_the_index_without_loading_the_records(self):
+        self.assertEqual(self.client.get(reverse("berry_detail", args=["berry-1"])).status_code, 200)
+        # The version of the records snapshot is enough to know the index is up to date.
+        with patch("berries.snapshots.SnapshotStore.get", side_effect=AssertionError):
+            response = self.client.get(reverse("berry_detail", args=["berry-2"]))
+            self.assertEqual(response.json(), RECORDS[1])
+            self.assertIn("X-Data-Generated-At", response)
+            self.assertEqual(self.client.get(reverse("berries_list")).json()["count"], len(RECORDS))
+
+    def test_berries_list_pagination(self):
+        response = self.client.get(reverse("berries_list"))
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(page["count"], len(RECORDS))
+        self.assertEqual(page["results"], RECORDS[:DEFAULT_LIMIT])
+        self.assertIsNone(page["previous"])
+
+        next_page = self.client.get(page["next"]).json()
+        self.assertEqual(next_page["results"], RECORDS[DEFAULT_LIMIT:2 * DEFAULT_LIMIT])
+        self.assertIn("offset=0", next_page["previous"])
+
+    def test_berries_list_filters(self):
+        response = self.client.get(reverse("berries_list"), {"firmness": "very-hard", "sort": "name", "limit": 100})
+        names = [berry["name"] for berry in response.json()["results"]]
+        self.assertEqual(names, sorted(record["name"] for record in RECORDS if record["firmness"] == "very-hard"))
+        self.assertIsNone(response.json()["next"])
+
+    def test_berries_list_rejects_unknown_filters(self):
+        response = self.client.get(reverse("berries_list"), {"color": "red"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+        self.mock_get_berry_table.assert_not_called()
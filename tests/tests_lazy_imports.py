@@ -0,0 +1,41 @@
+from tests.fake_pokeapi import FakePokeAPI
+from django.test import SimpleTestCase
+from django.conf import settings
+import subprocess
+import sys
+import os
+
+
+class TestsLazyImports(SimpleTestCase):
+
+    @staticmethod
+    def run_fresh(code: str, **environment: str) -> str:
+        # A fresh interpreter is needed, since this one may have loaded the libraries already.
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="pokeberries_api_project.settings", **environment)
+        env.setdefault("SECRET_KEY", "tests")
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+        return result.stdout
+
+    def test_json_endpoints_do_not_load_chart_libraries(self):
+        code = (
+            "import django, sys; django.setup(); "
+            "import pokeberries_api_project.urls; "
+            "print('matplotlib' in sys.modules, 'numpy' in sys.modules)"
+        )
+        self.assertEqual(self.run_fresh(code).split(), ["False", "False"])
+
+    def test_refresh_does_not_load_chart_libraries(self):
+        code = (
+            "import django, sys; django.setup(); "
+            "from berries.snapshots import SnapshotStore; "
+            "print(sorted(SnapshotStore().refresh())); "
+            "print('matplotlib' in sys.modules, 'numpy' in sys.modules)"
+        )
+        with FakePokeAPI() as fake_api:
+            output = self.run_fresh(
+                code, POKEAPI_BASE_URL=fake_api.base_url, BERRIES_CATALOG_PATH="", BERRIES_REFRESH_INTERVAL="0",
+                CACHE_BACKEND="django.core.cache.backends.locmem.LocMemCache")
+        snapshots, imports = output.splitlines()
+        self.assertEqual(snapshots, "['charts', 'records', 'statistics']")
+        self.assertEqual(imports.split(), ["False", "False"])
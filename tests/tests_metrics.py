@@ -0,0 +1,119 @@
+from berries import metrics
+from berries.client import PokeAPIClient
+from berries.service import BerriesService
+from berries.snapshots import SnapshotStore, STATISTICS_SNAPSHOT
+from berries.records import BerryTable
+from django.test import SimpleTestCase, Client, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from tests.fake_pokeapi import FakePokeAPI, make_berries
+from tests.base import SnapshotTestCase
+from unittest.mock import patch
+from django.conf import settings
+import subprocess
+import requests
+import sys
+import os
+
+STATISTICS = {"berries_names": ["cheri"], "min_growth_time": 3}
+
+
+class TestsMetrics(SimpleTestCase):
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    @override_settings(BERRIES_METRICS_ENABLED=False)
+    def test_disabled_metrics_record_nothing(self):
+        with metrics.stage("list"):
+            pass
+        metrics.observe_upstream_request("sync", "200", 0.1)
+        self.assertEqual(metrics.stage_duration.get_count("list"), 0)
+        self.assertEqual(metrics.upstream_requests.get("sync", "200"), 0)
+
+    def test_disabled_without_settings(self):
+        # A fresh interpreter is needed, since the settings of this one are configured.
+        code = (
+            "from berries import metrics; "
+            "metrics.observe_upstream_request('sync', '200', 0.1); "
+            "print(metrics.is_enabled(), metrics.upstream_requests.get('sync', '200'))"
+        )
+        env = {key: value for key, value in os.environ.items() if key != "DJANGO_SETTINGS_MODULE"}
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ["False", "0"])
+
+    def test_metrics_implement_samples(self):
+        with self.assertRaises(TypeError):
+            metrics.Metric("berries_test", "Metric without samples.")
+
+    @override_settings(BERRIES_METRICS_ENABLED=True)
+    def test_histogram_rendering(self):
+        histogram = metrics.Histogram("test_seconds", "Test.", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "list")
+        self.assertEqual(histogram.render(), [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{stage="list",le="0.1"} 1.0',
+            'test_seconds_bucket{stage="list",le="1.0"} 3.0',
+            'test_seconds_bucket{stage="list",le="+Inf"} 4.0',
+            'test_seconds_sum{stage="list"} 6.05',
+            'test_seconds_count{stage="list"} 4.0',
+        ])
+        self.assertEqual(metrics.format_sample("test", {"path": 'a"b'}, 1), 'test{path="a\\"b"} 1.0')
+
+
+@override_settings(BERRIES_METRICS_ENABLED=True)
+class TestsInstrumentation(SnapshotTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_api = FakePokeAPI()
+        cls.fake_api.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_api.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.fake_api.clear_failures()
+
+    def test_service_stages_and_upstream_requests(self):
+        client = PokeAPIClient(retries=0)
+        BerriesService(base_url=self.fake_api.base_url, client=client).get_statistics()
+        for stage in ("list", "details", "table", "statistics"):
+            self.assertEqual(metrics.stage_duration.get_count(stage), 1, stage)
+        pages = -(-len(self.fake_api.berries) // self.fake_api.page_size)
+        self.assertEqual(metrics.upstream_requests.get("sync", "200"), pages + len(self.fake_api.berries))
+        self.assertEqual(metrics.upstream_duration.get_count("sync"), pages + len(self.fake_api.berries))
+
+        with self.assertRaises(requests.HTTPError):
+            client.get_json(f"{self.fake_api.base_url}/9999/")
+        self.assertEqual(metrics.upstream_requests.get("sync", "404"), 1)
+
+    def test_metrics_endpoint(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        self.client = Client()
+        self.client.get(reverse("all_berry_stats"))
+        cache.clear()
+        with patch("berries.service.BerriesService._BerriesService__get_berries_table",
+                   return_value=BerryTable(make_berries(8))):
+            self.client.get(reverse("berry_stats"))
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        lines = response.content.decode().splitlines()
+        self.assertIn('berries_snapshot_lookups_total{snapshot="statistics",lookup="version",result="hit"} 1.0', lines)
+        self.assertIn('berries_snapshot_lookups_total{snapshot="attributes",lookup="snapshot",result="miss"} 1.0', lines)
+        self.assertIn("# TYPE berries_stage_duration_seconds histogram", lines)
+        self.assertIn('berries_stage_duration_seconds_count{stage="attribute_statistics"} 1.0', lines)
+        self.assertTrue(any(line.startswith('berries_snapshot_builds_executed_total{snapshot="attributes"}') for line in lines))
+
+        with override_settings(BERRIES_METRICS_ENABLED=False):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
@@ -0,0 +1,40 @@
+from berries.records import BerryTable
+from berries.stats import NUMERIC_FIELDS
+from django.test import SimpleTestCase
+from tests.fake_pokeapi import make_berries
+import pickle
+
+
+class TestsBerryTable(SimpleTestCase):
+
+    def setUp(self):
+        self.berries = make_berries(40)
+        self.table = BerryTable(self.berries)
+
+    def test_columns_keep_the_payload_values(self):
+        self.assertEqual(len(self.table), 40)
+        self.assertEqual(self.table.names, [berry["name"] for berry in self.berries])
+        for field in NUMERIC_FIELDS:
+            self.assertEqual(list(self.table.column(field)), [berry[field] for berry in self.berries])
+        self.assertEqual(self.table.category("firmness"), [berry["firmness"]["name"] for berry in self.berries])
+
+    def test_shared_names_are_interned(self):
+        firmnesses = self.table.category("firmness")
+        self.assertIs(firmnesses[1], firmnesses[6])
+
+    def test_pickle_round_trip(self):
+        unpickled = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual(list(unpickled.records()), list(self.table.records()))
+
+    def test_flavors_seen_later_are_added_to_previous_berries(self):
+        berries = make_berries(2)
+        berries[1]["flavors"].append({"potency": 20, "flavor": {"name": "dry", "url": ""}})
+        table = BerryTable(berries)
+        self.assertEqual(table.record(0)["flavors"], {"spicy": 10, "dry": 0})
+        self.assertEqual(table.record(1)["flavors"], {"spicy": 20, "dry": 20})
+
+    def test_values_out_of_range_are_rejected(self):
+        berries = make_berries(1)
+        berries[0]["size"] = 70000
+        with self.assertRaises(OverflowError):
+            BerryTable(berries)
@@ -0,0 +1,126 @@
+from berries.client import PokeAPIClient
+from berries.crawler import ResourceCrawler
+from berries.resources import ResourceStatistics, RESOURCES
+from berries.service import BerriesService
+from berries.snapshots import SnapshotStore, get_resource_snapshot
+from tests.fake_pokeapi import FakePokeAPI, make_berries, make_items
+from tests.base import SnapshotTestCase
+from django.test import SimpleTestCase, Client
+from django.urls import reverse
+from unittest.mock import patch
+from statistics import StatisticsError
+import statistics
+
+FLAVORS = [
+    {"id": flavor_id, "name": name, "berries": [{"potency": 10}] * berries_count}
+    for flavor_id, (name, berries_count) in enumerate([("spicy", 5), ("dry", 3), ("sweet", 5), ("bitter", 8)], start=1)
+]
+
+
+class TestsResourceStatistics(SimpleTestCase):
+
+    def test_matches_statistics_module(self):
+        items = make_items()
+        data = ResourceStatistics(RESOURCES["item"]).add_all(items).compute()
+        self.assertEqual(data["resource"], "item")
+        self.assertEqual(data["count"], len(items))
+        # Items without a fling power are left out of its statistics.
+        fling_powers = [item["fling_power"] for item in items if item["fling_power"] is not None]
+        self.assertEqual(data["fields"]["fling_power"], {
+            "count": len(fling_powers), "min": min(fling_powers), "median": round(statistics.median(fling_powers), 2),
+            "max": max(fling_powers), "variance": round(statistics.variance(fling_powers), 2),
+            "mean": round(statistics.mean(fling_powers), 2), "mode": statistics.mode(fling_powers),
+        })
+        self.assertEqual(data["fields"]["attributes"]["max"], 2)
+
+    def test_fields_without_values(self):
+        items = [dict(item, fling_power=None) for item in make_items(3)]
+        data = ResourceStatistics(RESOURCES["item"], ["fling_power"]).add_all(items).compute()
+        self.assertEqual(data["fields"], {"fling_power": {"count": 0}})
+        with self.assertRaises(StatisticsError):
+            ResourceStatistics(RESOURCES["item"]).compute()
+
+
+class TestsResourceCrawler(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_api = FakePokeAPI(berries=make_berries(12), page_size=5, resources={"item": make_items(), "berry-flavor": FLAVORS})
+        cls.fake_api.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_api.stop()
+        super().tearDownClass()
+
+    def test_fetches_each_url_once(self):
+        crawler = ResourceCrawler(PokeAPIClient(retries=0), max_workers=4)
+        count, entries = crawler.list(self.fake_api.get_resource_url("item"))
+        self.assertEqual(count, 30)
+        self.assertEqual([entry["name"] for entry in entries], [f"item-{item_id}" for item_id in range(1, 31)])
+        requests_before = self.fake_api.request_count
+        details = crawler.get_details(entries + entries[:3])
+        self.assertEqual(self.fake_api.request_count - requests_before, 30)
+        self.assertEqual([item["id"] for item in details], list(range(1, 31)) + [1, 2, 3])
+
+    def test_service_statistics_of_every_resource(self):
+        service = BerriesService(base_url=self.fake_api.base_url, client=PokeAPIClient(retries=0))
+        flavors = service.get_resource_statistics("berry-flavor")
+        self.assertEqual(flavors["count"], 4)
+        self.assertEqual(flavors["fields"]["berries"]["mode"], 5)
+        items = service.get_resource_statistics("item")
+        self.assertEqual(items, ResourceStatistics(RESOURCES["item"]).add_all(make_items()).compute())
+        for resource in ("berry", "pokemon"):
+            with self.assertRaises(KeyError):
+                service.get_resource_statistics(resource)
+
+    async def test_async_service_statistics(self):
+        service = BerriesService(base_url=self.fake_api.base_url)
+        items = await service.aget_resource_statistics("item")
+        self.assertEqual(items, ResourceStatistics(RESOURCES["item"]).add_all(make_items()).compute())
+
+
+class TestsResourceStatsView(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.items = ResourceStatistics(RESOURCES["item"]).add_all(make_items()).compute()
+
+    def test_serves_resource_statistics(self):
+        with patch("berries.service.BerriesService.get_resource_statistics", return_value=self.items) as mock_statistics:
+            response = self.client.get(reverse("resource_stats", args=["item"]))
+            fields_response = self.client.get(reverse("resource_stats", args=["item"]), {"fields": "cost"})
+            # One crawl serves the statistics of every field.
+            mock_statistics.assert_called_once_with("item")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.items)
+        self.assertEqual(list(fields_response.json()["fields"]), ["cost"])
+        self.assertEqual(fields_response.json()["count"], 30)
+
+    def test_rejects_unknown_resources_and_fields(self):
+        response = self.client.get(reverse("resource_stats", args=["pokemon"]))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("berry-firmness", response.json()["error"])
+        # The berries have an endpoint of their own.
+        response = self.client.get(reverse("resource_stats", args=["berry"]))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn(reverse("berry_stats"), response.json()["error"])
+        response = self.client.get(reverse("resource_stats", args=["item"]), {"fields": "size"})
+        self.assertEqual(response.status_code, 400)
+        with patch("berries.service.BerriesService.get_resource_statistics", side_effect=Exception()):
+            response = self.client.get(reverse("resource_stats", args=["item"]))
+        self.assertEqual(response.status_code, 500)
+
+    def test_refresh_only_rebuilds_requested_resources(self):
+        SnapshotStore().save(get_resource_snapshot("item"), self.items)
+        visualization_data = {"berries_names": ["cheri"], "charts": {}}
+        with patch("berries.service.BerriesService.get_data_for_visualization", return_value=visualization_data), \
+                patch("berries.service.BerriesService.get_attribute_statistics", return_value={"berries_count": 1}), \
+                patch("berries.service.BerriesService.get_berry_table", return_value=[]), \
+                patch("berries.service.BerriesService.get_resource_statistics", return_value=self.items) as mock_statistics:
+            snapshots = SnapshotStore().refresh()
+        mock_statistics.assert_called_once_with("item")
+        self.assertIn(get_resource_snapshot("item"), snapshots)
+        self.assertNotIn(get_resource_snapshot("berry-flavor"), snapshots)
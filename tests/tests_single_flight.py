@@ -0,0 +1,91 @@
+from berries.single_flight import SingleFlight
+from berries.snapshots import SnapshotStore, snapshot_builds, STATISTICS_SNAPSHOT
+from tests.base import SnapshotTestCase
+from django.test import SimpleTestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import threading
+import asyncio
+import time
+
+STATISTICS = {"berries_names": ["cheri"], "min_growth_time": 3}
+CALLERS = 20
+
+
+class TestsSingleFlight(SimpleTestCase):
+
+    def test_concurrent_calls_share_one_execution(self):
+        single_flight, calls, started = SingleFlight(), [], threading.Event()
+
+        def slow_call():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"value": 1}
+
+        with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+            leader = executor.submit(single_flight.do, "key", slow_call)
+            started.wait()
+            followers = [executor.submit(single_flight.do, "key", slow_call) for _ in range(CALLERS - 1)]
+            results = [leader.result()] + [follower.result() for follower in followers]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.stats(), {"key": {"executed": 1, "coalesced": CALLERS - 1}})
+        # Once the call is done, the next one runs again.
+        single_flight.do("key", slow_call)
+        self.assertEqual(len(calls), 2)
+
+    def test_exception_is_shared_by_coalesced_callers(self):
+        single_flight, started = SingleFlight(), threading.Event()
+
+        def failing_call():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("PokeAPI is down")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", failing_call)
+            started.wait()
+            follower = executor.submit(single_flight.do, "key", failing_call)
+            for future in (leader, follower):
+                with self.assertRaises(ValueError):
+                    future.result()
+        self.assertEqual(single_flight.stats()["key"], {"executed": 1, "coalesced": 1})
+
+    async def test_concurrent_coroutines_share_one_execution(self):
+        single_flight, calls = SingleFlight(), []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {"value": 1}
+
+        results = await asyncio.gather(*(single_flight.ado("key", slow_call) for _ in range(CALLERS)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 1}] * CALLERS)
+        self.assertEqual(single_flight.stats(), {"key": {"executed": 1, "coalesced": CALLERS - 1}})
+
+
+class TestsSnapshotCoalescing(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        snapshot_builds.reset_stats()
+
+    def test_cold_snapshot_is_built_once_for_concurrent_requests(self):
+        def slow_statistics():
+            time.sleep(0.2)
+            return STATISTICS
+
+        with patch("berries.service.BerriesService.get_statistics", side_effect=slow_statistics) as mock_get_statistics:
+            with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+                snapshots = list(executor.map(
+                    lambda _: SnapshotStore().get_or_build(STATISTICS_SNAPSHOT, mock_get_statistics), range(CALLERS)))
+        self.assertEqual(mock_get_statistics.call_count, 1)
+        self.assertTrue(all(snapshot.data == STATISTICS for snapshot in snapshots))
+        stats = snapshot_builds.stats()[STATISTICS_SNAPSHOT]
+        self.assertEqual(stats["executed"], 1)
+        # Requests that arrived after the snapshot was saved were served from the cache.
+        self.assertGreater(stats["coalesced"], 0)
+        self.assertLessEqual(stats["coalesced"], CALLERS - 1)
@@ -0,0 +1,229 @@
+from berries.snapshots import (
+    SnapshotStore, SnapshotRefresher, STATISTICS_SNAPSHOT, VISUALIZATION_SNAPSHOT, ATTRIBUTES_SNAPSHOT, RECORDS_SNAPSHOT,
+    CHARTS_SNAPSHOT, SNAPSHOT_VERSION)
+from berries.records import BerryTable
+from berries.views import STATISTICS_ERROR, CHARTS_ERROR
+from tests.fake_pokeapi import FakePokeAPI, make_berries
+from tests.base import SnapshotTestCase
+from django.test import Client, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from unittest.mock import patch, PropertyMock, MagicMock
+from datetime import timedelta
+
+STATISTICS = {"berries_names": ["cheri"], "min_growth_time": 3}
+CHARTS = {
+    "berries_count": 1,
+    "bar_chart": {"title": "Growth Times", "x_label": "Growth Time", "y_label": "Frequency", "labels": [3], "values": [1]},
+    "bins_histogram": {
+        "title": "Bins", "x_label": "Bins", "y_label": "Berries", "bins": 5, "edges": [2.5, 2.7, 2.9, 3.1, 3.3, 3.5],
+        "counts": [0, 0, 1, 0, 0]},
+}
+
+
+class TestsSnapshots(SnapshotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_serves_snapshot_with_headers(self):
+        snapshot = SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        snapshot.generated_at -= timedelta(seconds=90)
+        cache.set("berries:snapshot:statistics", snapshot, timeout=None, version=SNAPSHOT_VERSION)
+        with patch("berries.service.BerriesService.get_statistics") as mock_get_statistics:
+            response = self.client.get(reverse("all_berry_stats"))
+            mock_get_statistics.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), STATISTICS)
+        self.assertGreaterEqual(int(response["Age"]), 90)
+        self.assertEqual(response["X-Data-Generated-At"], snapshot.generated_at.isoformat())
+
+    def test_builds_snapshot_on_first_request(self):
+        with patch("berries.service.BerriesService.get_statistics", return_value=STATISTICS) as mock_get_statistics:
+            self.client.get(reverse("all_berry_stats"))
+            response = self.client.get(reverse("all_berry_stats"))
+            self.assertEqual(mock_get_statistics.call_count, 1)
+        self.assertEqual(response.json(), STATISTICS)
+
+    def test_failed_refresh_keeps_stale_snapshot(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        refresher = SnapshotRefresher(interval=60)
+        with patch("berries.service.BerriesService.get_berry_table", side_effect=Exception()):
+            with self.assertLogs("berries.snapshots", level="ERROR"):
+                self.assertFalse(refresher.refresh())
+        response = self.client.get(reverse("all_berry_stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), STATISTICS)
+
+    def test_refresh_syncs_catalog_first(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        refresher = SnapshotRefresher(interval=60)
+        with patch("berries.service.BerriesService.has_catalog", new_callable=PropertyMock, return_value=True), \
+                patch("berries.service.BerriesService.sync_catalog", side_effect=ConnectionError()) as mock_sync, \
+                patch("berries.service.BerriesService.get_data_for_visualization") as mock_visualization:
+            with self.assertLogs("berries.snapshots", level="ERROR"):
+                self.assertFalse(refresher.refresh())
+            mock_sync.assert_called_once_with()
+            mock_visualization.assert_not_called()
+        self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, STATISTICS)
+
+    @override_settings(BERRIES_CHARTS_RENDERING="server")
+    def test_refresh_updates_both_snapshots(self):
+        visualization_data = dict(STATISTICS, bar_chart=b"bar", bins_histogram=b"bins", charts=CHARTS)
+        table = BerryTable(make_berries(3))
+        # The attributes snapshot is only refreshed once it has been requested.
+        SnapshotStore().save(ATTRIBUTES_SNAPSHOT, {"berries_count": 0})
+        refresher = SnapshotRefresher(interval=60)
+        with patch("berries.service.BerriesService.get_data_for_visualization", return_value=visualization_data), \
+                patch("berries.service.BerriesService.get_attribute_statistics", return_value={"berries_count": 1}), \
+                patch("berries.service.BerriesService.get_berry_table", return_value=table):
+            self.assertTrue(refresher.refresh())
+            # Another worker within the same interval skips the refresh.
+            self.assertFalse(SnapshotRefresher(interval=60).refresh())
+        self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, STATISTICS)
+        self.assertEqual(SnapshotStore().get(ATTRIBUTES_SNAPSHOT).data, {"berries_count": 1})
+        self.assertEqual(SnapshotStore().get(CHARTS_SNAPSHOT).data, CHARTS)
+        self.assertEqual(list(SnapshotStore().get(RECORDS_SNAPSHOT).data["berries"].records()), list(table.records()))
+        visualization_snapshot = SnapshotStore().get(VISUALIZATION_SNAPSHOT)
+        self.assertEqual(sorted(visualization_snapshot.assets.values()), [b"bar", b"bins"])
+        self.assertTrue(visualization_snapshot.data["bar_chart"].startswith("/charts/"))
+
+    def test_refresh_fetches_the_berries_once(self):
+        SnapshotStore().save(ATTRIBUTES_SNAPSHOT, {"berries_count": 0})
+        with FakePokeAPI(berries=make_berries(12), page_size=5) as fake_api, \
+                override_settings(POKEAPI_BASE_URL=fake_api.base_url):
+            snapshots = SnapshotStore().refresh()
+            # Every snapshot is built from a single crawl: the 3 list pages and the 12 details.
+            self.assertEqual(fake_api.request_count, 3 + 12)
+        self.assertEqual(snapshots[ATTRIBUTES_SNAPSHOT].data["berries_count"], 12)
+        self.assertEqual(len(snapshots[RECORDS_SNAPSHOT].data["berries"]), 12)
+
+    def test_refresh_lock_lasts_the_interval(self):
+        lock_cache = MagicMock()
+        lock_cache.add.return_value = False
+        self.assertFalse(SnapshotRefresher(interval=1800, lock_cache=lock_cache).refresh())
+        lock_cache.add.assert_called_once_with(
+            SnapshotRefresher.lock_key, True, timeout=1800 - SnapshotRefresher.lock_skew)
+
+    def test_chart_asset_conditional_get(self):
+        visualization_data = dict(STATISTICS, bar_chart=b"\x89PNG bar", bins_histogram=b"\x89PNG bins")
+        snapshot = SnapshotStore().save(VISUALIZATION_SNAPSHOT, visualization_data)
+        chart_url = snapshot.data["bar_chart"]
+        response = self.client.get(chart_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"\x89PNG bar")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("immutable", response["Cache-Control"])
+        response = self.client.get(chart_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/charts/unknown.png").status_code, 404)
+
+    def test_all_berry_stats_conditional_get(self):
+        snapshot = SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        response = self.client.get(reverse("all_berry_stats"))
+        self.assertEqual(response["ETag"], snapshot.version.etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        # The 304 responses only need the version of the snapshot, not the snapshot itself.
+        with patch("berries.snapshots.SnapshotStore.get", side_effect=AssertionError):
+            not_modified = self.client.get(reverse("all_berry_stats"), HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified.content, b"")
+            self.assertEqual(not_modified["ETag"], response["ETag"])
+            not_modified = self.client.get(reverse("all_berry_stats"), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+            self.assertEqual(not_modified.status_code, 304)
+
+        # Rebuilding the snapshot with the same data doesn't change its version.
+        rebuilt = SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        self.assertEqual(rebuilt.digest, snapshot.digest)
+        self.assertEqual(rebuilt.modified_at, snapshot.modified_at)
+        self.assertEqual(
+            self.client.get(reverse("all_berry_stats"), HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        changed = SnapshotStore().save(STATISTICS_SNAPSHOT, dict(STATISTICS, min_growth_time=4))
+        self.assertNotEqual(changed.version.etag, snapshot.version.etag)
+        response = self.client.get(reverse("all_berry_stats"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["min_growth_time"], 4)
+
+    def test_version_survives_culled_entry(self):
+        snapshot = SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        cache.delete("berries:snapshot:statistics:version", version=SNAPSHOT_VERSION)
+        self.assertEqual(SnapshotStore().get_version(STATISTICS_SNAPSHOT), snapshot.version)
+        self.assertIsNotNone(cache.get("berries:snapshot:statistics:version", version=SNAPSHOT_VERSION))
+
+    def test_refresh_without_chart_images(self):
+        table = BerryTable(make_berries(3))
+        SnapshotStore().save(VISUALIZATION_SNAPSHOT, dict(STATISTICS, bar_chart=b"bar", bins_histogram=b"bins"))
+        with patch("berries.service.BerriesService.get_data_for_visualization",
+                   return_value=dict(STATISTICS, charts=CHARTS)) as mock_get_data_for_visualization, \
+                patch("berries.service.BerriesService.get_attribute_statistics", return_value={"berries_count": 1}), \
+                patch("berries.service.BerriesService.get_berry_table", return_value=table):
+            snapshots = SnapshotStore().refresh()
+        mock_get_data_for_visualization.assert_called_once_with(encoded=False, images=False, berries=table)
+        self.assertNotIn(VISUALIZATION_SNAPSHOT, snapshots)
+        self.assertNotIn(ATTRIBUTES_SNAPSHOT, snapshots)
+        # The images would be out of date, so they are rendered again if a page asks for them.
+        self.assertIsNone(SnapshotStore().get(VISUALIZATION_SNAPSHOT))
+        self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, STATISTICS)
+
+    def test_serves_chart_data(self):
+        with patch("berries.service.BerriesService.get_chart_data", return_value=CHARTS) as mock_get_chart_data:
+            response = self.client.get(reverse("berry_stats_charts"))
+            self.client.get(reverse("berry_stats_charts"))
+            self.assertEqual(mock_get_chart_data.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), CHARTS)
+        not_modified = self.client.get(reverse("berry_stats_charts"), headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        with patch("berries.service.BerriesService.get_chart_data", side_effect=Exception()):
+            cache.clear()
+            self.assertEqual(self.client.get(reverse("berry_stats_charts")).status_code, 500)
+
+    def test_unreadable_version_is_a_json_error(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        with patch("berries.snapshots.SnapshotStore.get_version", side_effect=OSError()):
+            for url, error in ((reverse("all_berry_stats"), STATISTICS_ERROR), (reverse("berry_stats_charts"), CHARTS_ERROR)):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 500)
+                self.assertEqual(response.json(), {"error": error})
+
+    def test_visualization_page_draws_charts_in_browser(self):
+        SnapshotStore().save(STATISTICS_SNAPSHOT, STATISTICS)
+        SnapshotStore().save(CHARTS_SNAPSHOT, CHARTS)
+        with patch("berries.service.BerriesService.get_data_for_visualization") as mock_get_data_for_visualization:
+            response = self.client.get(reverse("berries_stats_visualization"))
+            mock_get_data_for_visualization.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["charts"], CHARTS)
+        self.assertContains(response, '<script id="chart-data" type="application/json">')
+        self.assertContains(response, '<canvas id="bins-histogram"')
+        self.assertNotContains(response, "<img")
+        self.assertEqual(self.client.get(reverse("berries_stats_visualization"), {"charts": "svg"}).status_code, 400)
+
+    def test_cold_visualization_page_runs_the_pipeline_once(self):
+        visualization_data = dict(STATISTICS, charts=CHARTS)
+        with patch("berries.service.BerriesService.get_data_for_visualization", return_value=visualization_data) as mock_visualization, \
+                patch("berries.service.BerriesService.get_statistics", side_effect=AssertionError), \
+                patch("berries.service.BerriesService.get_chart_data", side_effect=AssertionError):
+            response = self.client.get(reverse("berries_stats_visualization"))
+            mock_visualization.assert_called_once_with(encoded=False, images=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SnapshotStore().get(STATISTICS_SNAPSHOT).data, STATISTICS)
+        self.assertEqual(SnapshotStore().get(CHARTS_SNAPSHOT).data, CHARTS)
+
+    def test_visualization_page_falls_back_to_images(self):
+        visualization_data = dict(STATISTICS, bar_chart=b"\x89PNG bar", bins_histogram=b"\x89PNG bins", charts=CHARTS)
+        with patch("berries.service.BerriesService.get_data_for_visualization", return_value=visualization_data):
+            response = self.client.get(reverse("berries_stats_visualization"), {"charts": "server"})
+        self.assertContains(response, f'<img src="{response.context["bar_chart"]}"')
+        self.assertNotContains(response, "<canvas")
+
+    @override_settings(BERRIES_CHARTS_RENDERING="server")
+    def test_visualization_page_references_chart_urls(self):
+        visualization_data = dict(STATISTICS, bar_chart=b"\x89PNG bar", bins_histogram=b"\x89PNG bins")
+        with patch("berries.service.BerriesService.get_data_for_visualization", return_value=visualization_data):
+            response = self.client.get(reverse("berries_stats_visualization"))
+        self.assertNotIn(b"base64", response.content)
+        self.assertContains(response, f'<img src="{response.context["bar_chart"]}"')
@@ -0,0 +1,60 @@
+from berries.stats import StreamingStatistics
+from django.test import SimpleTestCase
+from collections import Counter
+import statistics
+import numpy
+import random
+
+
+def accumulate(values) -> StreamingStatistics:
+    accumulator = StreamingStatistics()
+    for value in values:
+        accumulator.add(value)
+    return accumulator
+
+
+class TestsStreamingStatistics(SimpleTestCase):
+
+    def assert_matches_statistics_module(self, values):
+        accumulator = accumulate(values)
+        self.assertEqual(accumulator.count, len(values))
+        self.assertEqual(accumulator.min(), min(values))
+        self.assertEqual(accumulator.max(), max(values))
+        self.assertEqual(float(accumulator.median()), float(statistics.median(values)))
+        self.assertEqual(accumulator.mean(), float(statistics.mean(values)))
+        expected_variance = 0.0 if len(values) == 1 else float(statistics.variance(values))
+        self.assertEqual(accumulator.variance(), expected_variance)
+        self.assertEqual(accumulator.mode(), statistics.mode(values))
+        self.assertEqual(list(accumulator.frequencies.items()), list(Counter(values).items()))
+        self.assertEqual(accumulator.values(), sorted(values))
+
+    def test_known_values(self):
+        self.assert_matches_statistics_module([3, 4, 5, 6, 8, 12, 15, 18, 24, 2, 3, 3])
+        self.assert_matches_statistics_module([5])
+        self.assert_matches_statistics_module([7, 7, 7, 7])
+
+    def test_mode_ties_keep_first_added(self):
+        self.assertEqual(accumulate([8, 2, 2, 8]).mode(), 8)
+
+    def test_random_values(self):
+        generator = random.Random(0)
+        for _ in range(500):
+            values = [generator.randint(0, 48) for _ in range(generator.randint(1, 100))]
+            self.assert_matches_statistics_module(values)
+
+    def test_histogram_matches_numpy(self):
+        generator = random.Random(0)
+        samples = [[3, 4, 5, 6, 8, 12, 15, 18, 24, 2], [7, 7, 7], [0, 1]] + [
+            [generator.randint(0, 48) for _ in range(generator.randint(1, 100))] for _ in range(200)]
+        for values in samples:
+            for bins in (1, 3, 5, 7):
+                edges, counts = accumulate(values).histogram(bins)
+                expected_counts, expected_edges = numpy.histogram(values, bins=bins)
+                self.assertEqual(edges, expected_edges.tolist())
+                self.assertEqual(counts, expected_counts.tolist())
+
+    def test_empty(self):
+        with self.assertRaises(statistics.StatisticsError):
+            StreamingStatistics().mean()
+        with self.assertRaises(statistics.StatisticsError):
+            StreamingStatistics().histogram(5)